@@ -0,0 +1,139 @@
+import asyncio
+from collections.abc import Callable, Iterable
+
+from .async_bank_account import AsyncBankAccount, AsyncCardRepository
+from .async_menu import AsyncMenu, AsyncUI
+from .atm import MAX_PIN_INPUT_ATTEMPTS, error_message
+from .card_number_filter import CardNumberFilter
+from .exceptions import (
+    ATMException,
+    CardNotExists,
+    CardStoreLoadFailed,
+    IncorrectMenuOption,
+    PinCodeAttemptsExceed,
+)
+from .ui_messages import UiMessage
+
+
+class AsyncATM:
+    """
+    Асинхронная управляющая логика банкомата. Сеанс ведётся так же, как в ATM,
+    и сообщения пользователю те же.
+
+    В отличие от ATM, по окончании сеанса (выход из меню или блокировка карты)
+    run() просто завершается, а не выбрасывает SystemExit наружу: SystemExit,
+    вылетевший из задачи, остановил бы цикл событий вместе со всеми сеансами.
+    """
+
+    def __init__(
+        self,
+        card_repository: AsyncCardRepository,
+        ui: AsyncUI,
+        menu: AsyncMenu,
+        max_pin_input_attempts: int = MAX_PIN_INPUT_ATTEMPTS,
+        card_number_filter: CardNumberFilter | None = None,
+        error_listener: Callable[[ATMException], None] | None = None,
+    ):
+        self._card_repository = card_repository
+        self._ui = ui
+        self._menu = menu
+        self._max_pin_input_attempts = max_pin_input_attempts
+        self._card_number_filter = card_number_filter
+        # Получает каждую ошибку, о которой банкомат сообщил пользователю
+        self._error_listener = error_listener
+        # Банковский аккаунт установится после прохождения аутентификации
+        self._bank_account: AsyncBankAccount
+
+    async def run(self) -> None:
+        """Проводит один сеанс работы с банкоматом"""
+        try:
+            await self._run()
+        except SystemExit:
+            return
+
+    async def _run(self) -> None:
+        await self._ui.show_message(UiMessage.GREETINGS)
+        try:
+            await self._authenticate()
+        except CardNotExists as e:
+            self._report_error(e)
+            await self._ui.show_message(UiMessage.CARD_NOT_EXISTS)
+            raise SystemExit
+        except PinCodeAttemptsExceed as e:
+            self._report_error(e)
+            await self._ui.show_message(UiMessage.CARD_BLOCKED)
+            raise SystemExit
+        except CardStoreLoadFailed as e:
+            self._report_error(e)
+            await self._ui.show_message(UiMessage.ATM_EXCEPTION)
+            raise SystemExit
+
+        while True:
+            await self._ui.show_separator()
+            await self._menu.show()
+
+            try:
+                user_menu_item_choice = await self._menu.get_user_menu_choice()
+            except IncorrectMenuOption:
+                min_choice, max_choice = self._menu.get_menu_min_max_numbers()
+                await self._ui.show_message(
+                    UiMessage.INCORRECT_MENU_ITEM.format(min_choice=min_choice, max_choice=max_choice)
+                )
+                continue
+
+            await self._ui.show_separator()
+            await self._execute_menu_item(user_menu_item_choice)
+
+    async def _execute_menu_item(self, user_menu_item_choice: int) -> None:
+        """Выполняет логику выбранного пользователем пунтка меню"""
+        try:
+            await self._menu.execute_item(user_menu_item_choice, self._bank_account)
+        except ATMException as e:
+            self._report_error(e)
+            await self._ui.show_message(error_message(e))
+
+    def _report_error(self, error: ATMException) -> None:
+        """Передаёт ошибку error подписчику ошибок, если он есть"""
+        if self._error_listener is not None:
+            self._error_listener(error)
+
+    async def _authenticate(self) -> bool:
+        """
+        Выполняет аутентификацию пользователя, запрашивая и проверяя номер
+        карты и пин-код. Если номера карты заведомо нет в хранилище,
+        падает исключение CardNotExists, не дожидаясь ввода пин-кода
+        """
+        user_card_number = (await self._ui.get_input(UiMessage.INPUT_CARD_NUMBER)).replace(" ", "").strip()
+        if self._card_number_filter is not None and not self._card_number_filter.might_exist(user_card_number):
+            raise CardNotExists
+
+        attempts_remaining = self._max_pin_input_attempts
+        while attempts_remaining > 0:
+            user_card_pin = (await self._ui.get_input(UiMessage.INPUT_CARD_PIN)).replace(" ", "").strip()
+            bank_account = AsyncBankAccount(user_card_number, self._card_repository)
+
+            if await bank_account.is_pin_code_valid(user_card_pin):
+                await self._ui.show_message(UiMessage.PIN_ACCEPTED)
+                self._bank_account = bank_account
+                return True
+            else:
+                attempts_remaining -= 1
+                if attempts_remaining > 0:
+                    await self._ui.show_message(UiMessage.INCORRECT_PIN.format(attempts_remaining=attempts_remaining))
+        else:
+            raise PinCodeAttemptsExceed
+
+    def __repr__(self) -> str:
+        return (
+            f"""{self.__class__.__name__}(card_repository={self._card_repository!r}, ui={self._ui!r}, """
+            f"""menu={self._menu!r}, max_pin_input_attempts={self._max_pin_input_attempts!r})"""
+        )
+
+
+async def run_sessions(atms: Iterable[AsyncATM]) -> list[BaseException | None]:
+    """
+    Проводит сеансы нескольких банкоматов одновременно в одном цикле событий.
+    Ошибка одного сеанса не прерывает остальные: для каждого сеанса
+    возвращается возникшее в нём исключение или None
+    """
+    return await asyncio.gather(*(atm.run() for atm in atms), return_exceptions=True)
@@ -0,0 +1,125 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+from .bank_account import CardRepository
+from .exceptions import CardNotExists
+from .typedefs import PIN, CardNumber, Rubles
+
+
+class AsyncCardRepository(ABC):
+    """Асинхронное хранилище данных по картам"""
+
+    @abstractmethod
+    async def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Атомарно снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, баланс не меняется и падает исключение InsufficientFunds
+        """
+        pass
+
+    @abstractmethod
+    async def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        pass
+
+    @abstractmethod
+    async def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        pass
+
+    @abstractmethod
+    async def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        pass
+
+    async def close(self) -> None:
+        """Освобождает ресурсы хранилища и сохраняет несохранённые изменения"""
+        return
+
+
+class ThreadPoolCardRepository(AsyncCardRepository):
+    """
+    Асинхронная обёртка над синхронным хранилищем карт.
+
+    Вызовы синхронного хранилища выполняются в пуле потоков executor
+    (по умолчанию — в пуле цикла событий), поэтому цикл событий
+    не блокируется на время работы с хранилищем.
+    """
+
+    def __init__(self, card_repository: CardRepository, executor: Executor | None = None):
+        self._card_repository = card_repository
+        self._executor = executor
+
+    async def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Снимает amount рублей с баланса карты с номером card и возвращает новый баланс"""
+        return await self._run(self._card_repository.withdraw, card, amount)
+
+    async def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        return await self._run(self._card_repository.deposit, card, amount)
+
+    async def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return await self._run(self._card_repository.get_balance, card)
+
+    async def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return await self._run(self._card_repository.is_card_pin_valid, card, pin)
+
+    async def close(self) -> None:
+        """Закрывает обёрнутое синхронное хранилище"""
+        await self._run(self._card_repository.close)
+
+    async def _run(self, func: Callable, *args):
+        """Выполняет синхронную функцию func в пуле потоков"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(card_repository={self._card_repository!r}, executor={self._executor!r})"
+
+
+class AsyncBankAccount:
+    """Асинхронная работа с банковским счётом — пополнение баланса, снятие денег"""
+
+    def __init__(self, card: CardNumber, card_repository: AsyncCardRepository):
+        self._card = card
+        self._card_repository = card_repository
+
+    async def withdraw(self, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        return await self._card_repository.withdraw(self._card, amount)
+
+    async def deposit(self, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты на amount рублей и возвращает новый баланс"""
+        return await self._card_repository.deposit(self._card, amount)
+
+    async def get_balance(self) -> int:
+        """Возвращает баланс карты"""
+        return await self._card_repository.get_balance(self._card)
+
+    async def is_pin_code_valid(self, pin: PIN) -> bool:
+        """
+        Возвращает True, если переданная карта найдена и её пин-код соответствует переданному,
+        иначе возвращает False
+        """
+        try:
+            return await self._card_repository.is_card_pin_valid(self._card, pin)
+        except CardNotExists:
+            return False
+
+    def __repr__(self) -> str:
+        return (
+            f"""{self.__class__.__name__}(card={self._card!r}, """
+            f"""card_repository={self._card_repository!r})"""
+        )
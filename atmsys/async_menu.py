@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+
+from .async_bank_account import AsyncBankAccount
+from .cash_dispenser import CashDispenser
+from .exceptions import IncorrectMenuOption
+from .menu import format_notes, parse_amount
+from .ui_messages import UiMessage
+
+
+class AsyncUI(ABC):
+    """Асинхронный пользовательский интерфейс банкомата"""
+
+    @abstractmethod
+    async def show_message(self, message: str) -> None:
+        """Показывает сообщение message пользователю"""
+        ...
+
+    @abstractmethod
+    async def get_input(self, prompt: str) -> str:
+        """Запрашивает данные у пользователя и возвращает их"""
+        ...
+
+    @abstractmethod
+    async def show_separator(self) -> None:
+        """Показывает визуальный разделитель"""
+        ...
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+
+class AsyncMenuItem(ABC):
+    """Абстрактный асинхронный пункт меню банкомата"""
+
+    def __init__(self, description: str):
+        # Название пункта меню, которое будет выводиться пользователю
+        self.description = description
+
+    @abstractmethod
+    async def execute(self, bank_account: AsyncBankAccount, ui: AsyncUI) -> None:
+        """Выполняет действие при выборе этого пункта меню"""
+        pass
+
+    def __repr__(self) -> str:
+        return f"""{self.__class__.__name__}(description="{self.description!r}")"""
+
+
+class AsyncCheckBalanceMenuItem(AsyncMenuItem):
+    """Пункт меню — проверка баланса карты"""
+
+    def __init__(self):
+        super().__init__(UiMessage.MENU_GET_BALANCE_ITEM)
+
+    async def execute(self, bank_account: AsyncBankAccount, ui: AsyncUI) -> None:
+        """Показывает пользователю текущий баланс карты"""
+        balance = await bank_account.get_balance()
+        await ui.show_message(UiMessage.BALANCE.format(balance=balance))
+
+
+class AsyncWithdrawMenuItem(AsyncMenuItem):
+    """Пункт меню — списание денег с баланса карты"""
+
+    def __init__(self, cash_dispenser: CashDispenser | None = None):
+        super().__init__(UiMessage.MENU_WITHDRAW_ITEM)
+        self._cash_dispenser = cash_dispenser
+
+    async def execute(self, bank_account: AsyncBankAccount, ui: AsyncUI) -> None:
+        """
+        Выполняет снятие денег с баланса карты. Купюры подбираются
+        до списания, как в WithdrawMenuItem
+        """
+        amount = parse_amount(await ui.get_input(UiMessage.HOW_MUCH_WITHDRAW_INPUT))
+        if self._cash_dispenser is None:
+            balance = await bank_account.withdraw(amount)
+        else:
+            notes = self._cash_dispenser.reserve(amount)
+            try:
+                balance = await bank_account.withdraw(amount)
+            except Exception:
+                self._cash_dispenser.release(notes)
+                raise
+            await ui.show_message(UiMessage.NOTES_DISPENSED.format(notes=format_notes(notes)))
+        await ui.show_message(UiMessage.BALANCE.format(balance=balance))
+
+
+class AsyncDepositMenuItem(AsyncMenuItem):
+    """Пункт меню — пополнение баланса карты"""
+
+    def __init__(self, cash_dispenser: CashDispenser | None = None):
+        super().__init__(UiMessage.MENU_DEPOSIT_ITEM)
+        self._cash_dispenser = cash_dispenser
+
+    async def execute(self, bank_account: AsyncBankAccount, ui: AsyncUI) -> None:
+        """
+        Выполняет пополнение баланса карты. Внесённые купюры попадают
+        в кассеты, как в DepositMenuItem
+        """
+        amount = parse_amount(await ui.get_input(UiMessage.HOW_MUCH_DEPOSIT_INPUT))
+        if self._cash_dispenser is None:
+            balance = await bank_account.deposit(amount)
+        else:
+            notes = self._cash_dispenser.split(amount)
+            balance = await bank_account.deposit(amount)
+            self._cash_dispenser.refill(notes)
+        await ui.show_message(UiMessage.BALANCE.format(balance=balance))
+
+
+class AsyncExitMenuItem(AsyncMenuItem):
+    """Пункт меню — выход из меню банкомата"""
+
+    def __init__(self):
+        super().__init__(UiMessage.MENU_EXIT_ITEM)
+
+    async def execute(self, bank_account: AsyncBankAccount, ui: AsyncUI) -> None:
+        """Выполняет выход из меню банкомата"""
+        await ui.show_message(UiMessage.GOODBYE)
+        raise SystemExit
+
+
+class AsyncMenu:
+    """Асинхронное меню банкомата"""
+
+    def __init__(self, items: Sequence[AsyncMenuItem], ui: AsyncUI):
+        self._items = items
+        self._ui = ui
+
+    async def show(self) -> None:
+        """Выводит список пунктов меню в UI"""
+        menu: list[str] = [UiMessage.MENU_CHOOSE_ITEM]
+        for menu_item_number, menu_item in enumerate(self._items, 1):
+            menu.append(f"{menu_item_number} - {menu_item.description}")
+        await self._ui.show_message("\n".join(menu))
+
+    async def get_user_menu_choice(self) -> int:
+        """Запрашивает у пользователя пункт меню и возвращает его номер"""
+        user_menu_item_choice = await self._ui.get_input(UiMessage.MENU_NUMBER_INPUT)
+        if not self._is_user_menu_item_choice_valid(user_menu_item_choice):
+            raise IncorrectMenuOption
+        return int(user_menu_item_choice)
+
+    def get_menu_min_max_numbers(self) -> tuple[int, int]:
+        """Возвращает min и max номера пунктов меню"""
+        return 1, len(self._items)
+
+    async def execute_item(self, user_menu_item_choice: int, bank_account: AsyncBankAccount) -> None:
+        """Выполняет логику пункта меню под номером number, нумерация начинается с единицы"""
+        await self._items[user_menu_item_choice - 1].execute(bank_account, self._ui)
+
+    def _is_user_menu_item_choice_valid(self, user_menu_item_choice: str) -> bool:
+        """
+        Возвращает True, если пользователем выбран корректный пункт меню, иначе False
+        """
+        if not user_menu_item_choice.isdigit():
+            return False
+        min_choice_number, max_choice_number = self.get_menu_min_max_numbers()
+        return min_choice_number <= int(user_menu_item_choice) <= max_choice_number
+
+    def __repr__(self) -> str:
+        return f"""{self.__class__.__name__}(items={self._items!r})"""
@@ -0,0 +1,32 @@
+import asyncio
+
+from .async_menu import AsyncUI
+
+
+class StreamUI(AsyncUI):
+    """Асинхронный текстовый интерфейс банкомата поверх потоков asyncio, например сетевого соединения"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    async def show_message(self, message: str) -> None:
+        """Показывает сообщение message пользователю"""
+        self._writer.write(f"{message}\n".encode())
+        await self._writer.drain()
+
+    async def get_input(self, prompt: str) -> str:
+        """
+        Запрашивает данные у пользователя и возвращает их.
+        Если пользователь закрыл соединение, возбуждает EOFError
+        """
+        self._writer.write(prompt.encode())
+        await self._writer.drain()
+        line = await self._reader.readline()
+        if not line:
+            raise EOFError
+        return line.decode().rstrip("\r\n")
+
+    async def show_separator(self) -> None:
+        """Показывает визуальный разделитель"""
+        await self.show_message(f"\n{'=' * 25}\n")
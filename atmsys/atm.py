@@ -1,39 +1,91 @@
+from collections.abc import Callable
+
 from .bank_account import BankAccount, CardRepository
+from .card_number_filter import CardNumberFilter
 from .exceptions import (
     ATMException,
+    CannotAccept,
+    CannotDispense,
     CardNotExists,
+    CardStoreLoadFailed,
     IncorrectMenuOption,
     InsufficientFunds,
     InvalidAmount,
     PinCodeAttemptsExceed,
+    WithdrawalLimitExceeded,
 )
 from .menu import UI, Menu
+from .metrics import MetricsRegistry
 from .ui_messages import UiMessage
 
 MAX_PIN_INPUT_ATTEMPTS = 3
 
 
+def error_message(error: ATMException) -> str:
+    """Возвращает сообщение, которое банкомат показывает пользователю при ошибке error в пункте меню"""
+    if isinstance(error, InvalidAmount):
+        return str(error)
+    if isinstance(error, InsufficientFunds):
+        return UiMessage.INSUFFICIENT_FUNDS
+    if isinstance(error, CannotDispense):
+        return UiMessage.CANNOT_DISPENSE
+    if isinstance(error, CannotAccept):
+        return UiMessage.CANNOT_ACCEPT.format(denominations=", ".join(map(str, error.denominations)))
+    if isinstance(error, WithdrawalLimitExceeded):
+        return UiMessage.WITHDRAWAL_LIMIT_EXCEEDED.format(available=error.available)
+    if isinstance(error, CardNotExists):
+        return UiMessage.CARD_NOT_EXISTS
+    return UiMessage.ATM_EXCEPTION
+
+
 class ATM:
     """Управляющая логика банкомата"""
 
     def __init__(
-        self, card_repository: CardRepository, ui: UI, menu: Menu, max_pin_input_attempts: int = MAX_PIN_INPUT_ATTEMPTS
+        self,
+        card_repository: CardRepository,
+        ui: UI,
+        menu: Menu,
+        max_pin_input_attempts: int = MAX_PIN_INPUT_ATTEMPTS,
+        metrics: MetricsRegistry | None = None,
+        card_number_filter: CardNumberFilter | None = None,
+        error_listener: Callable[[ATMException], None] | None = None,
     ):
         self._card_repository = card_repository
         self._ui = ui
         self._menu = menu
         self._max_pin_input_attempts = max_pin_input_attempts
+        self._card_number_filter = card_number_filter
+        # Получает каждую ошибку, о которой банкомат сообщил пользователю
+        self._error_listener = error_listener
         # Банковский аккаунт установится после прохождения аутентификации
         self._bank_account: BankAccount
+        # Без реестра метрик методы не оборачиваются и замеры ничего не стоят
+        if metrics is not None:
+            self._authenticate = metrics.timed("atmsys_atm_authenticate", "ATM authentication latency")(
+                self._authenticate
+            )
+            self._execute_menu_item = metrics.timed("atmsys_atm_execute_menu_item", "ATM menu item handling latency")(
+                self._execute_menu_item
+            )
 
     def run(self):
         """Запускает работу банкомата"""
         self._ui.show_message(UiMessage.GREETINGS)
         try:
             self._authenticate()
-        except PinCodeAttemptsExceed:
+        except CardNotExists as e:
+            self._report_error(e)
+            self._ui.show_message(UiMessage.CARD_NOT_EXISTS)
+            raise SystemExit
+        except PinCodeAttemptsExceed as e:
+            self._report_error(e)
             self._ui.show_message(UiMessage.CARD_BLOCKED)
             raise SystemExit
+        except CardStoreLoadFailed as e:
+            self._report_error(e)
+            self._ui.show_message(UiMessage.ATM_EXCEPTION)
+            raise SystemExit
         assert self._bank_account is not None
 
         while True:
@@ -56,21 +108,24 @@ class ATM:
         """Выполняет логику выбранного пользователем пунтка меню"""
         try:
             self._menu.execute_item(user_menu_item_choice, self._bank_account)
-        except InvalidAmount as e:
-            self._ui.show_message(str(e))
-        except InsufficientFunds:
-            self._ui.show_message(UiMessage.INSUFFICIENT_FUNDS)
-        except CardNotExists:
-            self._ui.show_message(UiMessage.CARD_NOT_EXISTS)
-        except ATMException:
-            self._ui.show_message(UiMessage.ATM_EXCEPTION)
+        except ATMException as e:
+            self._report_error(e)
+            self._ui.show_message(error_message(e))
+
+    def _report_error(self, error: ATMException) -> None:
+        """Передаёт ошибку error подписчику ошибок, если он есть"""
+        if self._error_listener is not None:
+            self._error_listener(error)
 
     def _authenticate(self) -> bool:
         """
         Выполняет аутентификацию пользователя, запрашивая и проверяя номер
-        карты и пин-код
+        карты и пин-код. Если номера карты заведомо нет в хранилище,
+        падает исключение CardNotExists, не дожидаясь ввода пин-кода
         """
         user_card_number = self._ui.get_input(UiMessage.INPUT_CARD_NUMBER).replace(" ", "").strip()
+        if self._card_number_filter is not None and not self._card_number_filter.might_exist(user_card_number):
+            raise CardNotExists
 
         attempts_remaining = self._max_pin_input_attempts
         while attempts_remaining > 0:
@@ -1,18 +1,22 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
 
 from .exceptions import CardNotExists, InsufficientFunds
-from .typedefs import PIN, CardNumber, Rubles
+from .typedefs import PIN, CardNumber, Operation, OperationKind, OperationResult, Rubles
 
 
 class CardRepository(ABC):
     @abstractmethod
-    def withdraw(self, card: CardNumber, amount: Rubles) -> None:
-        """Снимает amount рублей с баланса карты с номером card"""
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Атомарно снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, баланс не меняется и падает исключение InsufficientFunds
+        """
         pass
 
     @abstractmethod
-    def deposit(self, card: CardNumber, amount: Rubles) -> None:
-        """Пополняет баланс карты с номером card на amount рублей"""
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
         pass
 
     @abstractmethod
@@ -28,6 +32,47 @@ class CardRepository(ABC):
         """
         pass
 
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """
+        Подписывает listener на номера карт, которые добавляются в хранилище.
+        Хранилища, в которые карты не добавляются, подписку игнорируют,
+        обёртки передают её обёрнутому хранилищу
+        """
+        return
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """
+        Применяет пакет операций по порядку и возвращает результат каждой.
+        Недостаточно средств или нет карты — это результат операции,
+        а не исключение: остальные операции пакета всё равно выполняются.
+        Хранилища переопределяют метод, чтобы сохранять пакет за один раз
+        """
+        results = []
+        for operation in operations:
+            try:
+                if operation.kind == OperationKind.WITHDRAW:
+                    balance = self.withdraw(operation.card, operation.amount)
+                else:
+                    balance = self.deposit(operation.card, operation.amount)
+            except (InsufficientFunds, CardNotExists) as e:
+                results.append(OperationResult(operation, error=type(e).__name__))
+            else:
+                results.append(OperationResult(operation, balance=balance))
+        return results
+
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища и сохраняет несохранённые изменения"""
+        return
+
+
+class ListableCardRepository(CardRepository):
+    """Хранилище карт, которое умеет перечислять номера всех своих карт"""
+
+    @abstractmethod
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        pass
+
 
 class BankAccount:
     """Работа с банковским счётом — пополнение баланса, снятие денег"""
@@ -36,15 +81,21 @@ class BankAccount:
         self._card = card
         self._card_repository = card_repository
 
-    def withdraw(self, amount: Rubles) -> None:
-        """Снимает amount рублей с баланса карты"""
-        if self._card_repository.get_balance(self._card) < amount:
-            raise InsufficientFunds
-        self._card_repository.withdraw(self._card, amount)
+    @property
+    def card(self) -> CardNumber:
+        """Номер карты счёта"""
+        return self._card
+
+    def withdraw(self, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        return self._card_repository.withdraw(self._card, amount)
 
-    def deposit(self, amount: Rubles) -> None:
-        """Пополняет баланс карты на amount рублей"""
-        self._card_repository.deposit(self._card, amount)
+    def deposit(self, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты на amount рублей и возвращает новый баланс"""
+        return self._card_repository.deposit(self._card, amount)
 
     def get_balance(self) -> int:
         """Возвращает баланс карты"""
@@ -0,0 +1,149 @@
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import TextIO
+
+from .atm import ATM
+from .bank_account import CardRepository
+from .main import (
+    add_cache,
+    add_cache_arguments,
+    add_card_filter_arguments,
+    add_cash_dispenser_arguments,
+    add_storage_arguments,
+    add_transaction_journal,
+    add_transaction_journal_arguments,
+    add_withdrawal_limit_arguments,
+    add_withdrawal_limits,
+    closing_card_repository,
+    make_card_number_filter,
+    make_card_repository,
+    make_cash_dispenser,
+    make_menu_items,
+    open_transaction_journal,
+    storage_options,
+)
+from .menu import Menu, MenuItem
+from .ui import ScriptedUI
+
+
+class SessionStatus(StrEnum):
+    COMPLETED = "completed"  # сеанс завершился: выход из меню, блокировка карты или неизвестная карта
+    SCRIPT_EXHAUSTED = "script_exhausted"  # ввод сценария закончился раньше сеанса
+    FAILED = "failed"  # сеанс прервало исключение
+
+
+@dataclass(frozen=True)
+class SessionScript:
+    """Сценарий сеанса: идентификатор для результата и ввод пользователя по порядку"""
+
+    session: str | int
+    inputs: tuple[str, ...]
+
+
+@dataclass
+class BatchReport:
+    sessions: int = 0
+    duration: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+
+    def print(self, file: TextIO = sys.stderr) -> None:
+        throughput = self.sessions / self.duration if self.duration else 0.0
+        print(f"Sessions: {self.sessions} in {self.duration:.2f}s ({throughput:.0f} sessions/sec)", file=file)
+        for status, count in self.statuses.most_common():
+            print(f"  {status}: {count}", file=file)
+
+
+def parse_scripts(lines: Iterable[str]) -> Iterator[SessionScript]:
+    """
+    Разбирает сценарии сеансов, по одному в строке: JSON-массив ввода
+    ["1333444455556666", "5678", "1", "4"] или объект {"session": ..., "inputs": [...]}.
+    Без session идентификатором служит номер строки. Пустые строки пропускаются
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        script = json.loads(line)
+        if isinstance(script, dict):
+            yield SessionScript(script.get("session", line_number), tuple(script["inputs"]))
+        else:
+            yield SessionScript(line_number, tuple(script))
+
+
+def run_batch(
+    card_repository: CardRepository,
+    menu_items: Sequence[MenuItem],
+    scripts: Iterable[SessionScript],
+    output: TextIO,
+    **atm_options,
+) -> BatchReport:
+    """
+    Проводит сеансы по сценариям scripts друг за другом и пишет результат
+    каждого сеанса JSON-строкой в output. Интерфейс, меню и банкомат создаются
+    один раз на все сеансы: для нового сеанса интерфейс только получает новый ввод
+    """
+    ui = ScriptedUI()
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=menu_items, ui=ui), **atm_options)
+    report = BatchReport()
+    started = time.perf_counter()
+    for script in scripts:
+        ui.reset(script.inputs)
+        result: dict = {"session": script.session}
+        try:
+            atm.run()
+        except SystemExit:
+            result["status"] = SessionStatus.COMPLETED
+        except EOFError:
+            result["status"] = SessionStatus.SCRIPT_EXHAUSTED
+        except Exception as e:
+            result["status"] = SessionStatus.FAILED
+            result["error"] = type(e).__name__
+        result["messages"] = ui.messages
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        report.sessions += 1
+        report.statuses[result["status"]] += 1
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="Run scripted ATM sessions without a terminal, one JSON line each")
+    add_storage_arguments(parser)
+    add_cache_arguments(parser)
+    add_transaction_journal_arguments(parser)
+    add_withdrawal_limit_arguments(parser)
+    add_cash_dispenser_arguments(parser)
+    add_card_filter_arguments(parser)
+    parser.add_argument("scripts", nargs="?", default="-", help="JSON-lines session scripts (default: stdin)")
+    parser.add_argument("--output", help="JSON-lines file for session results (default: stdout)")
+    args = parser.parse_args(argv)
+
+    transaction_journal = open_transaction_journal(args)
+    storage = make_card_repository(args.storage, args.cards, **storage_options(args, None))
+    card_number_filter = make_card_number_filter(parser, args, storage)
+    card_repository = add_withdrawal_limits(
+        args, add_transaction_journal(add_cache(args, storage, None), transaction_journal)
+    )
+    with closing_card_repository(card_repository):
+        with (
+            open(args.scripts) if args.scripts != "-" else nullcontext(sys.stdin) as scripts,
+            open(args.output, "w") if args.output else nullcontext(sys.stdout) as output,
+        ):
+            report = run_batch(
+                card_repository,
+                make_menu_items(transaction_journal, make_cash_dispenser(args)),
+                parse_scripts(scripts),
+                output,
+                card_number_filter=card_number_filter,
+            )
+        report.print()
+
+
+if __name__ == "__main__":
+    main()
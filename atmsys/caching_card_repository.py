@@ -0,0 +1,232 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+
+from .bank_account import CardRepository
+from .exceptions import InsufficientFunds, WriteBackFailed
+from .metrics import MetricsRegistry
+from .typedefs import PIN, CardNumber, Operation, OperationKind, OperationResult, Rubles
+
+# Сколько карт по умолчанию держит кэш
+CACHE_CAPACITY = 10_000
+
+
+class WritePolicy(StrEnum):
+    """Когда изменения баланса доходят до обёрнутого хранилища"""
+
+    THROUGH = "through"  # сразу: кэш только ускоряет чтения
+    BACK = "back"  # при вытеснении карты из кэша и при закрытии хранилища
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    write_back_failures: int = 0
+
+
+@dataclass
+class _CachedCard:
+    balance: Rubles | None = None
+    # Пин-код, который уже проверялся и оказался верным
+    valid_pin: PIN | None = None
+    # Изменение баланса, ещё не переданное в обёрнутое хранилище
+    pending: Rubles = 0
+
+
+class CachingCardRepository(CardRepository):
+    """
+    Кэш недавно использованных карт перед более медленным хранилищем.
+    В кэше не больше capacity карт, при переполнении вытесняется карта,
+    к которой дольше всего не обращались, поэтому память ограничена
+    рабочим набором карт, а не их общим числом.
+
+    При политике WritePolicy.BACK кэш должен быть единственным, кто меняет
+    балансы в обёрнутом хранилище: накопленное изменение передаётся туда
+    одной операцией. Если обёрнутое хранилище отклоняет переданное изменение,
+    карта убирается из кэша, чтобы следующее чтение взяло баланс из хранилища,
+    а flush() и close() падают с исключением WriteBackFailed
+    """
+
+    def __init__(
+        self,
+        card_repository: CardRepository,
+        capacity: int = CACHE_CAPACITY,
+        policy: WritePolicy = WritePolicy.THROUGH,
+        metrics: MetricsRegistry | None = None,
+    ):
+        self._card_repository = card_repository
+        self._capacity = capacity
+        self._policy = policy
+        self._cache: OrderedDict[CardNumber, _CachedCard] = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = CacheStats()
+        self._metrics = metrics
+        # Отклонённые обёрнутым хранилищем изменения, о которых ещё не сообщено
+        self._failed_writes: list[OperationResult] = []
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        with self._lock:
+            if self._policy == WritePolicy.THROUGH:
+                return self._remember_balance(card, self._card_repository.withdraw(card, amount))
+            cached = self._cached_balance(card)
+            if cached.balance < amount:
+                raise InsufficientFunds
+            cached.balance -= amount
+            cached.pending -= amount
+            return cached.balance
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        with self._lock:
+            if self._policy == WritePolicy.THROUGH:
+                return self._remember_balance(card, self._card_repository.deposit(card, amount))
+            cached = self._cached_balance(card)
+            cached.balance += amount
+            cached.pending += amount
+            return cached.balance
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        with self._lock:
+            return self._cached_balance(card).balance
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        with self._lock:
+            cached = self._lookup(card)
+            if cached is not None and cached.valid_pin == pin:
+                return True
+            is_valid = self._card_repository.is_card_pin_valid(card, pin)
+            if is_valid:
+                self._store(card).valid_pin = pin
+            return is_valid
+
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """Подписывает listener на номера карт, которые добавляются в обёрнутое хранилище"""
+        self._card_repository.on_card_added(listener)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций; при сквозной записи — одним пакетом в обёрнутом хранилище"""
+        if self._policy == WritePolicy.BACK:
+            return super().apply_batch(operations)
+        with self._lock:
+            results = self._card_repository.apply_batch(operations)
+            for result in results:
+                if result.ok and result.operation.card in self._cache:
+                    self._cache[result.operation.card].balance = result.balance
+            return results
+
+    def flush(self) -> None:
+        """
+        Передаёт все накопленные изменения балансов в обёрнутое хранилище.
+        Если хранилище отклонило изменения, в том числе переданные раньше
+        при вытеснении карт, падает исключение WriteBackFailed
+        """
+        with self._lock:
+            operations = []
+            for card, cached in self._cache.items():
+                operation = self._pending_operation(card, cached)
+                if operation is not None:
+                    operations.append(operation)
+            if operations:
+                self._write_back(operations)
+            for operation in operations:
+                if operation.card in self._cache:
+                    self._cache[operation.card].pending = 0
+            failed, self._failed_writes = self._failed_writes, []
+        if failed:
+            raise WriteBackFailed(failed)
+
+    def close(self) -> None:
+        """Сохраняет накопленные изменения и закрывает обёрнутое хранилище"""
+        try:
+            self.flush()
+        finally:
+            self._card_repository.close()
+
+    def _lookup(self, card: CardNumber) -> _CachedCard | None:
+        """Возвращает карту из кэша, отмечая её как недавно использованную, и считает попадания и промахи"""
+        cached = self._cache.get(card)
+        if cached is None:
+            self._count("misses")
+            return None
+        self._cache.move_to_end(card)
+        self._count("hits")
+        return cached
+
+    def _cached_balance(self, card: CardNumber) -> _CachedCard:
+        """Возвращает карту из кэша с известным балансом, при необходимости загружая баланс"""
+        cached = self._lookup(card)
+        if cached is None or cached.balance is None:
+            balance = self._card_repository.get_balance(card)
+            cached = self._store(card)
+            cached.balance = balance
+        return cached
+
+    def _remember_balance(self, card: CardNumber, balance: Rubles) -> Rubles:
+        self._store(card).balance = balance
+        return balance
+
+    def _store(self, card: CardNumber) -> _CachedCard:
+        """Возвращает запись кэша для карты card, создавая её и вытесняя самую старую при переполнении"""
+        cached = self._cache.get(card)
+        if cached is not None:
+            return cached
+        cached = self._cache[card] = _CachedCard()
+        while len(self._cache) > self._capacity:
+            evicted_card, evicted = self._cache.popitem(last=False)
+            operation = self._pending_operation(evicted_card, evicted)
+            if operation is not None:
+                try:
+                    self._write_back([operation])
+                except Exception:
+                    # Хранилище недоступно: карта с изменением остаётся в кэше до следующей попытки
+                    self._cache[evicted_card] = evicted
+                    self._cache.move_to_end(evicted_card, last=False)
+                    raise
+            self._count("evictions")
+        return cached
+
+    def _write_back(self, operations: list[Operation]) -> None:
+        """
+        Передаёт накопленные изменения в обёрнутое хранилище. Карты, изменения
+        которых хранилище отклонило, убираются из кэша, а отклонённые операции
+        запоминаются, чтобы flush() сообщил о них
+        """
+        for result in self._card_repository.apply_batch(operations):
+            if result.ok:
+                continue
+            self._cache.pop(result.operation.card, None)
+            self._failed_writes.append(result)
+            self._count("write_back_failures")
+
+    @staticmethod
+    def _pending_operation(card: CardNumber, cached: _CachedCard) -> Operation | None:
+        """Операция, которая переносит накопленное изменение баланса карты в обёрнутое хранилище"""
+        if cached.pending > 0:
+            return Operation(OperationKind.DEPOSIT, card, cached.pending)
+        if cached.pending < 0:
+            return Operation(OperationKind.WITHDRAW, card, -cached.pending)
+        return None
+
+    def _count(self, event: str) -> None:
+        setattr(self.stats, event, getattr(self.stats, event) + 1)
+        if self._metrics is not None:
+            self._metrics.counter(f"atmsys_cache_{event}_total", f"Card cache {event}").inc()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(card_repository={self._card_repository!r}, capacity={self._capacity!r}, "
+            f"policy={self._policy!r})"
+        )
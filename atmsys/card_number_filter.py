@@ -0,0 +1,102 @@
+import hashlib
+import math
+from collections.abc import Iterable
+
+from .bank_account import ListableCardRepository
+from .typedefs import CardNumber
+
+# Допустимая длина номера карты по ISO/IEC 7812
+MIN_CARD_NUMBER_LENGTH = 12
+MAX_CARD_NUMBER_LENGTH = 19
+# Доля ложноположительных ответов фильтра Блума
+BLOOM_ERROR_RATE = 0.001
+
+
+def is_luhn_valid(card: CardNumber) -> bool:
+    """Возвращает True, если контрольная цифра номера карты card верна по алгоритму Луна"""
+    total = 0
+    for position, char in enumerate(reversed(card)):
+        digit = ord(char) - 48
+        if position % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: компактное множество, которое может ошибочно ответить
+    «возможно, есть», но никогда не ошибается в ответе «точно нет»
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self._size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, item: str) -> None:
+        """Добавляет item в множество"""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """Вычисляет позиции битов элемента item двойным хэшированием"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        return ((first + number * second) % self._size for number in range(self._hashes))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(size={self._size!r}, hashes={self._hashes!r})"
+
+
+class CardNumberFilter:
+    """
+    Быстрая предварительная проверка номера карты без обращения к хранилищу:
+    формат и длина номера, при необходимости контрольная цифра по алгоритму
+    Луна, и фильтр Блума по номерам всех карт хранилища.
+
+    Фильтр строится один раз при запуске. Фильтр, построенный по хранилищу,
+    подписывается на добавление в него карт; карты, выпущенные в обход
+    хранилища, нужно добавлять в фильтр методом add()
+    """
+
+    def __init__(self, card_numbers: Iterable[CardNumber], check_luhn: bool = False, capacity: int | None = None):
+        card_numbers = list(card_numbers)
+        self._check_luhn = check_luhn
+        self._bloom_filter = BloomFilter(capacity or len(card_numbers))
+        for card in card_numbers:
+            self._bloom_filter.add(card)
+
+    @classmethod
+    def from_repository(cls, card_repository: ListableCardRepository, check_luhn: bool = False) -> "CardNumberFilter":
+        """
+        Строит фильтр по номерам всех карт хранилища card_repository и подписывает
+        его на карты, которые будут добавлены в хранилище
+        """
+        card_filter = cls(card_repository.card_numbers(), check_luhn=check_luhn)
+        card_repository.on_card_added(card_filter.add)
+        return card_filter
+
+    def add(self, card: CardNumber) -> None:
+        """Добавляет номер новой карты card в фильтр"""
+        self._bloom_filter.add(card)
+
+    def might_exist(self, card: CardNumber) -> bool:
+        """
+        Возвращает False, если карты с номером card точно нет в хранилище,
+        и True, если она там, возможно, есть
+        """
+        if not (MIN_CARD_NUMBER_LENGTH <= len(card) <= MAX_CARD_NUMBER_LENGTH and card.isdigit()):
+            return False
+        if self._check_luhn and not is_luhn_valid(card):
+            return False
+        return card in self._bloom_filter
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(check_luhn={self._check_luhn!r}, bloom_filter={self._bloom_filter!r})"
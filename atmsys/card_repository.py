@@ -1,30 +1,57 @@
-from .bank_account import CardRepository
-from .exceptions import CardNotExists
+import copy
+import threading
+from collections.abc import Iterator
+
+from .bank_account import ListableCardRepository
+from .exceptions import CardNotExists, InsufficientFunds
 from .typedefs import PIN, CardNumber, Cards, Rubles
 
+# Карты, с которыми хранилище создаётся по умолчанию
+DEMO_CARDS: Cards = {
+    "3333444455556666": {"pin": "1234", "balance": 1_000},
+    "1234567890123456": {"pin": "7777", "balance": 28_500},
+}
+# На сколько блокировок делятся карты хранилища
+LOCK_STRIPES = 256
+
 
-class InMemoryCardRepository(CardRepository):
-    """Работа с хранилищем данных по картам"""
+class InMemoryCardRepository(ListableCardRepository):
+    """
+    Потокобезопасное хранилище карт в памяти. Карты распределены по
+    lock_stripes блокировкам по номеру карты, поэтому операции с разными
+    картами почти никогда не ждут друг друга, а операции с одной картой
+    выполняются строго по очереди
+    """
 
-    _cards: Cards = {
-        "3333444455556666": {"pin": "1234", "balance": 1_000},
-        "1234567890123456": {"pin": "7777", "balance": 28_500},
-    }
+    def __init__(self, cards: Cards | None = None, lock_stripes: int = LOCK_STRIPES):
+        self._cards = copy.deepcopy(DEMO_CARDS) if cards is None else cards
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
 
-    def withdraw(self, card: CardNumber, amount: Rubles) -> None:
-        """Снимает amount рублей с баланса карты с номером card"""
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
         self._check_card_exists(card)
-        type(self)._cards[card]["balance"] -= amount
+        with self._lock_for(card):
+            card_data = self._cards[card]
+            if card_data["balance"] < amount:
+                raise InsufficientFunds
+            card_data["balance"] -= amount
+            return card_data["balance"]
 
-    def deposit(self, card: CardNumber, amount: Rubles) -> None:
-        """Пополняет баланс карты с номером card на amount рублей"""
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
         self._check_card_exists(card)
-        type(self)._cards[card]["balance"] += amount
+        with self._lock_for(card):
+            card_data = self._cards[card]
+            card_data["balance"] += amount
+            return card_data["balance"]
 
     def get_balance(self, card: CardNumber) -> int:
         """Возвращает баланс карты по её номеру"""
         self._check_card_exists(card)
-        return type(self)._cards[card]["balance"]
+        return self._cards[card]["balance"]
 
     def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
         """
@@ -32,15 +59,23 @@ class InMemoryCardRepository(CardRepository):
         Если карты нет в хранилище, падает исключение CardNotExists
         """
         self._check_card_exists(card)
-        return type(self)._cards[card]["pin"] == pin
+        return self._cards[card]["pin"] == pin
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        return iter(self._cards)
+
+    def _lock_for(self, card: CardNumber) -> threading.Lock:
+        """Возвращает блокировку, которой защищена карта card"""
+        return self._locks[hash(card) % len(self._locks)]
 
     def _check_card_exists(self, card: CardNumber) -> None:
         """
         Проверяет, что карта с переданным номером есть в хранилище,
         иначе возбуждает исключение
         """
-        if card not in type(self)._cards:
+        if card not in self._cards:
             raise CardNotExists
 
     def __repr__(self):
-        return f"{self.__class__.__name__}()"
+        return f"{self.__class__.__name__}(lock_stripes={len(self._locks)!r})"
@@ -0,0 +1,201 @@
+import argparse
+import json
+import signal
+import socket
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from contextlib import suppress
+
+from .bank_account import CardRepository, ListableCardRepository
+from .exceptions import ATMException
+from .main import add_storage_arguments, make_card_repository, storage_options
+from .remote_card_repository import DEFAULT_ADDRESS, parse_store_address
+from .server import Address, listen
+from .typedefs import Operation, OperationKind
+
+# Сколько последних ответов на изменяющие запросы хранится для повторов с тем же ключом идемпотентности
+IDEMPOTENCY_CACHE_SIZE = 100_000
+
+# Операции хранилища, доступные по сети; изменяющие баланс повторно не выполняются
+READ_METHODS = frozenset({"get_balance", "is_card_pin_valid", "card_numbers"})
+WRITE_METHODS = frozenset({"withdraw", "deposit", "apply_batch"})
+# Ошибка, которую получает клиент, если хранилище упало с исключением, не относящимся к банкомату
+STORE_ERROR = "StoreError"
+
+
+def _json_arg(arg):
+    """Возвращает аргумент исключения в виде, который можно передать в JSON"""
+    return arg if arg is None or isinstance(arg, str | int | float | bool) else str(arg)
+
+
+class _KeyedResponse:
+    """Ответ на изменяющий запрос с ключом идемпотентности; пока запрос выполняется, ответа ещё нет"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._response: dict | None = None
+
+    def set(self, response: dict) -> None:
+        self._response = response
+        self._done.set()
+
+    def wait(self) -> dict:
+        self._done.wait()
+        return self._response
+
+
+class CardStoreServer:
+    """
+    Сервер хранилища карт: выполняет операции CardRepository по запросам
+    клиентов RemoteCardRepository. Протокол — JSON-строки: запрос
+    {"id", "method", "args", "key"}, ответ {"id", "result"} или {"id", "error"}.
+    Клиент может отправить несколько запросов, не дожидаясь ответов: ответы
+    приходят в том же порядке. Ответ на изменяющий запрос запоминается
+    по ключу идемпотентности key, и повтор запроса с тем же ключом
+    получает сохранённый ответ, а не выполняется второй раз. Повтор, пришедший
+    по другому соединению, пока исходный запрос ещё выполняется, дожидается его ответа.
+
+    Запросы разных соединений выполняются параллельно, поэтому card_repository
+    должно быть потокобезопасным
+    """
+
+    def __init__(
+        self, card_repository: CardRepository, address: Address, idempotency_cache_size: int = IDEMPOTENCY_CACHE_SIZE
+    ):
+        self._card_repository = card_repository
+        self._idempotency_cache_size = idempotency_cache_size
+        # Ответы на изменяющие запросы: ключ идемпотентности → ответ
+        self._responses: OrderedDict[str, _KeyedResponse] = OrderedDict()
+        # Защищает только self._responses, вызовы хранилища выполняются вне блокировки
+        self._responses_lock = threading.Lock()
+        self._listener = listen(address)
+        self._connections: set[socket.socket] = set()
+        self._connections_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    @property
+    def address(self) -> Address:
+        """Адрес, на котором сервер принимает соединения"""
+        return self._listener.getsockname()
+
+    def serve_forever(self) -> None:
+        """Принимает соединения до вызова shutdown()"""
+        try:
+            while not self._stopping.is_set():
+                try:
+                    connection, _ = self._listener.accept()
+                except TimeoutError:
+                    continue
+                with self._connections_lock:
+                    self._connections.add(connection)
+                threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+        finally:
+            self._listener.close()
+            with self._connections_lock:
+                for connection in self._connections:
+                    with suppress(OSError):
+                        connection.shutdown(socket.SHUT_RDWR)
+
+    def shutdown(self) -> None:
+        """Просит сервер прекратить приём соединений; можно вызывать из другого потока или обработчика сигнала"""
+        self._stopping.set()
+
+    def _serve_connection(self, connection: socket.socket) -> None:
+        """Отвечает на запросы одного клиента, пока тот не закроет соединение"""
+        connection.settimeout(None)
+        if connection.family != socket.AF_UNIX:
+            # Ответы на конвейер запросов уходят по одному, без отключения алгоритма Нейгла каждый ждал бы ACK
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            with connection.makefile("rb") as reader:
+                for line in reader:
+                    connection.sendall(json.dumps(self._handle(line)).encode() + b"\n")
+        except OSError:
+            pass
+        finally:
+            with self._connections_lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    def _handle(self, line: bytes) -> dict:
+        """Выполняет запрос из строки line и возвращает ответ"""
+        try:
+            request = json.loads(line)
+            request_id, method, args, key = (
+                request["id"],
+                request["method"],
+                request.get("args", []),
+                request.get("key"),
+            )
+        except (ValueError, KeyError, TypeError):
+            return {"id": None, "error": "BadRequest"}
+        if method not in READ_METHODS | WRITE_METHODS:
+            return {"id": request_id, "error": "UnknownMethod"}
+        if method in READ_METHODS or key is None:
+            return {"id": request_id, **self._call(method, args)}
+        with self._responses_lock:
+            keyed_response = self._responses.get(key)
+            is_first = keyed_response is None
+            if is_first:
+                keyed_response = self._responses[key] = _KeyedResponse()
+                if len(self._responses) > self._idempotency_cache_size:
+                    self._responses.popitem(last=False)
+        if is_first:
+            response = {"error": STORE_ERROR}
+            try:
+                response = self._call(method, args)
+            finally:
+                if response.get("error") == STORE_ERROR:
+                    # Сбой хранилища не запоминается: повтор с тем же ключом выполнит запрос заново
+                    with self._responses_lock:
+                        self._responses.pop(key, None)
+                keyed_response.set(response)
+        return {"id": request_id, **keyed_response.wait()}
+
+    def _call(self, method: str, args: list) -> dict:
+        """
+        Вызывает метод хранилища и возвращает результат или имя и аргументы исключения
+        банкомата. Любое другое исключение хранилища превращается в ошибку STORE_ERROR,
+        и соединение продолжает обслуживаться
+        """
+        try:
+            if method == "card_numbers":
+                if not isinstance(self._card_repository, ListableCardRepository):
+                    return {"error": "UnknownMethod"}
+                return {"result": list(self._card_repository.card_numbers())}
+            if method == "apply_batch":
+                (rows,) = args
+                operations = [Operation(OperationKind(kind), card, amount) for kind, card, amount in rows]
+                results = self._card_repository.apply_batch(operations)
+                return {"result": [[result.balance, result.error] for result in results]}
+            return {"result": getattr(self._card_repository, method)(*args)}
+        except ATMException as e:
+            return {"error": type(e).__name__, "args": [_json_arg(arg) for arg in e.args]}
+        except (TypeError, ValueError):
+            return {"error": "BadRequest"}
+        except Exception:
+            return {"error": STORE_ERROR}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(card_repository={self._card_repository!r}, address={self.address!r})"
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="Card store server for RemoteCardRepository clients")
+    add_storage_arguments(parser)
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help=f"HOST:PORT or Unix socket path ({DEFAULT_ADDRESS})")
+    args = parser.parse_args(argv)
+
+    card_repository = make_card_repository(args.storage, args.cards, thread_safe=True, **storage_options(args, None))
+    server = CardStoreServer(card_repository, parse_store_address(args.listen))
+    signal.signal(signal.SIGTERM, lambda *_: server.shutdown())
+    signal.signal(signal.SIGINT, lambda *_: server.shutdown())
+    try:
+        server.serve_forever()
+    finally:
+        card_repository.close()
+
+
+if __name__ == "__main__":
+    main()
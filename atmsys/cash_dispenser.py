@@ -0,0 +1,185 @@
+import math
+import threading
+from array import array
+from collections.abc import Mapping
+
+from .exceptions import CannotAccept, CannotDispense
+from .typedefs import Rubles
+
+# Сколько купюр диспенсер выдаёт за раз
+MAX_NOTES = 40
+
+# Недостижимое число купюр в таблицах
+_UNREACHABLE = 1 << 30
+
+type NoteMix = dict[Rubles, int]
+
+
+def parse_cassettes(value: str) -> dict[Rubles, int]:
+    """Разбирает кассеты из строки вида «5000:200,1000:500» (номинал:число купюр)"""
+    cassettes: dict[Rubles, int] = {}
+    for item in value.split(","):
+        denomination, _, count = item.partition(":")
+        cassettes[int(denomination)] = cassettes.get(int(denomination), 0) + int(count)
+    return cassettes
+
+
+class CashDispenser:
+    """
+    Кассеты с купюрами банкомата. Для каждой суммы подбирает набор купюр
+    с наименьшим числом купюр, а из равных по числу купюр — тот, что меньше
+    опустошает почти пустые кассеты, чтобы редкие номиналы оставались
+    для сумм, которые без них не выдать.
+
+    Подбор — перебор с отсечениями: для каждого хвоста номиналов заранее
+    посчитана таблица, сколько купюр нужно на каждую сумму, если купюр
+    сколько угодно. Это нижняя оценка, которая сразу отсекает ветви,
+    где сумму не добрать или где купюр заведомо больше, чем в уже найденном
+    наборе. Таблицы зависят только от номиналов и пересчитываются, когда
+    в кассеты загружают купюры нового номинала
+    """
+
+    def __init__(self, cassettes: Mapping[Rubles, int], max_notes: int = MAX_NOTES):
+        self._max_notes = max_notes
+        self._counts: dict[Rubles, int] = {}
+        self._lock = threading.Lock()
+        self._build_tables()
+        self.refill(cassettes)
+
+    @property
+    def notes(self) -> NoteMix:
+        """Сколько купюр каждого номинала осталось в кассетах"""
+        with self._lock:
+            return dict(self._counts)
+
+    def refill(self, cassettes: Mapping[Rubles, int]) -> None:
+        """Добавляет купюры cassettes (номинал → число купюр) в кассеты"""
+        if any(denomination <= 0 or count < 0 for denomination, count in cassettes.items()):
+            raise ValueError(f"Invalid cassettes {dict(cassettes)!r}")
+        with self._lock:
+            new_denominations = cassettes.keys() - self._counts.keys()
+            for denomination, count in cassettes.items():
+                self._counts[denomination] = self._counts.get(denomination, 0) + count
+            # Таблицы зависят только от номиналов, поэтому купюры знакомых номиналов их не меняют
+            if new_denominations:
+                self._build_tables()
+
+    def plan(self, amount: Rubles) -> NoteMix:
+        """
+        Возвращает набор купюр на сумму amount, ничего не выдавая.
+        Если сумму выдать нельзя, падает исключение CannotDispense
+        """
+        with self._lock:
+            return self._plan(amount)
+
+    def reserve(self, amount: Rubles) -> NoteMix:
+        """
+        Подбирает купюры на сумму amount и убирает их из кассет, чтобы
+        параллельный сеанс не рассчитывал на те же купюры.
+        Если сумму выдать нельзя, падает исключение CannotDispense
+        """
+        with self._lock:
+            notes = self._plan(amount)
+            for denomination, count in notes.items():
+                self._counts[denomination] -= count
+            return notes
+
+    def split(self, amount: Rubles) -> NoteMix:
+        """
+        Раскладывает внесённую сумму amount на наименьшее число купюр
+        номиналов кассет, ничего не меняя в кассетах. Если сумму нельзя
+        сложить из этих номиналов, падает исключение CannotAccept
+        """
+        with self._lock:
+            if amount <= 0 or amount % self._unit or not self._denominations:
+                raise CannotAccept(self._denominations)
+            remaining = amount // self._unit
+            notes: NoteMix = {}
+            # Сумму за пределами таблиц сначала уменьшаем старшими купюрами
+            top_unit = self._denominations[0] // self._unit
+            if remaining >= len(self._tables[0]):
+                notes[self._denominations[0]] = (remaining - len(self._tables[0])) // top_unit + 1
+                remaining -= notes[self._denominations[0]] * top_unit
+            if self._tables[0][remaining] >= _UNREACHABLE:
+                raise CannotAccept(self._denominations)
+            for index, denomination in enumerate(self._denominations):
+                unit = denomination // self._unit
+                count = 0
+                while count + self._tables[index + 1][remaining - count * unit] != self._tables[index][remaining]:
+                    count += 1
+                if count:
+                    notes[denomination] = notes.get(denomination, 0) + count
+                    remaining -= count * unit
+            return notes
+
+    def release(self, notes: NoteMix) -> None:
+        """Возвращает в кассеты купюры, которые были зарезервированы, но не выданы"""
+        with self._lock:
+            for denomination, count in notes.items():
+                self._counts[denomination] += count
+
+    def _build_tables(self) -> None:
+        """
+        Строит для каждого хвоста номиналов (по убыванию) таблицу наименьшего
+        числа купюр на каждую сумму до max_notes старших купюр при неограниченном
+        числе купюр. Суммы в таблицах — в единицах НОД номиналов
+        """
+        self._denominations = sorted(self._counts, reverse=True)
+        self._unit = math.gcd(*self._denominations) if self._denominations else 1
+        units = [denomination // self._unit for denomination in self._denominations]
+        size = self._max_notes * (units[0] if units else 0) + 1
+        table = array("l", [_UNREACHABLE]) * size
+        table[0] = 0
+        self._tables = [table]
+        for unit in reversed(units):
+            table = array("l", table)
+            for amount in range(unit, size):
+                notes = table[amount - unit] + 1
+                if notes < table[amount]:
+                    table[amount] = notes
+            self._tables.append(table)
+        self._tables.reverse()
+
+    def _plan(self, amount: Rubles) -> NoteMix:
+        if amount <= 0 or amount % self._unit or amount // self._unit >= len(self._tables[0]):
+            raise CannotDispense
+        if self._tables[0][amount // self._unit] > self._max_notes:
+            raise CannotDispense
+        self._best: tuple[int, float, tuple[int, ...]] | None = None
+        self._search(0, amount // self._unit, 0, 0.0, [])
+        if self._best is None:
+            raise CannotDispense
+        return {
+            denomination: count
+            for denomination, count in zip(self._denominations, self._best[2], strict=False)
+            if count
+        }
+
+    def _search(self, index: int, remaining: int, notes: int, drain: float, chosen: list[int]) -> None:
+        """
+        Перебирает число купюр номинала index от большего к меньшему.
+        drain — сумма долей кассет, которые опустошает набор: из наборов
+        с равным числом купюр выбирается набор с наименьшей долей
+        """
+        if remaining == 0:
+            if self._best is None or (notes, drain) < self._best[:2]:
+                self._best = (notes, drain, tuple(chosen))
+            return
+        if index == len(self._denominations):
+            return
+        best_notes = self._max_notes if self._best is None else self._best[0]
+        denomination = self._denominations[index]
+        unit = denomination // self._unit
+        available = self._counts[denomination]
+        next_table = self._tables[index + 1]
+        for count in range(min(available, remaining // unit), -1, -1):
+            rest = remaining - count * unit
+            if notes + count + next_table[rest] > best_notes:
+                continue
+            chosen.append(count)
+            self._search(index + 1, rest, notes + count, drain + count / available if count else drain, chosen)
+            chosen.pop()
+            best_notes = self._max_notes if self._best is None else self._best[0]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(cassettes={self._counts!r}, max_notes={self._max_notes!r})"
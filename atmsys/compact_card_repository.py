@@ -0,0 +1,107 @@
+import bisect
+import json
+from array import array
+from collections.abc import Iterator
+
+from .bank_account import ListableCardRepository
+from .exceptions import CardNotExists, InsufficientFunds
+from .typedefs import PIN, Card, CardNumber, Cards, Rubles
+
+# Длина номера карты, который упаковывается в 64-битное целое
+CARD_NUMBER_LENGTH = 16
+# Под пин-код каждой карты отводится столько байт
+PIN_SIZE = 8
+
+
+def pack_card_number(card: CardNumber) -> int | None:
+    """Упаковывает 16-значный номер карты в целое число; для номера другого вида возвращает None"""
+    if len(card) != CARD_NUMBER_LENGTH or not (card.isascii() and card.isdigit()):
+        return None
+    return int(card)
+
+
+def unpack_card_number(key: int) -> CardNumber:
+    """Восстанавливает номер карты из упакованного целого числа"""
+    return f"{key:0{CARD_NUMBER_LENGTH}d}"
+
+
+class CompactCardRepository(ListableCardRepository):
+    """
+    Компактное хранилище карт в памяти. Номера карт упакованы в 64-битные
+    целые и лежат в отсортированном массиве, балансы — в параллельном
+    массиве int64, пин-коды — в буфере с записями фиксированной длины.
+    Карта ищется двоичным поиском, и на неё уходит 24 байта вместо сотен
+    байт словаря на карту. Набор карт задаётся при создании и не меняется
+    """
+
+    def __init__(self, cards: Cards):
+        self._keys = array("Q")
+        self._balances = array("q")
+        self._pins = bytearray(len(cards) * PIN_SIZE)
+        for index, (key, card, card_data) in enumerate(sorted(self._pack_cards(cards))):
+            pin = card_data["pin"].encode()
+            if len(pin) > PIN_SIZE:
+                raise ValueError(f"PIN of card {card} is longer than {PIN_SIZE} bytes")
+            self._keys.append(key)
+            self._balances.append(card_data["balance"])
+            self._pins[index * PIN_SIZE : index * PIN_SIZE + len(pin)] = pin
+
+    @classmethod
+    def from_json(cls, filename: str) -> "CompactCardRepository":
+        """Загружает карты из JSON-файла в формате FileCardRepository"""
+        with open(filename) as f:
+            return cls(json.load(f))
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        index = self._find(card)
+        if self._balances[index] < amount:
+            raise InsufficientFunds
+        self._balances[index] -= amount
+        return self._balances[index]
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        index = self._find(card)
+        self._balances[index] += amount
+        return self._balances[index]
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._balances[self._find(card)]
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        offset = self._find(card) * PIN_SIZE
+        return self._pins[offset : offset + PIN_SIZE].rstrip(b"\0") == pin.encode()
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        return map(unpack_card_number, self._keys)
+
+    def _find(self, card: CardNumber) -> int:
+        """Возвращает позицию карты в массивах, иначе возбуждает исключение CardNotExists"""
+        key = pack_card_number(card)
+        if key is None:
+            raise CardNotExists
+        index = bisect.bisect_left(self._keys, key)
+        if index == len(self._keys) or self._keys[index] != key:
+            raise CardNotExists
+        return index
+
+    @staticmethod
+    def _pack_cards(cards: Cards) -> Iterator[tuple[int, CardNumber, Card]]:
+        for card, card_data in cards.items():
+            key = pack_card_number(card)
+            if key is None:
+                raise ValueError(f"Card number {card!r} is not {CARD_NUMBER_LENGTH} digits")
+            yield key, card, card_data
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(cards={len(self._keys)!r})"
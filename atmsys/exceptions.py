@@ -24,3 +24,38 @@ class IncorrectMenuOption(ATMException):
 
 class CardNotExists(ATMException):
     """Некорректный номер карты, её нет в нашем хранилище"""
+
+
+class WithdrawalLimitExceeded(ATMException):
+    """Сумма снятия превышает лимит снятия за скользящие сутки"""
+
+    def __init__(self, available: int):
+        super().__init__(available)
+        # Сколько рублей ещё можно снять, не превысив лимит
+        self.available = available
+
+
+class CannotDispense(ATMException):
+    """Банкомат не может выдать сумму купюрами, которые есть в кассетах"""
+
+
+class CannotAccept(ATMException):
+    """Внесённую сумму нельзя сложить из купюр номиналов кассет банкомата"""
+
+    def __init__(self, denominations: list[int]):
+        super().__init__(denominations)
+        # Номиналы купюр, которые принимает банкомат, по убыванию
+        self.denominations = denominations
+
+
+class WriteBackFailed(ATMException):
+    """Обёрнутое хранилище отклонило отложенные изменения балансов"""
+
+    def __init__(self, results: list):
+        super().__init__([f"{result.operation.card}: {result.error}" for result in results])
+        # Результаты отклонённых операций OperationResult
+        self.results = results
+
+
+class CardStoreLoadFailed(ATMException):
+    """Хранилище карт не удалось загрузить из файла"""
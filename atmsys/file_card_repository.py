@@ -1,30 +1,42 @@
 import json
+from collections.abc import Iterable, Iterator, Sequence
 from json.decoder import JSONDecodeError
 from pathlib import Path
 
-from .bank_account import CardRepository
-from .exceptions import CardNotExists
-from .typedefs import PIN, CardNumber, Cards, Rubles
+from .bank_account import ListableCardRepository
+from .exceptions import CardNotExists, InsufficientFunds
+from .typedefs import PIN, CardNumber, Cards, Operation, OperationResult, Rubles
 
 
-class FileCardRepository(CardRepository):
+class FileCardRepository(ListableCardRepository):
     """Работа с хранилищем данных по картам"""
 
     def __init__(self, filename: str):
         self._filename = filename
+        # Карты, изменённые текущим пакетом операций; None, если пакет не выполняется
+        self._batch_changes: dict[CardNumber, None] | None = None
         self._cards = self._load()
 
-    def withdraw(self, card: CardNumber, amount: Rubles) -> None:
-        """Снимает amount рублей с баланса карты с номером card"""
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
         self._check_card_exists(card)
-        self._cards[card]["balance"] -= amount
-        self._save()
+        card_data = self._cards[card]
+        if card_data["balance"] < amount:
+            raise InsufficientFunds
+        card_data["balance"] -= amount
+        self._card_changed(card)
+        return card_data["balance"]
 
-    def deposit(self, card: CardNumber, amount: Rubles) -> None:
-        """Пополняет баланс карты с номером card на amount рублей"""
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
         self._check_card_exists(card)
-        self._cards[card]["balance"] += amount
-        self._save()
+        card_data = self._cards[card]
+        card_data["balance"] += amount
+        self._card_changed(card)
+        return card_data["balance"]
 
     def get_balance(self, card: CardNumber) -> int:
         """Возвращает баланс карты по её номеру"""
@@ -39,6 +51,20 @@ class FileCardRepository(CardRepository):
         self._check_card_exists(card)
         return self._cards[card]["pin"] == pin
 
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        return iter(self._cards)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций и сохраняет все изменённые им карты за один раз"""
+        self._batch_changes = {}
+        try:
+            return super().apply_batch(operations)
+        finally:
+            changed, self._batch_changes = self._batch_changes, None
+            if changed:
+                self._save_cards(list(changed))
+
     def _check_card_exists(self, card: CardNumber) -> None:
         """
         Проверяет, что карта с переданным номером есть в хранилище,
@@ -55,6 +81,17 @@ class FileCardRepository(CardRepository):
             except JSONDecodeError:
                 return {}
 
+    def _card_changed(self, card: CardNumber) -> None:
+        """Сохраняет изменение карты card сразу или, внутри пакета операций, в конце пакета"""
+        if self._batch_changes is None:
+            self._save_cards([card])
+        else:
+            self._batch_changes[card] = None
+
+    def _save_cards(self, cards: Sequence[CardNumber]) -> None:
+        """Сохраняет изменения по картам cards"""
+        self._save()
+
     def _save(self):
         with open(self._filename, "w") as f:
             return json.dump(self._cards, f)
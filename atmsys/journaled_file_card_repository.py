@@ -0,0 +1,105 @@
+import json
+import os
+from collections.abc import Sequence
+from enum import StrEnum
+from pathlib import Path
+
+from .file_card_repository import FileCardRepository
+from .typedefs import CardNumber, Cards
+
+# Через сколько записей в журнале он сворачивается в новый снимок
+COMPACT_EVERY = 10_000
+
+
+class FsyncPolicy(StrEnum):
+    """Когда принудительно сбрасывать данные на диск через fsync"""
+
+    ALWAYS = "always"  # после каждой записи в журнал
+    COMPACTION = "compaction"  # только при записи нового снимка
+    NEVER = "never"  # полностью полагаемся на операционную систему
+
+
+class JournaledFileCardRepository(FileCardRepository):
+    """
+    Хранилище карт в файле-снимке с журналом изменений.
+
+    Каждое изменение баланса дописывается в журнал одной строкой
+    «<номер карты> <новый баланс>» вместо перезаписи всего файла с картами.
+    В журнал пишется итоговый баланс, а не разница, поэтому повторное
+    применение журнала к снимку безопасно: если компактификация прервалась
+    после записи снимка, но до очистки журнала, данные не задвоятся.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        journal_filename: str | None = None,
+        compact_every: int = COMPACT_EVERY,
+        fsync: FsyncPolicy = FsyncPolicy.COMPACTION,
+    ):
+        self._journal_filename = journal_filename or f"{filename}.journal"
+        self._compact_every = compact_every
+        self._fsync = fsync
+        self._journal_records = 0
+        super().__init__(filename)
+        self._journal = open(self._journal_filename, "a")  # noqa: SIM115
+
+    def compact(self) -> None:
+        """Сворачивает журнал в новый снимок и очищает журнал"""
+        self._save()
+        self._journal.truncate(0)
+        self._journal_records = 0
+
+    def close(self) -> None:
+        """Сбрасывает журнал на диск и закрывает его"""
+        if self._journal.closed:
+            return
+        self._journal.flush()
+        if self._fsync != FsyncPolicy.NEVER:
+            os.fsync(self._journal.fileno())
+        self._journal.close()
+
+    def _save_cards(self, cards: Sequence[CardNumber]) -> None:
+        """Дописывает новые балансы карт cards в журнал одной записью"""
+        self._journal.write("".join(f"{card} {self._cards[card]['balance']}\n" for card in cards))
+        self._journal.flush()
+        if self._fsync == FsyncPolicy.ALWAYS:
+            os.fsync(self._journal.fileno())
+        self._journal_records += len(cards)
+        if self._journal_records >= self._compact_every:
+            self.compact()
+
+    def _load(self) -> Cards:
+        """Загружает последний снимок и применяет к нему хвост журнала"""
+        cards = super()._load()
+        Path(self._journal_filename).touch(exist_ok=True)
+        with open(self._journal_filename, "rb+") as f:
+            valid_size = 0
+            for line in f:
+                # Недописанная при падении последняя строка отбрасывается
+                if not line.endswith(b"\n"):
+                    break
+                card, balance = line.decode().split()
+                if card in cards:
+                    cards[card]["balance"] = int(balance)
+                valid_size += len(line)
+                self._journal_records += 1
+            f.truncate(valid_size)
+        return cards
+
+    def _save(self):
+        """Атомарно записывает снимок всех карт через временный файл"""
+        tmp_filename = f"{self._filename}.tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(self._cards, f)
+            if self._fsync != FsyncPolicy.NEVER:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_filename, self._filename)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(filename={self._filename!r}, "
+            f"journal_filename={self._journal_filename!r}, compact_every={self._compact_every!r}, "
+            f"fsync={self._fsync!r})"
+        )
@@ -0,0 +1,218 @@
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .atm import ATM
+from .bank_account import CardRepository
+from .card_number_filter import CardNumberFilter
+from .main import (
+    add_card_filter_arguments,
+    add_storage_arguments,
+    make_card_number_filter,
+    make_card_repository,
+    make_menu_items,
+    storage_options,
+)
+from .menu import CheckBalanceMenuItem, DepositMenuItem, ExitMenuItem, Menu, MenuItem, WithdrawMenuItem
+from .typedefs import Cards
+from .ui import ScriptedUI
+
+# Сценарии сеансов и их доли в нагрузке
+SESSION_MIX = {
+    "balance": 0.40,
+    "withdraw": 0.25,
+    "deposit": 0.15,
+    "overdraw": 0.05,
+    "wrong_pin_then_ok": 0.07,
+    "blocked": 0.04,
+    "unknown_card": 0.04,
+}
+
+
+@dataclass(frozen=True)
+class SessionScript:
+    kind: str
+    inputs: tuple[str, ...]
+
+
+@dataclass
+class LoadReport:
+    sessions: int = 0
+    duration: float = 0.0
+    errors: Counter = field(default_factory=Counter)
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Сеансов в секунду"""
+        return self.sessions / self.duration if self.duration else 0.0
+
+    def percentiles(self) -> dict[str, float]:
+        """Возвращает p50, p90 и p99 длительности сеанса в миллисекундах"""
+        if len(self.latencies) < 2:
+            return {}
+        cut_points = statistics.quantiles(self.latencies, n=100)
+        return {name: cut_points[index] * 1000 for name, index in (("p50", 49), ("p90", 89), ("p99", 98))}
+
+    def print(self) -> None:
+        print(f"Sessions: {self.sessions} in {self.duration:.1f}s ({self.throughput:.1f} sessions/sec)")
+        print("Errors:")
+        for error, count in self.errors.most_common():
+            print(f"  {error}: {count}")
+        print("Session latency, ms: " + ", ".join(f"{name}={value:.2f}" for name, value in self.percentiles().items()))
+
+
+def _menu_command(menu_items: Sequence[MenuItem], item_class: type[MenuItem]) -> str:
+    """Возвращает номер, который пользователь вводит для выбора пункта меню item_class"""
+    for number, item in enumerate(menu_items, 1):
+        if isinstance(item, item_class):
+            return str(number)
+    raise ValueError(f"No {item_class.__name__} in the menu")
+
+
+def build_scripts(cards: Cards, menu_items: Sequence[MenuItem], seed: int = 42) -> Iterator[SessionScript]:
+    """Бесконечно генерирует случайные сценарии сеансов по картам cards в пропорциях SESSION_MIX"""
+    rnd = random.Random(seed)
+    card_numbers = list(cards)
+    balance = _menu_command(menu_items, CheckBalanceMenuItem)
+    withdraw = _menu_command(menu_items, WithdrawMenuItem)
+    deposit = _menu_command(menu_items, DepositMenuItem)
+    exit_ = _menu_command(menu_items, ExitMenuItem)
+    kinds, weights = zip(*SESSION_MIX.items(), strict=True)
+    while True:
+        kind = rnd.choices(kinds, weights=weights)[0]
+        card = rnd.choice(card_numbers)
+        pin = cards[card]["pin"]
+        wrong_pin = "0000" if pin != "0000" else "9999"
+        amount = str(rnd.randint(1, 50) * 100)
+        match kind:
+            case "balance":
+                inputs = (card, pin, balance, exit_)
+            case "withdraw":
+                inputs = (card, pin, withdraw, amount, balance, exit_)
+            case "deposit":
+                inputs = (card, pin, deposit, amount, exit_)
+            case "overdraw":
+                inputs = (card, pin, withdraw, str(cards[card]["balance"] * 10 + 10**9), exit_)
+            case "wrong_pin_then_ok":
+                inputs = (card, wrong_pin, pin, balance, exit_)
+            case "blocked":
+                inputs = (card, *[wrong_pin] * 10)
+            case _:
+                inputs = ("9" * 16, *[pin] * 10)
+        yield SessionScript(kind, inputs)
+
+
+def run_session(
+    card_repository: CardRepository,
+    menu_items: Sequence[MenuItem],
+    script: SessionScript,
+    card_number_filter: CardNumberFilter | None = None,
+) -> list[str]:
+    """
+    Проводит сеанс по сценарию script и возвращает названия исключений, возникших в сеансе.
+    Без фильтра номеров карт банкомат не отличает неизвестную карту от неверного
+    пин-кода, и сеанс unknown_card заканчивается блокировкой, а не CardNotExists
+    """
+    errors: list[str] = []
+    ui = ScriptedUI(script.inputs)
+    atm = ATM(
+        card_repository=card_repository,
+        ui=ui,
+        menu=Menu(items=menu_items, ui=ui),
+        card_number_filter=card_number_filter,
+        error_listener=lambda error: errors.append(type(error).__name__),
+    )
+    try:
+        atm.run()
+    except SystemExit:
+        pass
+    except Exception as e:
+        errors.append(type(e).__name__)
+    return errors
+
+
+def run_load(
+    card_repository: CardRepository,
+    menu_items: Sequence[MenuItem],
+    scripts: Iterator[SessionScript],
+    rate: float,
+    concurrency: int,
+    duration: float,
+    card_number_filter: CardNumberFilter | None = None,
+) -> LoadReport:
+    """
+    Запускает сеансы по сценариям scripts с частотой rate сеансов в секунду
+    в течение duration секунд, одновременно не более concurrency сеансов.
+    Неизвестные карты отсекает card_number_filter, как в банкомате с --card-filter
+    """
+    report = LoadReport()
+    report_lock = threading.Lock()
+    free_slots = threading.BoundedSemaphore(concurrency)
+
+    def session(script: SessionScript) -> None:
+        started = time.perf_counter()
+        try:
+            errors = run_session(card_repository, menu_items, script, card_number_filter)
+        finally:
+            free_slots.release()
+        elapsed = time.perf_counter() - started
+        with report_lock:
+            report.sessions += 1
+            report.latencies.append(elapsed)
+            report.errors.update(errors)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        next_start = started
+        while next_start - started < duration:
+            delay = next_start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            free_slots.acquire()
+            executor.submit(session, next(scripts))
+            next_start += 1 / rate
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="Replay synthetic ATM session traffic against a card storage")
+    add_storage_arguments(parser)
+    add_card_filter_arguments(parser)
+    parser.add_argument("--card-list", default="cards.json", help="cards.json-formatted file with cards to use")
+    parser.add_argument("--rate", type=float, default=100, help="sessions per second")
+    parser.add_argument("--concurrency", type=int, default=16, help="maximum concurrent sessions")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with open(args.card_list) as f:
+        cards = json.load(f)
+    menu_items = make_menu_items()
+    card_repository = make_card_repository(args.storage, args.cards, thread_safe=True, **storage_options(args, None))
+    card_number_filter = make_card_number_filter(parser, args, card_repository)
+    try:
+        report = run_load(
+            card_repository=card_repository,
+            menu_items=menu_items,
+            scripts=build_scripts(cards, menu_items, args.seed),
+            rate=args.rate,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            card_number_filter=card_number_filter,
+        )
+    finally:
+        card_repository.close()
+    report.print()
+
+
+if __name__ == "__main__":
+    main()
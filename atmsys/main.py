@@ -1,17 +1,362 @@
+import argparse
+import os
+import sys
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager, nullcontext
+
 from atmsys.atm import ATM
+from atmsys.bank_account import CardRepository, ListableCardRepository
+from atmsys.caching_card_repository import CachingCardRepository, WritePolicy
+from atmsys.card_number_filter import CardNumberFilter
+from atmsys.cash_dispenser import CashDispenser, parse_cassettes
+from atmsys.exceptions import WriteBackFailed
 from atmsys.file_card_repository import FileCardRepository
-from atmsys.menu import CheckBalanceMenuItem, DepositMenuItem, ExitMenuItem, Menu, WithdrawMenuItem
+from atmsys.journaled_file_card_repository import JournaledFileCardRepository
+from atmsys.menu import (
+    CheckBalanceMenuItem,
+    DepositMenuItem,
+    ExitMenuItem,
+    Menu,
+    MenuItem,
+    MiniStatementMenuItem,
+    WithdrawMenuItem,
+)
+from atmsys.metrics import InstrumentedCardRepository, MetricsRegistry, instrument_menu_items
+from atmsys.mmap_card_repository import MmapCardRepository
+from atmsys.profiling import ProfilerKind, ProfileScope, ProfilingSession
+from atmsys.remote_card_repository import DEFAULT_ADDRESS, RemoteCardRepository
+from atmsys.sharded_card_repository import ShardedCardRepository
+from atmsys.shared_file_card_repository import SharedFileCardRepository
+from atmsys.sqlite_card_repository import SqliteCardRepository
+from atmsys.streaming_file_card_repository import StreamingFileCardRepository
+from atmsys.synchronized_card_repository import synchronized
+from atmsys.transaction_journal import JournalingCardRepository, TransactionJournal
 from atmsys.ui import GreenConsoleUI
+from atmsys.withdrawal_limits import LimitedCardRepository, WithdrawalLimits
+from atmsys.write_behind_file_card_repository import MAX_DATA_LOSS, WriteBehindFileCardRepository
+
+# Хранилища карт, которые можно выбрать параметром --storage или переменной окружения ATMSYS_STORAGE:
+# название → (класс хранилища, путь к файлу с картами по умолчанию, потокобезопасно ли хранилище само по себе)
+CARD_REPOSITORIES: dict[str, tuple[Callable[[str], CardRepository], str, bool]] = {
+    "file": (FileCardRepository, "cards.json", False),
+    "journal": (JournaledFileCardRepository, "cards.json", False),
+    "mmap": (MmapCardRepository, "cards.bin", False),
+    "remote": (RemoteCardRepository, DEFAULT_ADDRESS, True),
+    "shared": (SharedFileCardRepository, "cards.json", True),
+    "sharded": (ShardedCardRepository.open, "cards", True),
+    "sqlite": (SqliteCardRepository, "cards.db", True),
+    "streaming": (StreamingFileCardRepository, "cards.json", False),
+    "write_behind": (WriteBehindFileCardRepository, "cards.json", False),
+}
+
+
+def make_card_repository(
+    storage: str, filename: str | None = None, thread_safe: bool = False, **options
+) -> CardRepository:
+    """
+    Создаёт хранилище карт storage, работающее с файлом filename, с дополнительными параметрами options.
+    Если нужно хранилище для нескольких потоков (thread_safe), а само хранилище
+    не потокобезопасно, оно оборачивается в SynchronizedCardRepository
+    """
+    repository_class, default_filename, is_thread_safe = CARD_REPOSITORIES[storage]
+    card_repository = repository_class(filename or default_filename, **options)
+    if thread_safe and not is_thread_safe:
+        return synchronized(card_repository)
+    return card_repository
+
+
+@contextmanager
+def closing_card_repository(card_repository: CardRepository) -> Iterator[CardRepository]:
+    """
+    Закрывает хранилище по выходе из блока. Если при закрытии не удалось сохранить
+    отложенные изменения балансов, сообщает в stderr, какие карты не сохранены,
+    и завершает программу с кодом 1; исключение, с которым завершился блок, не теряется
+    """
+    error: BaseException | None = None
+    try:
+        yield card_repository
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        try:
+            card_repository.close()
+        except WriteBackFailed as e:
+            for result in e.results:
+                print(f"Balance change of card {result.operation.card} was not saved: {result.error}", file=sys.stderr)
+            if error is None or isinstance(error, SystemExit):
+                raise SystemExit(1) from None
+
+
+def make_menu_items(
+    transaction_journal: TransactionJournal | None = None, cash_dispenser: CashDispenser | None = None
+) -> list[MenuItem]:
+    """Создаёт пункты главного меню банкомата; мини-выписка есть в меню, только если ведётся журнал операций"""
+    menu_items: list[MenuItem] = [
+        CheckBalanceMenuItem(),
+        WithdrawMenuItem(cash_dispenser),
+        DepositMenuItem(cash_dispenser),
+    ]
+    if transaction_journal is not None:
+        menu_items.append(MiniStatementMenuItem(transaction_journal))
+    return [*menu_items, ExitMenuItem()]
+
+
+def add_storage_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры выбора хранилища карт, значения по умолчанию берутся из переменных окружения"""
+    parser.add_argument(
+        "--storage",
+        choices=CARD_REPOSITORIES,
+        default=os.environ.get("ATMSYS_STORAGE", "file"),
+        help="card storage backend (env ATMSYS_STORAGE)",
+    )
+    parser.add_argument(
+        "--cards",
+        default=os.environ.get("ATMSYS_CARDS"),
+        help="path to the card storage file (env ATMSYS_CARDS)",
+    )
+    parser.add_argument(
+        "--max-data-loss",
+        type=float,
+        default=os.environ.get("ATMSYS_MAX_DATA_LOSS", MAX_DATA_LOSS),
+        help="seconds a balance change may stay unsaved with --storage write_behind (env ATMSYS_MAX_DATA_LOSS)",
+    )
+
+
+def storage_options(args: argparse.Namespace, metrics: MetricsRegistry | None) -> dict:
+    """Возвращает дополнительные параметры выбранного хранилища карт"""
+    if args.storage == "write_behind":
+        return {"max_data_loss": args.max_data_loss, "metrics": metrics}
+    return {}
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры кэша карт перед хранилищем"""
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=os.environ.get("ATMSYS_CACHE_SIZE"),
+        help="keep up to this many recently used cards in an LRU cache (env ATMSYS_CACHE_SIZE)",
+    )
+    parser.add_argument(
+        "--cache-policy",
+        choices=list(WritePolicy),
+        default=os.environ.get("ATMSYS_CACHE_POLICY", WritePolicy.THROUGH),
+        help="when cached balance changes reach the storage (env ATMSYS_CACHE_POLICY)",
+    )
+
+
+def add_cache(
+    args: argparse.Namespace, card_repository: CardRepository, metrics: MetricsRegistry | None
+) -> CardRepository:
+    """Ставит кэш карт перед хранилищем, если кэш включён"""
+    if not args.cache_size:
+        return card_repository
+    return CachingCardRepository(card_repository, args.cache_size, WritePolicy(args.cache_policy), metrics)
+
+
+def add_transaction_journal_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметр журнала операций"""
+    parser.add_argument(
+        "--transactions",
+        default=os.environ.get("ATMSYS_TRANSACTIONS"),
+        help="record operations in this journal file and offer a mini statement (env ATMSYS_TRANSACTIONS)",
+    )
+
+
+def open_transaction_journal(args: argparse.Namespace) -> TransactionJournal | None:
+    """Открывает журнал операций, если он включён"""
+    if not args.transactions:
+        return None
+    return TransactionJournal(args.transactions)
+
+
+def add_transaction_journal(
+    card_repository: CardRepository, transaction_journal: TransactionJournal | None
+) -> CardRepository:
+    """Оборачивает хранилище так, чтобы операции попадали в журнал, если журнал ведётся"""
+    if transaction_journal is None:
+        return card_repository
+    return JournalingCardRepository(card_repository, transaction_journal)
+
+
+def add_withdrawal_limit_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры лимитов снятия за скользящие сутки"""
+    parser.add_argument(
+        "--daily-limit",
+        type=int,
+        default=os.environ.get("ATMSYS_DAILY_LIMIT"),
+        help="rubles a card may withdraw per rolling 24 hours (env ATMSYS_DAILY_LIMIT)",
+    )
+    parser.add_argument(
+        "--terminal-daily-limit",
+        type=int,
+        default=os.environ.get("ATMSYS_TERMINAL_DAILY_LIMIT"),
+        help="rubles the terminal may dispense per rolling 24 hours (env ATMSYS_TERMINAL_DAILY_LIMIT)",
+    )
 
 
-def main():
+def add_withdrawal_limits(args: argparse.Namespace, card_repository: CardRepository) -> CardRepository:
+    """Ставит проверку лимитов снятия перед хранилищем, если лимиты заданы"""
+    if not args.daily_limit and not args.terminal_daily_limit:
+        return card_repository
+    return LimitedCardRepository(card_repository, WithdrawalLimits(args.daily_limit, args.terminal_daily_limit))
+
+
+def add_cash_dispenser_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметр кассет с купюрами"""
+    parser.add_argument(
+        "--cassettes",
+        type=parse_cassettes,
+        default=os.environ.get("ATMSYS_CASSETTES"),
+        help="notes loaded into the dispenser as DENOMINATION:COUNT,... (env ATMSYS_CASSETTES)",
+    )
+
+
+def make_cash_dispenser(args: argparse.Namespace) -> CashDispenser | None:
+    """Создаёт диспенсер купюр, если кассеты заданы"""
+    if not args.cassettes:
+        return None
+    return CashDispenser(args.cassettes)
+
+
+def add_card_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры предварительной проверки номеров карт"""
+    parser.add_argument(
+        "--card-filter",
+        action="store_true",
+        default=bool(os.environ.get("ATMSYS_CARD_FILTER")),
+        help="reject unknown card numbers before asking for the PIN (env ATMSYS_CARD_FILTER)",
+    )
+    parser.add_argument(
+        "--check-luhn",
+        action="store_true",
+        default=bool(os.environ.get("ATMSYS_CHECK_LUHN")),
+        help="also reject card numbers with an invalid Luhn check digit (env ATMSYS_CHECK_LUHN)",
+    )
+
+
+def make_card_number_filter(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, card_repository: CardRepository
+) -> CardNumberFilter | None:
+    """
+    Строит фильтр номеров карт по хранилищу, если фильтр включён. Если хранилище
+    не умеет перечислять свои карты, завершает программу ошибкой разбора параметров
+    """
+    if not args.card_filter:
+        return None
+    if not isinstance(card_repository, ListableCardRepository):
+        parser.error(f"--card-filter: storage {args.storage!r} cannot list its cards")
+    return CardNumberFilter.from_repository(card_repository, check_luhn=args.check_luhn)
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры выгрузки метрик, значения по умолчанию берутся из переменных окружения"""
+    parser.add_argument(
+        "--metrics-file",
+        default=os.environ.get("ATMSYS_METRICS_FILE"),
+        help="write Prometheus text-format metrics to this file (env ATMSYS_METRICS_FILE)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=os.environ.get("ATMSYS_METRICS_PORT"),
+        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics (env ATMSYS_METRICS_PORT)",
+    )
+
+
+def start_metrics(args: argparse.Namespace) -> MetricsRegistry | None:
+    """Создаёт реестр метрик, если их выгрузка включена, и при необходимости запускает HTTP-сервер метрик"""
+    if not args.metrics_file and not args.metrics_port:
+        return None
+    metrics = MetricsRegistry()
+    if args.metrics_file:
+        metrics.start_textfile_writer(args.metrics_file)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    return metrics
+
+
+def instrument(
+    card_repository: CardRepository, menu_items: list[MenuItem], metrics: MetricsRegistry | None
+) -> tuple[CardRepository, list[MenuItem]]:
+    """Оборачивает хранилище и пункты меню в замеряющие обёртки, если метрики включены"""
+    if metrics is None:
+        return card_repository, menu_items
+    return InstrumentedCardRepository(card_repository, metrics), instrument_menu_items(menu_items, metrics)
+
+
+def add_profiling_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры профилирования, значения по умолчанию берутся из переменных окружения"""
+    parser.add_argument(
+        "--profile",
+        choices=list(ProfileScope),
+        default=os.environ.get("ATMSYS_PROFILE"),
+        help="profile the whole session or each menu item (env ATMSYS_PROFILE)",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=list(ProfilerKind),
+        default=os.environ.get("ATMSYS_PROFILER", ProfilerKind.CPROFILE),
+        help="cprofile writes pstats .prof files, sampling writes .collapsed stacks (env ATMSYS_PROFILER)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=os.environ.get("ATMSYS_PROFILE_DIR", "profiles"),
+        help="directory for per-session profile files (env ATMSYS_PROFILE_DIR)",
+    )
+
+
+def make_profiling_session(args: argparse.Namespace) -> ProfilingSession | None:
+    """Создаёт сеанс профилирования, если профилирование включено"""
+    if not args.profile:
+        return None
+    return ProfilingSession(ProfilerKind(args.profiler), ProfileScope(args.profile), args.profile_dir)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """Создаёт разборщик параметров командной строки"""
+    parser = argparse.ArgumentParser(description="ATM")
+    add_storage_arguments(parser)
+    add_cache_arguments(parser)
+    add_transaction_journal_arguments(parser)
+    add_withdrawal_limit_arguments(parser)
+    add_cash_dispenser_arguments(parser)
+    add_card_filter_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profiling_arguments(parser)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    metrics = start_metrics(args)
+    profiling = make_profiling_session(args)
+    transaction_journal = open_transaction_journal(args)
+    menu_items = make_menu_items(transaction_journal, make_cash_dispenser(args))
+    if profiling is not None:
+        menu_items = profiling.wrap_menu_items(menu_items)
+    storage = make_card_repository(args.storage, args.cards, **storage_options(args, metrics))
+    card_number_filter = make_card_number_filter(parser, args, storage)
+    card_repository = add_withdrawal_limits(
+        args, add_transaction_journal(add_cache(args, storage, metrics), transaction_journal)
+    )
+    card_repository, menu_items = instrument(card_repository, menu_items, metrics)
     ui = GreenConsoleUI()
     atm = ATM(
-        card_repository=FileCardRepository("cards.json"),
+        card_repository=card_repository,
         ui=ui,
-        menu=Menu(items=[CheckBalanceMenuItem(), WithdrawMenuItem(), DepositMenuItem(), ExitMenuItem()], ui=ui),
+        menu=Menu(items=menu_items, ui=ui),
+        metrics=metrics,
+        card_number_filter=card_number_filter,
     )
-    atm.run()
+    try:
+        with closing_card_repository(card_repository), profiling or nullcontext():
+            atm.run()
+    finally:
+        if metrics is not None and args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
 
 
 if __name__ == "__main__":
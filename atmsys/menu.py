@@ -1,10 +1,17 @@
 from abc import ABC, abstractmethod
 from collections.abc import Sequence
+from datetime import datetime
 
 from .bank_account import BankAccount
+from .cash_dispenser import CashDispenser, NoteMix
 from .exceptions import IncorrectMenuOption, InvalidAmount
+from .transaction_journal import TransactionJournal
+from .typedefs import OperationKind, Rubles
 from .ui_messages import UiMessage
 
+# Сколько последних операций показывает мини-выписка
+MINI_STATEMENT_SIZE = 5
+
 
 class UI(ABC):
     """Пользовательский интерфейс банкомата"""
@@ -28,6 +35,29 @@ class UI(ABC):
         return f"{self.__class__.__name__}()"
 
 
+def parse_amount(amount: str) -> Rubles:
+    """
+    Преобразует введённую пользователем сумму в число рублей,
+    если сумма некорректна, возбуждает исключение InvalidAmount
+    """
+    try:
+        rubles = int(amount)
+    except ValueError:
+        raise InvalidAmount(UiMessage.AMOUNT_MUST_BE_DIGIT)
+
+    if rubles <= 0:
+        raise InvalidAmount(UiMessage.AMOUNT_MUST_BE_POSITIVE)
+    return rubles
+
+
+def format_notes(notes: NoteMix) -> str:
+    """Возвращает набор купюр notes в виде строки для пользователя, начиная со старших купюр"""
+    return ", ".join(
+        UiMessage.NOTES_ITEM.format(denomination=denomination, count=notes[denomination])
+        for denomination in sorted(notes, reverse=True)
+    )
+
+
 class MenuItem(ABC):
     """Абстрактный пункт меню банкомата"""
 
@@ -40,6 +70,11 @@ class MenuItem(ABC):
         """Выполняет действие при выборе этого пункта меню"""
         pass
 
+    @property
+    def name(self) -> str:
+        """Имя пункта меню, под которым он попадает в метрики и профили"""
+        return self.__class__.__name__
+
     def __repr__(self) -> str:
         return f"""{self.__class__.__name__}(description="{self.description!r}")"""
 
@@ -59,45 +94,81 @@ class CheckBalanceMenuItem(MenuItem):
 class WithdrawMenuItem(MenuItem):
     """Пункт меню — списание денег с баланса карты"""
 
-    def __init__(self):
+    def __init__(self, cash_dispenser: CashDispenser | None = None):
         super().__init__(UiMessage.MENU_WITHDRAW_ITEM)
+        self._cash_dispenser = cash_dispenser
 
     def execute(self, bank_account: BankAccount, ui: UI) -> None:
-        """Выполняет снятие денег с баланса карты"""
-        amount = ui.get_input(UiMessage.HOW_MUCH_WITHDRAW_INPUT)
-
-        try:
-            amount = int(amount)
-        except ValueError:
-            raise InvalidAmount(UiMessage.AMOUNT_MUST_BE_DIGIT)
-
-        if amount <= 0:
-            raise InvalidAmount(UiMessage.AMOUNT_MUST_BE_POSITIVE)
-
-        bank_account.withdraw(amount)
-        ui.show_message(UiMessage.BALANCE.format(balance=bank_account.get_balance()))
+        """
+        Выполняет снятие денег с баланса карты. Если у банкомата есть
+        кассеты, купюры подбираются до списания: сумму, которую нельзя
+        выдать, банкомат отклоняет исключением CannotDispense, не трогая баланс.
+        Купюры возвращаются в кассеты, только если списание не состоялось:
+        при KeyboardInterrupt или SystemExit они могли уже быть выданы
+        """
+        amount = parse_amount(ui.get_input(UiMessage.HOW_MUCH_WITHDRAW_INPUT))
+        if self._cash_dispenser is None:
+            balance = bank_account.withdraw(amount)
+        else:
+            notes = self._cash_dispenser.reserve(amount)
+            try:
+                balance = bank_account.withdraw(amount)
+            except Exception:
+                self._cash_dispenser.release(notes)
+                raise
+            ui.show_message(UiMessage.NOTES_DISPENSED.format(notes=format_notes(notes)))
+        ui.show_message(UiMessage.BALANCE.format(balance=balance))
 
 
 class DepositMenuItem(MenuItem):
     """Пункт меню — пополнение баланса карты"""
 
-    def __init__(self):
+    def __init__(self, cash_dispenser: CashDispenser | None = None):
         super().__init__(UiMessage.MENU_DEPOSIT_ITEM)
+        self._cash_dispenser = cash_dispenser
 
     def execute(self, bank_account: BankAccount, ui: UI) -> None:
-        """Выполняет пополнение баланса карты"""
-        amount = ui.get_input(UiMessage.HOW_MUCH_DEPOSIT_INPUT)
+        """
+        Выполняет пополнение баланса карты. Если у банкомата есть кассеты,
+        внесённые купюры после зачисления попадают в них, а сумму, которую
+        нельзя сложить из купюр номиналов кассет, банкомат отклоняет
+        исключением CannotAccept, не трогая баланс
+        """
+        amount = parse_amount(ui.get_input(UiMessage.HOW_MUCH_DEPOSIT_INPUT))
+        if self._cash_dispenser is None:
+            balance = bank_account.deposit(amount)
+        else:
+            notes = self._cash_dispenser.split(amount)
+            balance = bank_account.deposit(amount)
+            self._cash_dispenser.refill(notes)
+        ui.show_message(UiMessage.BALANCE.format(balance=balance))
 
-        try:
-            amount = int(amount)
-        except ValueError:
-            raise InvalidAmount(UiMessage.AMOUNT_MUST_BE_DIGIT)
 
-        if amount <= 0:
-            raise InvalidAmount(UiMessage.AMOUNT_MUST_BE_POSITIVE)
+class MiniStatementMenuItem(MenuItem):
+    """Пункт меню — последние операции по карте"""
 
-        bank_account.deposit(amount)
-        ui.show_message(UiMessage.BALANCE.format(balance=bank_account.get_balance()))
+    def __init__(self, transaction_journal: TransactionJournal, limit: int = MINI_STATEMENT_SIZE):
+        super().__init__(UiMessage.MENU_MINI_STATEMENT_ITEM)
+        self._transaction_journal = transaction_journal
+        self._limit = limit
+
+    def execute(self, bank_account: BankAccount, ui: UI) -> None:
+        """Показывает пользователю последние операции по карте, начиная с самой новой"""
+        transactions = self._transaction_journal.latest(bank_account.card, self._limit)
+        if not transactions:
+            ui.show_message(UiMessage.MINI_STATEMENT_EMPTY)
+            return
+        lines: list[str] = [UiMessage.MINI_STATEMENT]
+        for transaction in transactions:
+            amount = -transaction.amount if transaction.kind == OperationKind.WITHDRAW else transaction.amount
+            lines.append(
+                UiMessage.MINI_STATEMENT_LINE.format(
+                    time=datetime.fromtimestamp(transaction.timestamp).strftime("%d.%m.%Y %H:%M"),
+                    amount=amount,
+                    balance=transaction.balance,
+                )
+            )
+        ui.show_message("\n".join(lines))
 
 
 class ExitMenuItem(MenuItem):
@@ -0,0 +1,273 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .bank_account import BankAccount, CardRepository
+from .menu import UI, MenuItem
+from .typedefs import PIN, CardNumber, Operation, OperationResult, Rubles
+
+# Как часто, в секундах, метрики перезаписываются в файл
+TEXTFILE_WRITE_INTERVAL = 15.0
+# Границы корзин гистограмм задержек, в секундах
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+type Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    """Форматирует метки в синтаксисе Prometheus: {name="value",...}"""
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Монотонно растущий счётчик"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, labels: Labels):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        """Увеличивает счётчик на amount"""
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        """Возвращает строки счётчика в текстовом формате Prometheus"""
+        return [f"{self.name}{_format_labels(self.labels)} {self.value}"]
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, labels: Labels, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Учитывает наблюдение value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def render(self) -> list[str]:
+        """Возвращает строки гистограммы в текстовом формате Prometheus"""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts, strict=False):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, le=repr(bound))} {cumulative}")
+        cumulative += counts[-1]
+        lines.append(f"{self.name}_bucket{_format_labels(self.labels, le='+Inf')} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса, выгружаемых в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self._metrics: dict[tuple[str, Labels], Counter | Histogram] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str = "", **labels: str) -> Counter:
+        """Возвращает счётчик name с метками labels, создавая его при первом обращении"""
+        return self._get_or_create(Counter, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", **labels: str) -> Histogram:
+        """Возвращает гистограмму name с метками labels, создавая её при первом обращении"""
+        return self._get_or_create(Histogram, name, help, labels)
+
+    def timed(self, name: str, help: str = "", **labels: str) -> Callable[[Callable], Callable]:
+        """
+        Возвращает декоратор, который записывает длительность вызовов функции
+        в гистограмму <name>_seconds, а вызовы, завершившиеся исключением,
+        считает в счётчике <name>_errors_total с меткой error
+        """
+        histogram = self.histogram(f"{name}_seconds", help, **labels)
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    self.counter(f"{name}_errors_total", help, **labels, error=type(e).__name__).inc()
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+
+            return wrapper
+
+        return decorator
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: (metric.name, metric.labels))
+        lines = []
+        previous_name = None
+        for metric in metrics:
+            if metric.name != previous_name:
+                if self._help.get(metric.name):
+                    lines.append(f"# HELP {metric.name} {self._help[metric.name]}")
+                lines.append(f"# TYPE {metric.name} {metric.type_name}")
+                previous_name = metric.name
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, filename: str) -> None:
+        """Атомарно записывает метрики в файл, например для textfile-коллектора node_exporter"""
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_filename, filename)
+
+    def start_textfile_writer(self, filename: str, interval: float = TEXTFILE_WRITE_INTERVAL) -> None:
+        """Запускает фоновый поток, перезаписывающий файл метрик каждые interval секунд"""
+
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                self.write_textfile(filename)
+
+        threading.Thread(target=write_periodically, daemon=True, name="metrics-textfile").start()
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Запускает в фоновом потоке HTTP-сервер, отдающий метрики по адресу /metrics"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+        return server
+
+    def _get_or_create(self, metric_class: type, name: str, help: str, labels: dict[str, str]):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, metric_class(name, key[1]))
+                if help:
+                    self._help.setdefault(name, help)
+        return metric
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+
+class InstrumentedCardRepository(CardRepository):
+    """Обёртка над хранилищем карт, замеряющая длительность и ошибки каждого вызова"""
+
+    def __init__(self, card_repository: CardRepository, metrics: MetricsRegistry):
+        self._card_repository = card_repository
+        backend = type(card_repository).__name__
+
+        def timed(operation: str) -> Callable[[Callable], Callable]:
+            return metrics.timed(
+                "atmsys_repository", "Card repository call latency", backend=backend, operation=operation
+            )
+
+        self._withdraw = timed("withdraw")(card_repository.withdraw)
+        self._deposit = timed("deposit")(card_repository.deposit)
+        self._get_balance = timed("get_balance")(card_repository.get_balance)
+        self._is_card_pin_valid = timed("is_card_pin_valid")(card_repository.is_card_pin_valid)
+        self._apply_batch = timed("apply_batch")(card_repository.apply_batch)
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Снимает amount рублей с баланса карты с номером card и возвращает новый баланс"""
+        return self._withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        return self._deposit(card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return self._is_card_pin_valid(card, pin)
+
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """Подписывает listener на номера карт, которые добавляются в обёрнутое хранилище"""
+        self._card_repository.on_card_added(listener)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций в обёрнутом хранилище"""
+        return self._apply_batch(operations)
+
+    def close(self) -> None:
+        """Закрывает обёрнутое хранилище"""
+        self._card_repository.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(card_repository={self._card_repository!r})"
+
+
+class InstrumentedMenuItem(MenuItem):
+    """Обёртка над пунктом меню, замеряющая длительность и ошибки его выполнения"""
+
+    def __init__(self, menu_item: MenuItem, metrics: MetricsRegistry):
+        super().__init__(menu_item.description)
+        self._menu_item = menu_item
+        self._execute = metrics.timed("atmsys_menu_item", "Menu item execution latency", item=menu_item.name)(
+            menu_item.execute
+        )
+
+    def execute(self, bank_account: BankAccount, ui: UI) -> None:
+        """Выполняет обёрнутый пункт меню"""
+        self._execute(bank_account, ui)
+
+    @property
+    def name(self) -> str:
+        """Имя обёрнутого пункта меню"""
+        return self._menu_item.name
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(menu_item={self._menu_item!r})"
+
+
+def instrument_menu_items(menu_items: Sequence[MenuItem], metrics: MetricsRegistry) -> list[MenuItem]:
+    """Оборачивает пункты меню в замеряющие обёртки"""
+    return [InstrumentedMenuItem(menu_item, metrics) for menu_item in menu_items]
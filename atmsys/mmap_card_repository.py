@@ -0,0 +1,136 @@
+import argparse
+import json
+import mmap
+import struct
+from collections.abc import Iterator
+
+from .bank_account import ListableCardRepository
+from .exceptions import CardNotExists, InsufficientFunds
+from .typedefs import PIN, CardNumber, Cards, Rubles
+
+MAGIC = b"ATMC"
+VERSION = 1
+
+# Заголовок: сигнатура, версия формата, размер записи, количество записей
+_HEADER = struct.Struct("<4sHHI")
+# Запись о карте: номер карты, пин-код, баланс
+_RECORD = struct.Struct("<20s8sq")
+_CARD_SIZE = 20
+_PIN_OFFSET = 20
+_PIN_SIZE = 8
+_BALANCE = struct.Struct("<q")
+_BALANCE_OFFSET = 28
+
+
+class MmapCardRepository(ListableCardRepository):
+    """
+    Хранилище карт в бинарном файле с записями фиксированной длины.
+
+    Файл отображается в память через mmap, а индекс «номер карты → смещение
+    записи» строится один раз при открытии, поэтому каждая операция читает
+    и пишет только байты одной записи.
+    """
+
+    def __init__(self, filename: str):
+        self._filename = filename
+        self._file = open(filename, "r+b")  # noqa: SIM115
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._index = self._build_index()
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        offset = self._get_record_offset(card) + _BALANCE_OFFSET
+        (balance,) = _BALANCE.unpack_from(self._mmap, offset)
+        if balance < amount:
+            raise InsufficientFunds
+        _BALANCE.pack_into(self._mmap, offset, balance - amount)
+        return balance - amount
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        offset = self._get_record_offset(card) + _BALANCE_OFFSET
+        (balance,) = _BALANCE.unpack_from(self._mmap, offset)
+        _BALANCE.pack_into(self._mmap, offset, balance + amount)
+        return balance + amount
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        offset = self._get_record_offset(card) + _BALANCE_OFFSET
+        return _BALANCE.unpack_from(self._mmap, offset)[0]
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        offset = self._get_record_offset(card) + _PIN_OFFSET
+        return self._mmap[offset : offset + _PIN_SIZE].rstrip(b"\0") == pin.encode()
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        return iter(self._index)
+
+    def flush(self) -> None:
+        """Сбрасывает изменённые страницы файла на диск"""
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """Сбрасывает изменения на диск и закрывает файл"""
+        if self._mmap.closed:
+            return
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+
+    def _get_record_offset(self, card: CardNumber) -> int:
+        """
+        Возвращает смещение записи карты в файле,
+        если карты нет в хранилище, возбуждает исключение
+        """
+        try:
+            return self._index[card]
+        except KeyError:
+            raise CardNotExists
+
+    def _build_index(self) -> dict[CardNumber, int]:
+        """Строит индекс «номер карты → смещение записи» по заголовку и записям файла"""
+        magic, version, record_size, records_count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            raise ValueError(f"{self._filename} is not a card store of version {VERSION}")
+        index = {}
+        for number in range(records_count):
+            offset = _HEADER.size + number * _RECORD.size
+            card = self._mmap[offset : offset + _CARD_SIZE].rstrip(b"\0").decode()
+            index[card] = offset
+        return index
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(filename={self._filename!r})"
+
+
+def write_cards(cards: Cards, filename: str) -> None:
+    """Записывает карты cards в бинарный файл filename формата MmapCardRepository"""
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size, len(cards)))
+        for card, card_data in cards.items():
+            card_bytes, pin_bytes = card.encode(), card_data["pin"].encode()
+            if len(card_bytes) > _CARD_SIZE or len(pin_bytes) > _PIN_SIZE:
+                raise ValueError(f"Card {card} does not fit into a fixed-size record")
+            f.write(_RECORD.pack(card_bytes, pin_bytes, card_data["balance"]))
+
+
+def convert_json_to_mmap(json_filename: str, mmap_filename: str) -> None:
+    """Переносит карты из JSON-файла FileCardRepository в бинарный файл MmapCardRepository"""
+    with open(json_filename) as f:
+        write_cards(json.load(f), mmap_filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert cards.json to the binary mmap card store")
+    parser.add_argument("json_filename")
+    parser.add_argument("mmap_filename")
+    args = parser.parse_args()
+    convert_json_to_mmap(args.json_filename, args.mmap_filename)
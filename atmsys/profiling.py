@@ -0,0 +1,202 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Sequence
+from enum import StrEnum
+from pathlib import Path
+from types import FrameType
+
+from .bank_account import BankAccount
+from .menu import UI, MenuItem
+
+# Как часто, в секундах, сэмплирующий профилировщик снимает стек
+SAMPLING_INTERVAL = 0.001
+
+
+class ProfilerKind(StrEnum):
+    CPROFILE = "cprofile"  # детерминированный cProfile, результат в формате pstats
+    SAMPLING = "sampling"  # сэмплирование стека, результат в формате collapsed stacks
+
+
+class ProfileScope(StrEnum):
+    SESSION = "session"  # профилируется весь сеанс целиком
+    ITEMS = "items"  # профилируется каждый пункт меню отдельно
+
+
+class Profiler(ABC):
+    """Профилировщик, который можно многократно включать и выключать, накапливая результаты"""
+
+    file_extension: str
+
+    @abstractmethod
+    def start(self) -> None:
+        """Включает профилирование текущего потока"""
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Выключает профилирование"""
+        pass
+
+    @abstractmethod
+    def dump(self, filename: str) -> None:
+        """Записывает накопленные результаты в файл filename"""
+        pass
+
+
+class CProfileProfiler(Profiler):
+    """Профилировщик на основе cProfile, результаты читаются модулем pstats"""
+
+    file_extension = ".prof"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def dump(self, filename: str) -> None:
+        self._profile.dump_stats(filename)
+
+
+class SamplingProfiler(Profiler):
+    """
+    Сэмплирующий профилировщик: фоновый поток периодически снимает стек
+    профилируемого потока. Результат — collapsed stacks, которые понимают
+    flamegraph.pl, speedscope и другие инструменты
+    """
+
+    file_extension = ".collapsed"
+
+    def __init__(self, interval: float = SAMPLING_INTERVAL):
+        self._interval = interval
+        self._samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), daemon=True, name="sampling-profiler"
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def dump(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self, thread_id: int) -> None:
+        """Снимает стек потока thread_id, пока профилирование не выключат"""
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                self._samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame: FrameType | None) -> str:
+        """Сворачивает стек, заканчивающийся кадром frame, в строку «внешняя;...;внутренняя функция»"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+
+PROFILERS: dict[ProfilerKind, type[Profiler]] = {
+    ProfilerKind.CPROFILE: CProfileProfiler,
+    ProfilerKind.SAMPLING: SamplingProfiler,
+}
+
+
+class ProfiledMenuItem(MenuItem):
+    """Обёртка над пунктом меню, профилирующая каждое его выполнение"""
+
+    def __init__(self, menu_item: MenuItem, profiler: Profiler):
+        super().__init__(menu_item.description)
+        self._menu_item = menu_item
+        self._profiler = profiler
+
+    def execute(self, bank_account: BankAccount, ui: UI) -> None:
+        """Выполняет обёрнутый пункт меню под профилировщиком"""
+        self._profiler.start()
+        try:
+            self._menu_item.execute(bank_account, ui)
+        finally:
+            self._profiler.stop()
+
+    @property
+    def name(self) -> str:
+        """Имя обёрнутого пункта меню"""
+        return self._menu_item.name
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(menu_item={self._menu_item!r})"
+
+
+class ProfilingSession:
+    """
+    Профилирование одного сеанса банкомата. Используется как контекстный
+    менеджер вокруг ATM.run(); при выходе, в том числе по SystemExit,
+    результаты записываются в отдельные файлы этого сеанса в каталоге directory
+    """
+
+    def __init__(self, kind: ProfilerKind, scope: ProfileScope, directory: str):
+        self._kind = kind
+        self._scope = scope
+        self._directory = Path(directory)
+        self._session_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        # Профилировщики сеанса: название → профилировщик
+        self._profilers: dict[str, Profiler] = {}
+
+    def wrap_menu_items(self, menu_items: Sequence[MenuItem]) -> list[MenuItem]:
+        """Оборачивает пункты меню в профилирующие обёртки, если профилируются пункты меню"""
+        if self._scope != ProfileScope.ITEMS:
+            return list(menu_items)
+        wrapped: list[MenuItem] = []
+        for menu_item in menu_items:
+            profiler = PROFILERS[self._kind]()
+            self._profilers[menu_item.name] = profiler
+            wrapped.append(ProfiledMenuItem(menu_item, profiler))
+        return wrapped
+
+    def __enter__(self) -> "ProfilingSession":
+        if self._scope == ProfileScope.SESSION:
+            profiler = PROFILERS[self._kind]()
+            self._profilers["session"] = profiler
+            profiler.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._scope == ProfileScope.SESSION:
+            self._profilers["session"].stop()
+        self.dump()
+
+    def dump(self) -> list[Path]:
+        """Записывает результаты всех профилировщиков сеанса и возвращает пути к файлам"""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        filenames = []
+        for name, profiler in self._profilers.items():
+            filename = self._directory / f"session-{self._session_id}-{name}{profiler.file_extension}"
+            profiler.dump(str(filename))
+            filenames.append(filename)
+        return filenames
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(kind={self._kind!r}, scope={self._scope!r}, directory={str(self._directory)!r})"
+        )
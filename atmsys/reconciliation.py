@@ -0,0 +1,290 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import TextIO
+
+from .compact_card_repository import CARD_NUMBER_LENGTH, pack_card_number, unpack_card_number
+from .typedefs import Cards, OperationKind, Rubles
+
+try:
+    import numpy as np
+except ImportError:  # NumPy — необязательная зависимость: pip install "atmsys[reconciliation]"
+    np = None
+
+# Колонки файла с расхождениями
+MISMATCH_FIELDS = ("card", "opening_balance", "closing_balance", "operations_total", "difference")
+
+# Колонки строки журнала операций, которые нужны для сверки; номер карты
+# читается на байт длиннее 16 цифр, чтобы отличить более длинный номер
+_JOURNAL_COLUMNS = [
+    ("timestamp", "f8"),
+    ("card", f"S{CARD_NUMBER_LENGTH + 1}"),
+    ("kind", "S8"),
+    ("amount", "i8"),
+]
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError('Reconciliation requires NumPy: pip install "atmsys[reconciliation]"')
+
+
+def _pack(card: str) -> int:
+    key = pack_card_number(card)
+    if key is None:
+        raise ValueError(f"Card number {card!r} is not 16 digits")
+    return key
+
+
+@dataclass
+class Balances:
+    """Балансы карт на момент снимка: упакованные номера карт по возрастанию и балансы в том же порядке"""
+
+    cards: "np.ndarray"
+    balances: "np.ndarray"
+
+    @classmethod
+    def from_cards(cls, cards: Cards) -> "Balances":
+        _require_numpy()
+        keys = np.fromiter((_pack(card) for card in cards), dtype=np.uint64, count=len(cards))
+        balances = np.fromiter((card["balance"] for card in cards.values()), dtype=np.int64, count=len(cards))
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], balances[order])
+
+    @classmethod
+    def from_json(cls, filename: str) -> "Balances":
+        """Загружает балансы из JSON-файла с картами в формате FileCardRepository"""
+        with open(filename) as f:
+            return cls.from_cards(json.load(f))
+
+
+@dataclass
+class Operations:
+    """
+    Операции за период: упакованный номер карты, сумма со знаком (пополнение
+    положительно, снятие отрицательно) и номер терминала в terminal_names
+    """
+
+    cards: "np.ndarray"
+    amounts: "np.ndarray"
+    terminals: "np.ndarray"
+    terminal_names: list[str]
+
+    @classmethod
+    def from_journals(
+        cls, journals: Sequence[str], since: float | None = None, until: float | None = None
+    ) -> "Operations":
+        """
+        Загружает операции из журналов операций терминалов (по файлу на терминал,
+        имя терминала — имя файла без расширения), время которых в [since, until)
+        """
+        _require_numpy()
+        parts = []
+        for terminal, journal in enumerate(journals):
+            cards, amounts, timestamps = _read_journal(journal)
+            mask = np.ones(len(cards), dtype=bool)
+            if since is not None:
+                mask &= timestamps >= since
+            if until is not None:
+                mask &= timestamps < until
+            parts.append((cards[mask], amounts[mask], np.full(np.count_nonzero(mask), terminal, dtype=np.int32)))
+        if not parts:
+            return cls(np.empty(0, np.uint64), np.empty(0, np.int64), np.empty(0, np.int32), [])
+        cards, amounts, terminals = (np.concatenate(columns) for columns in zip(*parts, strict=True))
+        return cls(cards, amounts, terminals, [Path(journal).stem for journal in journals])
+
+
+def _read_journal(filename: str) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Читает журнал операций в массивы номеров карт, сумм со знаком и времени операций.
+    Строки журнала разбираются в NumPy целыми колонками, без объекта на каждую операцию;
+    недописанная последняя строка пропускается
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    data = data[: data.rfind(b"\n") + 1]
+    if not data:
+        return np.empty(0, np.uint64), np.empty(0, np.int64), np.empty(0, np.float64)
+    rows = np.loadtxt(io.BytesIO(data), dtype=_JOURNAL_COLUMNS, usecols=(0, 1, 2, 3), ndmin=1)
+    kinds = rows["kind"]
+    deposits = kinds == OperationKind.DEPOSIT.encode()
+    if not np.all(deposits | (kinds == OperationKind.WITHDRAW.encode())):
+        raise ValueError(f"Unknown operation kind in {filename!r}")
+    amounts = np.where(deposits, rows["amount"], -rows["amount"])
+    return _pack_column(rows["card"], filename), amounts, rows["timestamp"]
+
+
+def _pack_column(cards: "np.ndarray", filename: str) -> "np.ndarray":
+    """Упаковывает колонку номеров карт (байтовые строки) в uint64, как pack_card_number, но векторно"""
+    raw = np.ascontiguousarray(cards).view(np.uint8).reshape(len(cards), CARD_NUMBER_LENGTH + 1)
+    digits = raw[:, :CARD_NUMBER_LENGTH] - np.uint8(ord("0"))
+    # Короткий номер дополнен нулевыми байтами, которые, как и не-цифры, дают значения больше 9
+    if np.any(digits > 9) or np.any(raw[:, CARD_NUMBER_LENGTH]):
+        raise ValueError(f"Card number in {filename!r} is not 16 digits")
+    powers = 10 ** np.arange(CARD_NUMBER_LENGTH - 1, -1, -1, dtype=np.uint64)
+    return digits.astype(np.uint64) @ powers
+
+
+@dataclass
+class TerminalTotals:
+    cash_in: Rubles = 0
+    cash_out: Rubles = 0
+
+
+@dataclass
+class ReconciliationReport:
+    cards: int = 0
+    operations: int = 0
+    deposits: Rubles = 0
+    withdrawals: Rubles = 0
+    terminals: dict[str, TerminalTotals] = field(default_factory=dict)
+    # Карты, у которых изменение баланса не равно сумме операций
+    mismatches: "np.ndarray | None" = None
+    opening_balances: "np.ndarray | None" = None
+    closing_balances: "np.ndarray | None" = None
+    operations_totals: "np.ndarray | None" = None
+
+    @property
+    def mismatch_count(self) -> int:
+        return 0 if self.mismatches is None else len(self.mismatches)
+
+    def write_mismatches(self, output: TextIO) -> None:
+        """Пишет карты с расхождениями в CSV output"""
+        writer = csv.writer(output)
+        writer.writerow(MISMATCH_FIELDS)
+        for index in range(self.mismatch_count):
+            opening, closing, total = (
+                int(self.opening_balances[index]),
+                int(self.closing_balances[index]),
+                int(self.operations_totals[index]),
+            )
+            writer.writerow(
+                (unpack_card_number(int(self.mismatches[index])), opening, closing, total, closing - opening - total)
+            )
+
+    def print(self, file: TextIO = sys.stderr) -> None:
+        print(f"Cards: {self.cards}, operations: {self.operations}, mismatches: {self.mismatch_count}", file=file)
+        print(f"Deposits: {self.deposits}, withdrawals: {self.withdrawals}", file=file)
+        for terminal, totals in self.terminals.items():
+            print(f"  {terminal}: cash in {totals.cash_in}, cash out {totals.cash_out}", file=file)
+
+
+def _union(*arrays: "np.ndarray") -> "np.ndarray":
+    """
+    Возвращает отсортированные различные значения всех массивов. Сортировка
+    с отбором соседних дубликатов здесь в разы быстрее, чем np.union1d
+    """
+    keys = np.concatenate(arrays)
+    keys.sort()
+    distinct = np.empty(len(keys), dtype=bool)
+    distinct[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=distinct[1:])
+    return keys[distinct]
+
+
+def _covers(keys: "np.ndarray", values: "np.ndarray") -> bool:
+    """Возвращает True, если все значения values есть в отсортированном массиве keys"""
+    if np.array_equal(keys, values):
+        return True
+    if not len(keys):
+        return not len(values)
+    positions = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    return bool(np.all(keys[positions] == values))
+
+
+def _align(keys: "np.ndarray", balances: Balances) -> "np.ndarray":
+    """Возвращает балансы карт keys из balances; для карт, которых нет в balances, — ноль"""
+    if not len(balances.cards):
+        return np.zeros(len(keys), dtype=np.int64)
+    if np.array_equal(balances.cards, keys):
+        # Обычный случай: в снимке все карты, и поиск каждой не нужен
+        return balances.balances
+    positions = np.minimum(np.searchsorted(balances.cards, keys), len(balances.cards) - 1)
+    return np.where(balances.cards[positions] == keys, balances.balances[positions], 0)
+
+
+def reconcile(opening: Balances, closing: Balances, operations: Operations) -> ReconciliationReport:
+    """
+    Сверяет балансы на начало и конец периода с операциями за период:
+    для каждой карты сумма пополнений минус сумма снятий должна равняться
+    изменению баланса. Все суммы считаются векторно по массивам, без цикла по картам.
+    Карта, которой нет в одном из снимков, считается имевшей в нём нулевой баланс
+    """
+    _require_numpy()
+    if _covers(opening.cards, closing.cards) and _covers(opening.cards, operations.cards):
+        cards = opening.cards
+    else:
+        cards = _union(opening.cards, closing.cards, operations.cards)
+    opening_balances = _align(cards, opening)
+    closing_balances = _align(cards, closing)
+
+    card_positions = np.searchsorted(cards, operations.cards)
+    operations_totals = np.zeros(len(cards), dtype=np.int64)
+    np.add.at(operations_totals, card_positions, operations.amounts)
+
+    mismatched = closing_balances - opening_balances != operations_totals
+
+    deposits = np.where(operations.amounts > 0, operations.amounts, 0)
+    withdrawals = np.where(operations.amounts < 0, -operations.amounts, 0)
+    terminal_count = len(operations.terminal_names)
+    # Суммы по терминалам — в int64, а не во float64, как у np.bincount с весами: деньги считаются точно
+    cash_in = np.zeros(terminal_count, dtype=np.int64)
+    cash_out = np.zeros(terminal_count, dtype=np.int64)
+    np.add.at(cash_in, operations.terminals, deposits)
+    np.add.at(cash_out, operations.terminals, withdrawals)
+
+    return ReconciliationReport(
+        cards=len(cards),
+        operations=len(operations.amounts),
+        deposits=int(deposits.sum()),
+        withdrawals=int(withdrawals.sum()),
+        terminals={
+            name: TerminalTotals(int(cash_in[index]), int(cash_out[index]))
+            for index, name in enumerate(operations.terminal_names)
+        },
+        mismatches=cards[mismatched],
+        opening_balances=opening_balances[mismatched],
+        closing_balances=closing_balances[mismatched],
+        operations_totals=operations_totals[mismatched],
+    )
+
+
+def day_bounds(day: date) -> tuple[float, float]:
+    """Возвращает время начала и конца суток day по местному времени"""
+    start = datetime.combine(day, time())
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="Reconcile card balances with the day's transaction journals")
+    parser.add_argument("opening", help="cards.json snapshot taken at the start of the day")
+    parser.add_argument("closing", help="cards.json snapshot taken at the end of the day")
+    parser.add_argument("journals", nargs="+", help="transaction journal of each terminal")
+    parser.add_argument("--date", type=date.fromisoformat, help="only reconcile operations of this day (YYYY-MM-DD)")
+    parser.add_argument("--output", help="CSV file for mismatched cards (default: stdout)")
+    args = parser.parse_args(argv)
+
+    since, until = day_bounds(args.date) if args.date else (None, None)
+    report = reconcile(
+        Balances.from_json(args.opening),
+        Balances.from_json(args.closing),
+        Operations.from_journals(args.journals, since, until),
+    )
+    if args.output:
+        with open(args.output, "w", newline="") as output:
+            report.write_mismatches(output)
+    else:
+        report.write_mismatches(sys.stdout)
+    report.print()
+    if report.mismatch_count:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
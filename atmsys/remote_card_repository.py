@@ -0,0 +1,204 @@
+import json
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+
+from .bank_account import ListableCardRepository
+from .exceptions import ATMException
+from .typedefs import PIN, CardNumber, Operation, OperationKind, OperationResult, Rubles
+
+type Address = tuple[str, int] | str
+
+DEFAULT_ADDRESS = "127.0.0.1:7878"
+# Сколько соединений с сервером держит один клиент
+POOL_SIZE = 4
+# Сколько секунд ждать ответа сервера
+TIMEOUT = 5.0
+# Сколько раз повторять запрос после сетевой ошибки
+RETRIES = 3
+# Пауза перед первым повтором, каждый следующий ждёт вдвое дольше
+RETRY_DELAY = 0.05
+
+
+def _error(name: str, args: list) -> ATMException:
+    """
+    Восстанавливает исключение банкомата, которое сервер вернул по имени name с аргументами args.
+    Неизвестные клиенту ошибки, в том числе сбой хранилища, становятся ATMException
+    """
+    error_class = next((cls for cls in ATMException.__subclasses__() if cls.__name__ == name), None)
+    if error_class is not None:
+        try:
+            return error_class(*args)
+        except (TypeError, AttributeError):
+            pass
+    return ATMException(name, *args)
+
+
+def parse_store_address(value: str) -> Address:
+    """Разбирает адрес хранилища: HOST:PORT для TCP или путь к Unix-сокету"""
+    host, separator, port = value.rpartition(":")
+    if separator and "/" not in value and port.isdigit():
+        return host, int(port)
+    return value
+
+
+class _Connection:
+    """Одно соединение с сервером хранилища"""
+
+    def __init__(self, address: Address, timeout: float):
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(address)
+        else:
+            self._socket = socket.create_connection(address, timeout=timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile("rb")
+        self._next_id = 0
+
+    def exchange(self, requests: Sequence[dict]) -> list[dict]:
+        """Отправляет все запросы сразу, не дожидаясь ответов, и возвращает ответы в порядке запросов"""
+        first_id = self._next_id
+        self._next_id += len(requests)
+        lines = [json.dumps({**request, "id": first_id + number}) + "\n" for number, request in enumerate(requests)]
+        self._socket.sendall("".join(lines).encode())
+        responses = []
+        for number in range(len(requests)):
+            line = self._reader.readline()
+            if not line:
+                raise ConnectionResetError("Card store closed the connection")
+            response = json.loads(line)
+            if response.get("id") != first_id + number:
+                raise ConnectionError(f"Unexpected response {response!r}")
+            responses.append(response)
+        return responses
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+
+class RemoteCardRepository(ListableCardRepository):
+    """
+    Клиент сервера хранилища карт (atmsys.card_store_server). Держит пул
+    из pool_size соединений, поэтому его можно использовать из многих потоков.
+    Если сервер не ответил за timeout секунд или соединение разорвалось,
+    запрос повторяется до retries раз по новому соединению. Изменяющие
+    запросы отправляются с ключом идемпотентности, поэтому повтор
+    не выполнит операцию второй раз
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        pool_size: int = POOL_SIZE,
+        timeout: float = TIMEOUT,
+        retries: int = RETRIES,
+    ):
+        self._address = parse_store_address(address) if isinstance(address, str) else address
+        self._timeout = timeout
+        self._retries = retries
+        self._idle: queue.LifoQueue[_Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        return self._call("withdraw", card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        return self._call("deposit", card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._call("get_balance", card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return self._call("is_card_pin_valid", card, pin)
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        return iter(self._call("card_numbers"))
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций на сервере одним запросом"""
+        operations = list(operations)
+        results = self._call("apply_batch", [[op.kind, op.card, op.amount] for op in operations])
+        return [
+            OperationResult(operation, balance, error)
+            for operation, (balance, error) in zip(operations, results, strict=True)
+        ]
+
+    def pipeline(self, calls: Sequence[tuple]) -> list:
+        """
+        Выполняет вызовы calls вида (метод, *аргументы) по одному соединению,
+        отправляя их все сразу, и возвращает результаты в том же порядке.
+        Ошибка любого вызова возбуждается как исключение
+        """
+        responses = self._exchange([self._request(method, *args) for method, *args in calls])
+        return [self._result(response) for response in responses]
+
+    def close(self) -> None:
+        """Закрывает все простаивающие соединения"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _call(self, method: str, *args):
+        return self._result(self._exchange([self._request(method, *args)])[0])
+
+    @staticmethod
+    def _request(method: str, *args) -> dict:
+        request = {"method": method, "args": list(args)}
+        if method in (OperationKind.WITHDRAW, OperationKind.DEPOSIT, "apply_batch"):
+            request["key"] = uuid.uuid4().hex
+        return request
+
+    @staticmethod
+    def _result(response: dict):
+        error = response.get("error")
+        if error is not None:
+            raise _error(error, response.get("args", []))
+        return response["result"]
+
+    def _exchange(self, requests: Sequence[dict]) -> list[dict]:
+        """Выполняет запросы по соединению из пула, повторяя их по новому соединению при сетевых ошибках"""
+        for attempt in range(self._retries + 1):
+            with self._slots:
+                try:
+                    connection = self._connection()
+                    try:
+                        responses = connection.exchange(requests)
+                    except BaseException:
+                        connection.close()
+                        raise
+                except OSError:
+                    if attempt == self._retries:
+                        raise
+                else:
+                    self._idle.put(connection)
+                    return responses
+            time.sleep(RETRY_DELAY * 2**attempt)
+        raise AssertionError("unreachable")
+
+    def _connection(self) -> _Connection:
+        """Берёт простаивающее соединение из пула или открывает новое"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _Connection(self._address, self._timeout)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(address={self._address!r}, timeout={self._timeout!r})"
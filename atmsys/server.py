@@ -0,0 +1,260 @@
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+
+from .atm import ATM
+from .bank_account import CardRepository
+from .card_number_filter import CardNumberFilter
+from .main import (
+    add_cache,
+    add_cache_arguments,
+    add_card_filter_arguments,
+    add_cash_dispenser_arguments,
+    add_metrics_arguments,
+    add_storage_arguments,
+    add_transaction_journal,
+    add_transaction_journal_arguments,
+    add_withdrawal_limit_arguments,
+    add_withdrawal_limits,
+    closing_card_repository,
+    instrument,
+    make_card_number_filter,
+    make_card_repository,
+    make_cash_dispenser,
+    make_menu_items,
+    open_transaction_journal,
+    start_metrics,
+    storage_options,
+)
+from .menu import UI, Menu, MenuItem
+from .metrics import MetricsRegistry
+from .ui_messages import UiMessage
+
+# Максимальное число одновременно обслуживаемых сеансов
+MAX_SESSIONS = 64
+# Через сколько секунд бездействия клиента сеанс завершается
+IDLE_TIMEOUT = 120.0
+# Сколько секунд при остановке сервера ждать завершения активных сеансов
+SHUTDOWN_GRACE_PERIOD = 10.0
+# Как часто цикл приёма соединений проверяет, не пора ли остановиться
+_ACCEPT_POLL_INTERVAL = 0.5
+_SHUTDOWN_POLL_INTERVAL = 0.05
+
+type Address = tuple[str, int] | str
+
+
+def listen(address: Address) -> socket.socket:
+    """Создаёт сокет, принимающий соединения по TCP-адресу (host, port) или пути Unix-сокета"""
+    if isinstance(address, str):
+        with suppress(FileNotFoundError):
+            os.unlink(address)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(address)
+    listener.listen()
+    listener.settimeout(_ACCEPT_POLL_INTERVAL)
+    return listener
+
+
+class SocketUI(UI):
+    """Текстовый интерфейс банкомата поверх сетевого соединения"""
+
+    def __init__(self, connection: socket.socket):
+        self._connection = connection
+        self._reader = connection.makefile("r", encoding="utf-8", newline="\n")
+
+    def show_message(self, message: str) -> None:
+        """Показывает сообщение message пользователю"""
+        self._connection.sendall(f"{message}\n".encode())
+
+    def get_input(self, prompt: str) -> str:
+        """
+        Запрашивает данные у пользователя и возвращает их.
+        Если пользователь закрыл соединение, возбуждает EOFError,
+        если не ответил за время ожидания соединения — TimeoutError
+        """
+        self._connection.sendall(prompt.encode())
+        line = self._reader.readline()
+        if not line:
+            raise EOFError
+        return line.rstrip("\r\n")
+
+    def show_separator(self) -> None:
+        """Показывает визуальный разделитель"""
+        self.show_message(f"\n{'=' * 25}\n")
+
+    def close(self) -> None:
+        """Закрывает поток чтения из соединения"""
+        self._reader.close()
+
+
+class ATMServer:
+    """
+    Сервер, проводящий по одному сеансу банкомата на каждое входящее соединение.
+
+    Все сеансы работают с одним общим хранилищем карт. Число одновременных
+    сеансов ограничено: пока все места заняты, новые соединения ждут
+    в очереди на прослушиваемом сокете.
+    """
+
+    def __init__(
+        self,
+        card_repository: CardRepository,
+        address: Address,
+        menu_items: Sequence[MenuItem],
+        max_sessions: int = MAX_SESSIONS,
+        idle_timeout: float = IDLE_TIMEOUT,
+        metrics: MetricsRegistry | None = None,
+        card_number_filter: CardNumberFilter | None = None,
+    ):
+        self._card_repository = card_repository
+        self._metrics = metrics
+        self._card_number_filter = card_number_filter
+        self._menu_items = menu_items
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        self._listener = listen(address)
+        self._sessions = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="atm-session")
+        self._free_slots = threading.BoundedSemaphore(max_sessions)
+        self._connections: set[socket.socket] = set()
+        self._connections_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    @property
+    def address(self) -> Address:
+        """Адрес, на котором сервер принимает соединения"""
+        return self._listener.getsockname()
+
+    def serve_forever(self, grace_period: float = SHUTDOWN_GRACE_PERIOD) -> None:
+        """Принимает соединения до вызова shutdown(), затем корректно завершает активные сеансы"""
+        try:
+            while not self._stopping.is_set():
+                if not self._free_slots.acquire(timeout=_ACCEPT_POLL_INTERVAL):
+                    continue
+                try:
+                    connection, _ = self._listener.accept()
+                except TimeoutError:
+                    self._free_slots.release()
+                    continue
+                with self._connections_lock:
+                    self._connections.add(connection)
+                self._sessions.submit(self._serve_session, connection)
+        finally:
+            self._listener.close()
+            self._stop_sessions(grace_period)
+
+    def shutdown(self) -> None:
+        """Просит сервер прекратить приём соединений; можно вызывать из другого потока или обработчика сигнала"""
+        self._stopping.set()
+
+    def _serve_session(self, connection: socket.socket) -> None:
+        """Проводит сеанс банкомата в соединении connection"""
+        connection.settimeout(self._idle_timeout)
+        ui = SocketUI(connection)
+        atm = ATM(
+            card_repository=self._card_repository,
+            ui=ui,
+            menu=Menu(items=self._menu_items, ui=ui),
+            metrics=self._metrics,
+            card_number_filter=self._card_number_filter,
+        )
+        try:
+            atm.run()
+        except TimeoutError:
+            with suppress(OSError):
+                ui.show_message(UiMessage.SESSION_TIMEOUT)
+        except (SystemExit, EOFError, OSError):
+            pass
+        finally:
+            ui.close()
+            with self._connections_lock:
+                self._connections.discard(connection)
+            connection.close()
+            self._free_slots.release()
+
+    def _stop_sessions(self, grace_period: float) -> None:
+        """
+        Ждёт завершения активных сеансов не дольше grace_period секунд,
+        затем разрывает оставшиеся соединения
+        """
+        deadline = time.monotonic() + grace_period
+        while time.monotonic() < deadline:
+            with self._connections_lock:
+                if not self._connections:
+                    break
+            time.sleep(_SHUTDOWN_POLL_INTERVAL)
+        with self._connections_lock:
+            for connection in self._connections:
+                with suppress(OSError):
+                    connection.shutdown(socket.SHUT_RDWR)
+        self._sessions.shutdown(wait=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(card_repository={self._card_repository!r}, address={self.address!r}, "
+            f"max_sessions={self._max_sessions!r}, idle_timeout={self._idle_timeout!r})"
+        )
+
+
+def parse_address(tcp: str | None, unix: str | None) -> Address:
+    """Возвращает адрес сервера по значению параметров --tcp HOST:PORT или --unix PATH"""
+    if unix:
+        return unix
+    host, _, port = (tcp or "127.0.0.1:7777").rpartition(":")
+    return host, int(port)
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="ATM terminal server")
+    add_storage_arguments(parser)
+    add_cache_arguments(parser)
+    add_transaction_journal_arguments(parser)
+    add_withdrawal_limit_arguments(parser)
+    add_cash_dispenser_arguments(parser)
+    add_card_filter_arguments(parser)
+    add_metrics_arguments(parser)
+    address_group = parser.add_mutually_exclusive_group()
+    address_group.add_argument("--tcp", metavar="HOST:PORT", help="listen on a TCP address (default 127.0.0.1:7777)")
+    address_group.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    metrics = start_metrics(args)
+    transaction_journal = open_transaction_journal(args)
+    storage = make_card_repository(args.storage, args.cards, thread_safe=True, **storage_options(args, metrics))
+    card_number_filter = make_card_number_filter(parser, args, storage)
+    card_repository, menu_items = instrument(
+        add_withdrawal_limits(args, add_transaction_journal(add_cache(args, storage, metrics), transaction_journal)),
+        make_menu_items(transaction_journal, make_cash_dispenser(args)),
+        metrics,
+    )
+    server = ATMServer(
+        card_repository=card_repository,
+        address=parse_address(args.tcp, args.unix),
+        menu_items=menu_items,
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        metrics=metrics,
+        card_number_filter=card_number_filter,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: server.shutdown())
+    signal.signal(signal.SIGINT, lambda *_: server.shutdown())
+    try:
+        with closing_card_repository(card_repository):
+            server.serve_forever()
+    finally:
+        if metrics is not None and args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import csv
+import sys
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from itertools import batched
+from typing import TextIO
+
+from .bank_account import CardRepository
+from .exceptions import InvalidAmount
+from .main import add_storage_arguments, make_card_repository, storage_options
+from .menu import parse_amount
+from .typedefs import Operation, OperationKind, OperationResult
+
+# Сколько строк файла операций применяется одним пакетом
+CHUNK_SIZE = 10_000
+# Колонки входного и выходного CSV-файлов
+INPUT_FIELDS = ("operation", "card", "amount")
+OUTPUT_FIELDS = (*INPUT_FIELDS, "balance", "error")
+# Ошибка строки, которую не удалось разобрать в операцию
+INVALID_OPERATION = "InvalidOperation"
+
+
+@dataclass
+class SettlementReport:
+    operations: int = 0
+    errors: Counter = field(default_factory=Counter)
+
+    def print(self, file: TextIO = sys.stderr) -> None:
+        print(f"Operations: {self.operations}, failed: {self.errors.total()}", file=file)
+        for error, count in self.errors.most_common():
+            print(f"  {error}: {count}", file=file)
+
+
+def parse_operation(row: dict[str, str]) -> Operation:
+    """Разбирает строку CSV-файла в операцию, если строка некорректна, возбуждает исключение ValueError"""
+    try:
+        return Operation(OperationKind(row["operation"].strip()), row["card"].strip(), parse_amount(row["amount"]))
+    except (KeyError, AttributeError, InvalidAmount) as e:
+        raise ValueError(f"Invalid operation row {row!r}") from e
+
+
+def settle(
+    card_repository: CardRepository, rows: Iterable[dict[str, str]], output: TextIO, chunk_size: int = CHUNK_SIZE
+) -> SettlementReport:
+    """
+    Применяет операции из строк rows пакетами по chunk_size и пишет результат
+    каждой строки в CSV output. В памяти одновременно находится только один пакет
+    """
+    report = SettlementReport()
+    writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for chunk in batched(rows, chunk_size, strict=False):
+        operations: list[Operation] = []
+        invalid_rows: dict[int, dict[str, str]] = {}
+        for position, row in enumerate(chunk):
+            try:
+                operations.append(parse_operation(row))
+            except ValueError:
+                invalid_rows[position] = row
+        results = iter(card_repository.apply_batch(operations))
+        for position in range(len(chunk)):
+            if position in invalid_rows:
+                writer.writerow({**invalid_rows[position], "error": INVALID_OPERATION})
+                report.errors[INVALID_OPERATION] += 1
+            else:
+                result = next(results)
+                writer.writerow(_result_row(result))
+                if not result.ok:
+                    report.errors[result.error] += 1
+            report.operations += 1
+    return report
+
+
+def _result_row(result: OperationResult) -> dict:
+    operation = result.operation
+    return {
+        "operation": operation.kind,
+        "card": operation.card,
+        "amount": operation.amount,
+        "balance": "" if result.balance is None else result.balance,
+        "error": result.error or "",
+    }
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="Apply a CSV settlement file of deposits and withdrawals")
+    add_storage_arguments(parser)
+    parser.add_argument("operations", help="CSV file with operation,card,amount columns")
+    parser.add_argument("--output", help="CSV file for per-operation results (default: stdout)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="operations applied per batch")
+    args = parser.parse_args(argv)
+
+    card_repository = make_card_repository(args.storage, args.cards, **storage_options(args, None))
+    try:
+        with (
+            open(args.operations, newline="") as operations,
+            open(args.output, "w", newline="") if args.output else nullcontext(sys.stdout) as output,
+        ):
+            report = settle(card_repository, csv.DictReader(operations), output, args.chunk_size)
+    finally:
+        card_repository.close()
+    report.print()
+
+
+if __name__ == "__main__":
+    main()
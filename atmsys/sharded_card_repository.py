@@ -0,0 +1,177 @@
+import argparse
+import json
+import shutil
+import zlib
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from enum import StrEnum
+from pathlib import Path
+
+from .bank_account import ListableCardRepository
+from .file_card_repository import FileCardRepository
+from .synchronized_card_repository import SynchronizedListableCardRepository
+from .typedefs import PIN, CardNumber, Cards, Operation, OperationResult, Rubles
+
+# Файл с описанием шардов в каталоге хранилища
+MANIFEST_FILENAME = "manifest.json"
+# Длина BIN — банковского идентификационного номера в начале номера карты
+BIN_LENGTH = 6
+
+
+class ShardingScheme(StrEnum):
+    """Как номер карты сопоставляется шарду"""
+
+    HASH = "hash"  # по CRC32 всего номера: карты распределяются равномерно
+    BIN = "bin"  # по BIN: карты одного банка-эмитента попадают в один шард
+
+
+def shard_index(card: CardNumber, shards: int, scheme: ShardingScheme) -> int:
+    """Возвращает номер шарда карты card; результат одинаков во всех процессах"""
+    if scheme == ShardingScheme.BIN:
+        return zlib.crc32(card[:BIN_LENGTH].encode()) % shards
+    return zlib.crc32(card.encode()) % shards
+
+
+def shard_filename(directory: Path, index: int) -> Path:
+    return directory / f"shard-{index:03d}.json"
+
+
+class ShardedCardRepository(ListableCardRepository):
+    """
+    Хранилище карт, разбитое на шарды по номеру карты. Каждый вызов
+    направляется в хранилище своего шарда; у каждого шарда своя блокировка,
+    поэтому операции с картами разных шардов выполняются параллельно,
+    а файл каждого шарда остаётся небольшим
+    """
+
+    def __init__(self, shards: Sequence[ListableCardRepository], scheme: ShardingScheme = ShardingScheme.HASH):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self._shards = [SynchronizedListableCardRepository(shard) for shard in shards]
+        self._scheme = scheme
+
+    @classmethod
+    def open(
+        cls, directory: str, shard_factory: Callable[[str], ListableCardRepository] = FileCardRepository
+    ) -> "ShardedCardRepository":
+        """
+        Открывает хранилище из каталога directory, созданного функцией write_shards:
+        каждый файл шарда открывается через shard_factory
+        """
+        path = Path(directory)
+        manifest = json.loads((path / MANIFEST_FILENAME).read_text())
+        shards = [shard_factory(str(shard_filename(path, index))) for index in range(manifest["shards"])]
+        return cls(shards, ShardingScheme(manifest["scheme"]))
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        return self._shard_for(card).withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        return self._shard_for(card).deposit(card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._shard_for(card).get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return self._shard_for(card).is_card_pin_valid(card, pin)
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища, шард за шардом"""
+        for shard in self._shards:
+            yield from shard.card_numbers()
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """
+        Раскладывает пакет операций по шардам, применяет в каждом шарде его часть
+        одним пакетом и возвращает результаты в исходном порядке операций
+        """
+        operations = list(operations)
+        positions: list[list[int]] = [[] for _ in self._shards]
+        for position, operation in enumerate(operations):
+            positions[shard_index(operation.card, len(self._shards), self._scheme)].append(position)
+        results: dict[int, OperationResult] = {}
+        for shard, shard_positions in zip(self._shards, positions, strict=True):
+            if shard_positions:
+                shard_results = shard.apply_batch([operations[position] for position in shard_positions])
+                results.update(zip(shard_positions, shard_results, strict=True))
+        return [results[position] for position in range(len(operations))]
+
+    def close(self) -> None:
+        """Закрывает хранилища всех шардов"""
+        for shard in self._shards:
+            shard.close()
+
+    def _shard_for(self, card: CardNumber) -> ListableCardRepository:
+        return self._shards[shard_index(card, len(self._shards), self._scheme)]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(shards={len(self._shards)!r}, scheme={self._scheme!r})"
+
+
+def write_shards(cards: Cards, directory: str, shards: int, scheme: ShardingScheme = ShardingScheme.HASH) -> None:
+    """Раскладывает карты cards по shards JSON-файлам шардов в каталоге directory"""
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    partitions: list[Cards] = [{} for _ in range(shards)]
+    for card, card_data in cards.items():
+        partitions[shard_index(card, shards, scheme)][card] = card_data
+    for index, partition in enumerate(partitions):
+        with open(shard_filename(path, index), "w") as f:
+            json.dump(partition, f)
+    (path / MANIFEST_FILENAME).write_text(json.dumps({"shards": shards, "scheme": scheme}))
+
+
+def read_shards(directory: str) -> Cards:
+    """Собирает карты из всех файлов шардов каталога directory"""
+    path = Path(directory)
+    manifest = json.loads((path / MANIFEST_FILENAME).read_text())
+    cards: Cards = {}
+    for index in range(manifest["shards"]):
+        with open(shard_filename(path, index)) as f:
+            cards.update(json.load(f))
+    return cards
+
+
+def rebalance(directory: str, shards: int, scheme: ShardingScheme | None = None) -> None:
+    """
+    Перераскладывает карты каталога directory на shards шардов. Выполняется,
+    пока терминалы остановлены: новые шарды пишутся во временный каталог,
+    который затем подменяет старый
+    """
+    path = Path(directory)
+    if scheme is None:
+        scheme = ShardingScheme(json.loads((path / MANIFEST_FILENAME).read_text())["scheme"])
+    tmp_path, old_path = path.with_name(f"{path.name}.tmp"), path.with_name(f"{path.name}.old")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    write_shards(read_shards(directory), str(tmp_path), shards, scheme)
+    path.rename(old_path)
+    tmp_path.rename(path)
+    shutil.rmtree(old_path)
+
+
+def convert_json_to_shards(json_filename: str, directory: str, shards: int, scheme: ShardingScheme) -> None:
+    """Раскладывает карты из JSON-файла FileCardRepository по шардам в каталоге directory"""
+    with open(json_filename) as f:
+        write_shards(json.load(f), directory, shards, scheme)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split cards.json into shards or change the shard count offline")
+    parser.add_argument("directory", help="sharded card storage directory")
+    parser.add_argument("--shards", type=int, required=True, help="new number of shards")
+    parser.add_argument("--scheme", choices=list(ShardingScheme), help="sharding scheme (default: keep current)")
+    parser.add_argument("--from-json", metavar="FILENAME", help="create shards from a cards.json file")
+    args = parser.parse_args()
+    if args.from_json:
+        convert_json_to_shards(args.from_json, args.directory, args.shards, ShardingScheme(args.scheme or "hash"))
+    else:
+        rebalance(args.directory, args.shards, args.scheme and ShardingScheme(args.scheme))
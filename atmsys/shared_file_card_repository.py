@@ -0,0 +1,194 @@
+import fcntl
+import os
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+from .file_card_repository import FileCardRepository
+from .journaled_file_card_repository import COMPACT_EVERY, FsyncPolicy, JournaledFileCardRepository
+from .typedefs import PIN, CardNumber, Cards, Operation, OperationResult, Rubles
+
+# Первая строка журнала — номер поколения: он растёт при каждой компактификации
+_GENERATION_PREFIX = b"#gen "
+_HEADER_SIZE = 32
+
+
+def _parse_generation(header: bytes) -> int:
+    """Возвращает поколение журнала по его первой строке; у журнала без заголовка поколение 0"""
+    if not header.startswith(_GENERATION_PREFIX) or b"\n" not in header:
+        return 0
+    return int(header[len(_GENERATION_PREFIX) : header.index(b"\n")])
+
+
+class SharedFileCardRepository(JournaledFileCardRepository):
+    """
+    Хранилище карт в файле-снимке с журналом, с которым одновременно
+    работают несколько процессов-терминалов.
+
+    Версия данных, которые видит процесс, — поколение журнала и смещение
+    в нём. Перед каждой операцией процесс под рекомендательной блокировкой
+    flock дочитывает только новые строки журнала после своего смещения,
+    а снимок перечитывает, лишь если другой процесс успел сделать
+    компактификацию и поколение сменилось. Чтения выполняются под
+    разделяемой блокировкой и не мешают друг другу, изменения баланса —
+    под исключительной, которая держится только на время проверки
+    и дописывания одной строки
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        journal_filename: str | None = None,
+        compact_every: int = COMPACT_EVERY,
+        fsync: FsyncPolicy = FsyncPolicy.COMPACTION,
+    ):
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        # Поколение None означает, что снимок ещё не прочитан
+        self._generation: int | None = None
+        self._offset = 0
+        super().__init__(filename, journal_filename, compact_every, fsync)
+        self._reader = open(self._journal_filename, "rb")  # noqa: SIM115
+
+    @property
+    def version(self) -> tuple[int | None, int]:
+        """Версия данных, которые видит процесс: поколение журнала и смещение в нём"""
+        return self._generation, self._offset
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        with self._locked(fcntl.LOCK_EX):
+            self._catch_up()
+            return super().withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        with self._locked(fcntl.LOCK_EX):
+            self._catch_up()
+            return super().deposit(card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        with self._locked(fcntl.LOCK_SH):
+            self._catch_up()
+            return super().get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        with self._locked(fcntl.LOCK_SH):
+            self._catch_up()
+            return super().is_card_pin_valid(card, pin)
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        with self._locked(fcntl.LOCK_SH):
+            self._catch_up()
+            return iter(list(self._cards))
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций под одной исключительной блокировкой и дописывает его в журнал одной записью"""
+        with self._locked(fcntl.LOCK_EX):
+            self._catch_up()
+            return super().apply_batch(operations)
+
+    def compact(self) -> None:
+        """Сворачивает журнал в новый снимок и начинает новое поколение журнала"""
+        with self._locked(fcntl.LOCK_EX):
+            self._catch_up()
+            super().compact()
+            self._generation = (self._generation or 0) + 1
+            self._journal.write(f"{_GENERATION_PREFIX.decode()}{self._generation}\n")
+            self._journal.flush()
+            if self._fsync != FsyncPolicy.NEVER:
+                os.fsync(self._journal.fileno())
+            self._offset = self._journal.tell()
+
+    def close(self) -> None:
+        """Сбрасывает журнал на диск и закрывает файлы"""
+        with self._thread_lock:
+            super().close()
+            self._reader.close()
+
+    @contextmanager
+    def _locked(self, operation: int):
+        """
+        Захватывает блокировку журнала: operation — fcntl.LOCK_SH или fcntl.LOCK_EX.
+        Потоки процесса дополнительно упорядочиваются между собой, а вложенный
+        захват в том же потоке ничего не делает
+        """
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                fcntl.flock(self._journal.fileno(), operation)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._journal.fileno(), fcntl.LOCK_UN)
+
+    def _catch_up(self) -> None:
+        """
+        Применяет изменения, которые другие процессы сделали с прошлого чтения; вызывается под блокировкой.
+        Испорченная строка журнала, например недописанная запись, к которой приклеилась следующая, пропускается
+        """
+        fd = self._reader.fileno()
+        generation = _parse_generation(os.pread(fd, _HEADER_SIZE, 0))
+        if generation == self._generation and os.fstat(fd).st_size == self._offset:
+            return
+        if generation != self._generation:
+            self._cards = FileCardRepository._load(self)
+            self._generation = generation
+            self._reader.seek(0)
+            self._offset = len(self._reader.readline()) if generation else 0
+            self._journal_records = 0
+        self._reader.seek(self._offset)
+        for line in self._reader:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                card, balance = line.decode().split()
+                if card in self._cards:
+                    self._cards[card]["balance"] = int(balance)
+            except ValueError:
+                pass
+            self._offset += len(line)
+            self._journal_records += 1
+
+    def _save_cards(self, cards: Sequence[CardNumber]) -> None:
+        """
+        Дописывает новые балансы карт cards в журнал; вызывается под исключительной блокировкой
+        после _catch_up. Всё, что в журнале дальше прочитанного, — строка, недописанная упавшим
+        процессом: она обрезается, чтобы новая запись не склеилась с ней
+        """
+        if os.fstat(self._journal.fileno()).st_size > self._offset:
+            os.ftruncate(self._journal.fileno(), self._offset)
+        super()._save_cards(cards)
+        self._offset = self._journal.tell()
+
+    def _load(self) -> Cards:
+        """
+        Отбрасывает недописанную упавшим процессом строку журнала.
+        Сами карты читаются при первой операции
+        """
+        Path(self._journal_filename).touch(exist_ok=True)
+        with open(self._journal_filename, "rb+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        return {}
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(filename={self._filename!r}, "
+            f"journal_filename={self._journal_filename!r}, compact_every={self._compact_every!r}, "
+            f"fsync={self._fsync!r})"
+        )
@@ -0,0 +1,192 @@
+import argparse
+import json
+import sqlite3
+import threading
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+
+from .bank_account import ListableCardRepository
+from .exceptions import CardNotExists, InsufficientFunds
+from .typedefs import PIN, CardNumber, Cards, Operation, OperationResult, Rubles
+
+# Сколько секунд соединение ждёт освобождения блокировки базы другим процессом
+BUSY_TIMEOUT = 5.0
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS cards (
+        card TEXT PRIMARY KEY,
+        pin TEXT NOT NULL,
+        balance INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+_INSERT_CARD = "INSERT OR REPLACE INTO cards (card, pin, balance) VALUES (?, ?, ?)"
+_WITHDRAW = "UPDATE cards SET balance = balance - ? WHERE card = ? AND balance >= ? RETURNING balance"
+_DEPOSIT = "UPDATE cards SET balance = balance + ? WHERE card = ? RETURNING balance"
+_SELECT_BALANCE = "SELECT balance FROM cards WHERE card = ?"
+_SELECT_PIN = "SELECT pin FROM cards WHERE card = ?"
+_SELECT_CARDS = "SELECT card FROM cards"
+
+
+class _ThreadConnection:
+    """Соединение с базой одного потока; хранится в threading.local и исчезает вместе с потоком"""
+
+    __slots__ = ("__weakref__", "connection")
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+
+def _close_connection(
+    connection: sqlite3.Connection, connections: set[sqlite3.Connection], connections_lock: threading.Lock
+) -> None:
+    """Закрывает соединение завершившегося потока и забывает его"""
+    with connections_lock:
+        connections.discard(connection)
+    connection.close()
+
+
+class SqliteCardRepository(ListableCardRepository):
+    """
+    Хранилище карт в базе SQLite в режиме WAL.
+
+    У каждого потока своё соединение с базой, созданное при первом обращении
+    и закрываемое, когда поток завершается, а запросы — неизменные строки,
+    поэтому SQLite переиспользует подготовленные выражения из кэша соединения.
+    """
+
+    def __init__(self, filename: str, busy_timeout: float = BUSY_TIMEOUT):
+        self._filename = filename
+        self._busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: set[sqlite3.Connection] = set()
+        self._connections_lock = threading.Lock()
+        self._card_listeners: list[Callable[[CardNumber], None]] = []
+        self._connection.execute(_CREATE_TABLE)
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card одним условным UPDATE
+        и возвращает новый баланс. Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        rows = self._connection.execute(_WITHDRAW, (amount, card, amount)).fetchall()
+        if not rows:
+            self._check_card_exists(card)
+            raise InsufficientFunds
+        return rows[0][0]
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        rows = self._connection.execute(_DEPOSIT, (amount, card)).fetchall()
+        if not rows:
+            raise CardNotExists
+        return rows[0][0]
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._fetch_card_value(_SELECT_BALANCE, card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return self._fetch_card_value(_SELECT_PIN, card) == pin
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        for (card,) in self._connection.execute(_SELECT_CARDS):
+            yield card
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций в одной транзакции"""
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            results = super().apply_batch(operations)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return results
+
+    def add_cards(self, cards: Cards) -> None:
+        """
+        Добавляет карты cards в хранилище, существующие карты перезаписываются.
+        После сохранения номера карт передаются подписчикам on_card_added
+        """
+        with self._connection as connection:
+            connection.executemany(
+                _INSERT_CARD, ((card, card_data["pin"], card_data["balance"]) for card, card_data in cards.items())
+            )
+        for listener in self._card_listeners:
+            for card in cards:
+                listener(card)
+
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """Подписывает listener на номера карт, которые добавляются методом add_cards"""
+        self._card_listeners.append(listener)
+
+    def close(self) -> None:
+        """Закрывает соединения с базой всех потоков"""
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Возвращает соединение с базой текущего потока, при необходимости создавая его.
+        Когда поток завершается, его threading.local очищается и соединение закрывается
+        """
+        thread_connection = getattr(self._local, "thread_connection", None)
+        if thread_connection is None:
+            connection = sqlite3.connect(
+                self._filename, timeout=self._busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            thread_connection = self._local.thread_connection = _ThreadConnection(connection)
+            with self._connections_lock:
+                self._connections.add(connection)
+            weakref.finalize(
+                thread_connection, _close_connection, connection, self._connections, self._connections_lock
+            )
+        return thread_connection.connection
+
+    def _fetch_card_value(self, query: str, card: CardNumber):
+        """Выполняет запрос query по карте card и возвращает единственное значение"""
+        row = self._connection.execute(query, (card,)).fetchone()
+        if row is None:
+            raise CardNotExists
+        return row[0]
+
+    def _check_card_exists(self, card: CardNumber) -> None:
+        """
+        Проверяет, что карта с переданным номером есть в хранилище,
+        иначе возбуждает исключение
+        """
+        self._fetch_card_value(_SELECT_BALANCE, card)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(filename={self._filename!r})"
+
+
+def convert_json_to_sqlite(json_filename: str, sqlite_filename: str) -> None:
+    """Переносит карты из JSON-файла FileCardRepository в базу SqliteCardRepository"""
+    with open(json_filename) as f:
+        cards = json.load(f)
+    repository = SqliteCardRepository(sqlite_filename)
+    try:
+        repository.add_cards(cards)
+    finally:
+        repository.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert cards.json to the SQLite card store")
+    parser.add_argument("json_filename")
+    parser.add_argument("sqlite_filename")
+    args = parser.parse_args()
+    convert_json_to_sqlite(args.json_filename, args.sqlite_filename)
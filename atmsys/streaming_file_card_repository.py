@@ -0,0 +1,248 @@
+import json
+import mmap
+import threading
+from collections.abc import Iterator, Sequence
+from json.decoder import JSONDecodeError
+from pathlib import Path
+from typing import TextIO
+
+from .exceptions import CardNotExists, CardStoreLoadFailed
+from .file_card_repository import FileCardRepository
+from .typedefs import Card, CardNumber, Cards, Rubles
+
+# Сколько символов файла с картами читается за один раз
+CHUNK_SIZE = 1 << 20
+# Сколько прочитанных карт добавляется в хранилище под одной блокировкой
+LOAD_BATCH_SIZE = 10_000
+# После скольких поисков карты в незагруженном файле хранилище перестаёт искать
+# и дожидается окончания загрузки: каждый поиск просматривает файл целиком
+MAX_FILE_SEARCHES = 100
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_cards(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[CardNumber, Card]]:
+    """
+    Разбирает JSON-объект с картами из файла f по частям в chunk_size символов
+    и выдаёт карты по мере чтения, не загружая файл в память целиком
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+
+    def fill() -> bool:
+        """Дочитывает следующую часть файла; возвращает False в конце файла"""
+        nonlocal buffer, pos
+        chunk = f.read(chunk_size)
+        buffer, pos = buffer[pos:] + chunk, 0
+        return bool(chunk)
+
+    def skip_whitespace() -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    def expect(chars: str) -> str:
+        """Читает один из символов chars, иначе падает исключение JSONDecodeError"""
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] not in chars:
+            raise JSONDecodeError(f"Expecting one of {chars!r}", buffer, pos)
+        pos += 1
+        return buffer[pos - 1]
+
+    def read_value():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            # Число на границе части могло прочитаться не целиком
+            if end == len(buffer) and fill():
+                continue
+            pos = end
+            return value
+
+    skip_whitespace()
+    if not buffer:
+        return
+    expect("{")
+    skip_whitespace()
+    if buffer.startswith("}", pos):
+        return
+    while True:
+        card = read_value()
+        expect(":")
+        yield card, read_value()
+        if expect(",}") == "}":
+            return
+
+
+class StreamingFileCardRepository(FileCardRepository):
+    """
+    Хранилище карт в JSON-файле, готовое к работе сразу после создания:
+    файл разбирается по частям в фоновом потоке, а карту, до которой
+    загрузка ещё не дошла, хранилище находит прямо в файле.
+
+    Поиск карты в файле просматривает его целиком, поэтому он дорог для
+    больших файлов и особенно для неизвестных карт. Сделав max_file_searches
+    таких поисков, хранилище дожидается окончания загрузки.
+
+    Баланс найденной карты можно менять, не дожидаясь загрузки: изменения
+    остаются в памяти и сохраняются в файл, как только загрузка закончится.
+    Если файл не удалось разобрать, изменения, сделанные во время загрузки,
+    не сохраняются, а операции падают с исключением CardStoreLoadFailed
+    """
+
+    def __init__(self, filename: str, chunk_size: int = CHUNK_SIZE, max_file_searches: int = MAX_FILE_SEARCHES):
+        self._chunk_size = chunk_size
+        self._file_searches_left = max_file_searches
+        self._lock = threading.RLock()
+        self._loaded = threading.Event()
+        # Есть изменения, сделанные во время загрузки и ещё не сохранённые
+        self._unsaved = False
+        self._load_error: Exception | None = None
+        self._mmap: mmap.mmap | None = None
+        super().__init__(filename)
+        self._loader = threading.Thread(target=self._load_in_background, daemon=True, name="card-loader")
+        self._loader.start()
+
+    def wait_loaded(self, timeout: float | None = None) -> bool:
+        """
+        Ждёт окончания фоновой загрузки; возвращает False, если за timeout секунд
+        она не закончилась. Если файл не удалось разобрать, падает исключение CardStoreLoadFailed
+        """
+        if not self._loaded.wait(timeout):
+            return False
+        if self._load_error is not None:
+            raise CardStoreLoadFailed(self._filename) from self._load_error
+        return True
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        self._check_not_failed()
+        self._check_card_exists(card)
+        with self._lock:
+            return super().withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        self._check_not_failed()
+        self._check_card_exists(card)
+        with self._lock:
+            return super().deposit(card, amount)
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        self.wait_loaded()
+        return super().card_numbers()
+
+    def close(self) -> None:
+        """Дожидается окончания загрузки и освобождает файл"""
+        self._loader.join()
+
+    def _check_not_failed(self) -> None:
+        """Если загрузка закончилась ошибкой, возбуждает исключение CardStoreLoadFailed"""
+        if self._loaded.is_set():
+            self.wait_loaded()
+
+    def _check_card_exists(self, card: CardNumber) -> None:
+        """
+        Проверяет, что карта с переданным номером есть в хранилище, при
+        необходимости находя её в ещё не загруженной части файла
+        """
+        if card in self._cards:
+            return
+        with self._lock:
+            if card in self._cards:
+                return
+            if self._mmap is not None and self._file_searches_left > 0:
+                self._file_searches_left -= 1
+                if self._find_in_file(card):
+                    return
+                raise CardNotExists
+        self.wait_loaded()
+        if card not in self._cards:
+            raise CardNotExists
+
+    def _find_in_file(self, card: CardNumber) -> bool:
+        """Ищет карту card в отображённом в память файле и добавляет её в хранилище"""
+        if self._mmap is None:
+            return False
+        key = json.dumps(card).encode()
+        start = self._mmap.find(key)
+        while start != -1:
+            colon = start + len(key)
+            while self._mmap[colon : colon + 1].isspace():
+                colon += 1
+            # Совпадение может оказаться значением, а не ключом: ключ всегда стоит перед двоеточием
+            if self._mmap[colon : colon + 1] == b":":
+                # Данные карты — плоский объект без вложенных скобок
+                end = self._mmap.find(b"}", colon)
+                self._cards[card] = json.loads(self._mmap[colon + 1 : end + 1])
+                return True
+            start = self._mmap.find(key, start + 1)
+        return False
+
+    def _save_cards(self, cards: Sequence[CardNumber]) -> None:
+        """Сохраняет изменения по картам cards; во время загрузки откладывает сохранение до её окончания"""
+        with self._lock:
+            if not self._loaded.is_set():
+                self._unsaved = True
+                return
+            self._check_not_failed()
+            super()._save_cards(cards)
+
+    def _load(self) -> Cards:
+        Path(self._filename).touch(exist_ok=True)
+        with open(self._filename, "rb") as f:
+            if Path(self._filename).stat().st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return {}
+
+    def _load_in_background(self) -> None:
+        """
+        Загружает карты из файла порциями, не перезаписывая уже найденные в файле карты,
+        и сохраняет изменения, сделанные во время загрузки
+        """
+        try:
+            batch: list[tuple[CardNumber, Card]] = []
+            with open(self._filename) as f:
+                for card in iter_cards(f, self._chunk_size):
+                    batch.append(card)
+                    if len(batch) >= LOAD_BATCH_SIZE:
+                        self._add_loaded(batch)
+                        batch = []
+            self._add_loaded(batch)
+        except (OSError, ValueError) as e:
+            self._load_error = e
+        finally:
+            with self._lock:
+                if self._mmap is not None:
+                    self._mmap.close()
+                    self._mmap = None
+                if self._unsaved and self._load_error is None:
+                    try:
+                        self._save()
+                    except OSError as e:
+                        self._load_error = e
+                self._unsaved = False
+                self._loaded.set()
+
+    def _add_loaded(self, batch: list[tuple[CardNumber, Card]]) -> None:
+        with self._lock:
+            for card, card_data in batch:
+                self._cards.setdefault(card, card_data)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(filename={self._filename!r}, chunk_size={self._chunk_size!r})"
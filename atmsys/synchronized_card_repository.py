@@ -0,0 +1,78 @@
+import threading
+from collections.abc import Callable, Iterable, Iterator
+
+from .bank_account import CardRepository, ListableCardRepository
+from .typedefs import PIN, CardNumber, Operation, OperationResult, Rubles
+
+
+class SynchronizedCardRepository(CardRepository):
+    """
+    Потокобезопасная обёртка над хранилищем карт: все вызовы обёрнутого
+    хранилища выполняются под одной общей блокировкой
+    """
+
+    def __init__(self, card_repository: CardRepository):
+        self._card_repository = card_repository
+        self._lock = threading.Lock()
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Снимает amount рублей с баланса карты с номером card и возвращает новый баланс"""
+        with self._lock:
+            return self._card_repository.withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        with self._lock:
+            return self._card_repository.deposit(card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        with self._lock:
+            return self._card_repository.get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        with self._lock:
+            return self._card_repository.is_card_pin_valid(card, pin)
+
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """Подписывает listener на номера карт, которые добавляются в обёрнутое хранилище"""
+        self._card_repository.on_card_added(listener)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций в обёрнутом хранилище под блокировкой"""
+        with self._lock:
+            return self._card_repository.apply_batch(operations)
+
+    def close(self) -> None:
+        """Закрывает обёрнутое хранилище"""
+        with self._lock:
+            self._card_repository.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(card_repository={self._card_repository!r})"
+
+
+class SynchronizedListableCardRepository(SynchronizedCardRepository, ListableCardRepository):
+    """Потокобезопасная обёртка над хранилищем, которое умеет перечислять свои карты"""
+
+    _card_repository: ListableCardRepository
+
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        with self._lock:
+            card_numbers = list(self._card_repository.card_numbers())
+        return iter(card_numbers)
+
+
+def synchronized(card_repository: CardRepository) -> SynchronizedCardRepository:
+    """
+    Оборачивает хранилище card_repository в потокобезопасную обёртку; обёртка
+    перечисляет карты, только если это умеет само хранилище
+    """
+    if isinstance(card_repository, ListableCardRepository):
+        return SynchronizedListableCardRepository(card_repository)
+    return SynchronizedCardRepository(card_repository)
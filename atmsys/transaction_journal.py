@@ -0,0 +1,303 @@
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TextIO
+
+from .bank_account import CardRepository
+from .card_repository import LOCK_STRIPES
+from .typedefs import PIN, CardNumber, Operation, OperationKind, OperationResult, Rubles
+
+# Сколько последних операций каждой карты хранится в памяти для мини-выписки
+RECENT_SIZE = 10
+# Колонки выгрузки истории операций
+EXPORT_FIELDS = ("timestamp", "card", "operation", "amount", "balance")
+
+# Коды операций в массивах последних операций
+_KIND_CODES = {OperationKind.WITHDRAW: 0, OperationKind.DEPOSIT: 1}
+_KINDS = tuple(_KIND_CODES)
+
+
+@dataclass(frozen=True, slots=True)
+class Transaction:
+    """Выполненная операция по карте: время, вид, сумма и баланс после операции"""
+
+    timestamp: float
+    card: CardNumber
+    kind: OperationKind
+    amount: Rubles
+    balance: Rubles
+
+    def to_line(self) -> str:
+        return f"{self.timestamp:.6f} {self.card} {self.kind} {self.amount} {self.balance}\n"
+
+    @classmethod
+    def from_line(cls, line: str) -> "Transaction":
+        timestamp, card, kind, amount, balance = line.split()
+        return cls(float(timestamp), card, OperationKind(kind), int(amount), int(balance))
+
+
+class _RecentTransactions:
+    """
+    Кольцевой буфер последних операций одной карты. Поля операций лежат
+    в отдельных массивах array, поэтому буфер занимает несколько сотен байт
+    вместо отдельного объекта на каждую операцию
+    """
+
+    __slots__ = ("_amounts", "_balances", "_count", "_kinds", "_next", "_timestamps")
+
+    def __init__(self, size: int):
+        self._timestamps = array("d", bytes(8 * size))
+        self._kinds = array("b", bytes(size))
+        self._amounts = array("q", bytes(8 * size))
+        self._balances = array("q", bytes(8 * size))
+        self._next = 0
+        self._count = 0
+
+    def append(self, transaction: Transaction) -> None:
+        position = self._next
+        self._timestamps[position] = transaction.timestamp
+        self._kinds[position] = _KIND_CODES[transaction.kind]
+        self._amounts[position] = transaction.amount
+        self._balances[position] = transaction.balance
+        self._next = (position + 1) % len(self._kinds)
+        self._count = min(self._count + 1, len(self._kinds))
+
+    def latest(self, card: CardNumber, limit: int) -> list[Transaction]:
+        """Возвращает до limit последних операций, начиная с самой новой"""
+        size = len(self._kinds)
+        transactions = []
+        for offset in range(1, min(limit, self._count) + 1):
+            position = (self._next - offset) % size
+            transactions.append(
+                Transaction(
+                    self._timestamps[position],
+                    card,
+                    _KINDS[self._kinds[position]],
+                    self._amounts[position],
+                    self._balances[position],
+                )
+            )
+        return transactions
+
+
+class TransactionJournal:
+    """
+    Журнал операций по картам. Каждая операция дописывается в конец файла
+    filename одной строкой «<время> <номер карты> <операция> <сумма> <баланс>»,
+    а последние recent_size операций каждой карты дополнительно хранятся
+    в памяти, поэтому мини-выписка не читает файл. Полная история карты
+    читается из файла построчно и в память целиком не загружается.
+    Без filename журнал хранит только последние операции в памяти
+    """
+
+    def __init__(self, filename: str | None = None, recent_size: int = RECENT_SIZE):
+        self._filename = filename
+        self._recent_size = recent_size
+        self._recent: dict[CardNumber, _RecentTransactions] = {}
+        self._lock = threading.Lock()
+        self._file: TextIO | None = None
+        if filename is not None:
+            self._load(filename)
+            self._file = open(filename, "a")  # noqa: SIM115
+
+    def record(self, card: CardNumber, kind: OperationKind, amount: Rubles, balance: Rubles) -> Transaction:
+        """Записывает выполненную операцию по карте card в журнал"""
+        transaction = Transaction(time.time(), card, kind, amount, balance)
+        self.record_all([transaction])
+        return transaction
+
+    def record_all(self, transactions: Iterable[Transaction]) -> None:
+        """
+        Записывает выполненные операции в журнал одной записью в файл. Последние
+        операции в памяти обновляются только после записи, поэтому мини-выписка
+        не покажет операцию, которой нет в файле
+        """
+        transactions = list(transactions)
+        with self._lock:
+            if self._file is not None and transactions:
+                self._file.write("".join(transaction.to_line() for transaction in transactions))
+                self._file.flush()
+            for transaction in transactions:
+                self._remember(transaction)
+
+    def latest(self, card: CardNumber, limit: int = RECENT_SIZE) -> list[Transaction]:
+        """Возвращает до limit последних операций по карте card, начиная с самой новой"""
+        with self._lock:
+            recent = self._recent.get(card)
+            return [] if recent is None else recent.latest(card, min(limit, self._recent_size))
+
+    def history(self, card: CardNumber) -> Iterator[Transaction]:
+        """
+        Перебирает все операции по карте card от старых к новым.
+        Операции, записанные после начала перебора, в него не попадают
+        """
+        if self._filename is None:
+            return iter(reversed(self.latest(card, self._recent_size)))
+        with self._lock:
+            size = os.path.getsize(self._filename)
+        return read_history(self._filename, card, size)
+
+    def close(self) -> None:
+        """Закрывает файл журнала"""
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.close()
+
+    def _remember(self, transaction: Transaction) -> None:
+        recent = self._recent.get(transaction.card)
+        if recent is None:
+            recent = self._recent[transaction.card] = _RecentTransactions(self._recent_size)
+        recent.append(transaction)
+
+    def _load(self, filename: str) -> None:
+        """Восстанавливает последние операции карт по файлу журнала"""
+        Path(filename).touch(exist_ok=True)
+        with open(filename, "rb+") as f:
+            valid_size = 0
+            for line in f:
+                # Недописанная при падении последняя строка отбрасывается
+                if not line.endswith(b"\n"):
+                    break
+                self._remember(Transaction.from_line(line.decode()))
+                valid_size += len(line)
+            f.truncate(valid_size)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(filename={self._filename!r}, recent_size={self._recent_size!r})"
+
+
+def read_history(filename: str, card: CardNumber, size: int | None = None) -> Iterator[Transaction]:
+    """
+    Перебирает операции по карте card из файла журнала filename, читая его
+    построчно, поэтому память не зависит от длины истории. Если указан size,
+    читаются только первые size байт файла
+    """
+    card_bytes = card.encode()
+    with open(filename, "rb") as f:
+        for line in f:
+            if size is not None:
+                size -= len(line)
+                if size < 0:
+                    return
+            if not line.endswith(b"\n"):
+                return
+            if line.split(b" ", 2)[1] == card_bytes:
+                yield Transaction.from_line(line.decode())
+
+
+def export_history(transactions: Iterable[Transaction], output: TextIO) -> int:
+    """Пишет операции transactions в CSV output и возвращает их число"""
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for transaction in transactions:
+        writer.writerow(
+            (transaction.timestamp, transaction.card, transaction.kind, transaction.amount, transaction.balance)
+        )
+        count += 1
+    return count
+
+
+class JournalingCardRepository(CardRepository):
+    """
+    Обёртка над хранилищем карт, которая записывает каждое выполненное снятие
+    и пополнение в журнал операций. Операция и её запись в журнал выполняются
+    под блокировкой карты, поэтому операции по одной карте попадают в журнал
+    в том порядке, в котором их применило хранилище, и балансы в журнале
+    идут цепочкой. Карты распределены по lock_stripes блокировкам, как
+    в InMemoryCardRepository
+    """
+
+    def __init__(self, card_repository: CardRepository, journal: TransactionJournal, lock_stripes: int = LOCK_STRIPES):
+        self._card_repository = card_repository
+        self._journal = journal
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        with self._lock_for(card):
+            balance = self._card_repository.withdraw(card, amount)
+            self._journal.record(card, OperationKind.WITHDRAW, amount, balance)
+        return balance
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        with self._lock_for(card):
+            balance = self._card_repository.deposit(card, amount)
+            self._journal.record(card, OperationKind.DEPOSIT, amount, balance)
+        return balance
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._card_repository.get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return self._card_repository.is_card_pin_valid(card, pin)
+
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """Подписывает listener на номера карт, которые добавляются в обёрнутое хранилище"""
+        self._card_repository.on_card_added(listener)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """
+        Применяет пакет операций и записывает выполненные операции в журнал одной записью.
+        На время пакета берутся блокировки всех его карт, по возрастанию номера блокировки
+        """
+        operations = list(operations)
+        with ExitStack() as stack:
+            for index in sorted({self._lock_index(operation.card) for operation in operations}):
+                stack.enter_context(self._locks[index])
+            results = self._card_repository.apply_batch(operations)
+            timestamp = time.time()
+            self._journal.record_all(
+                Transaction(
+                    timestamp, result.operation.card, result.operation.kind, result.operation.amount, result.balance
+                )
+                for result in results
+                if result.ok
+            )
+        return results
+
+    def _lock_index(self, card: CardNumber) -> int:
+        return hash(card) % len(self._locks)
+
+    def _lock_for(self, card: CardNumber) -> threading.Lock:
+        """Возвращает блокировку, которой защищена карта card"""
+        return self._locks[self._lock_index(card)]
+
+    def close(self) -> None:
+        """Закрывает обёрнутое хранилище и журнал операций"""
+        self._card_repository.close()
+        self._journal.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(card_repository={self._card_repository!r}, journal={self._journal!r})"
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description="Export the full transaction history of a card as CSV")
+    parser.add_argument("journal", help="transaction journal file")
+    parser.add_argument("card", help="card number")
+    args = parser.parse_args(argv)
+
+    count = export_history(read_history(args.journal, args.card), sys.stdout)
+    print(f"Transactions: {count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+from enum import StrEnum
 from typing import TypedDict
 
 type Rubles = int
@@ -11,3 +13,30 @@ class Card(TypedDict):
 
 type CardNumber = str
 type Cards = dict[CardNumber, Card]
+
+
+class OperationKind(StrEnum):
+    WITHDRAW = "withdraw"
+    DEPOSIT = "deposit"
+
+
+@dataclass(frozen=True, slots=True)
+class Operation:
+    """Операция пакета: снятие или пополнение amount рублей по карте card"""
+
+    kind: OperationKind
+    card: CardNumber
+    amount: Rubles
+
+
+@dataclass(frozen=True, slots=True)
+class OperationResult:
+    """Результат операции пакета: новый баланс или имя исключения, с которым операция не выполнилась"""
+
+    operation: Operation
+    balance: Rubles | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
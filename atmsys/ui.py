@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+
 from .menu import UI
 
 
@@ -47,3 +49,34 @@ class RedConsoleUI(UI):
     def show_separator(self) -> None:
         """Показывает визуальный разделитель"""
         print(f"\n\033[31m{'=' * 25}\033[0m\n")
+
+
+class ScriptedUI(UI):
+    """
+    Неинтерактивный интерфейс банкомата: ввод берётся из заранее заданного
+    сценария, а показанные пользователю сообщения запоминаются
+    """
+
+    def __init__(self, inputs: Iterable[str] = ()):
+        self.messages: list[str] = []
+        self._inputs = iter(inputs)
+
+    def reset(self, inputs: Iterable[str]) -> None:
+        """Начинает новый сценарий ввода inputs и забывает показанные сообщения"""
+        self.messages = []
+        self._inputs = iter(inputs)
+
+    def show_message(self, message: str) -> None:
+        """Запоминает сообщение message"""
+        self.messages.append(message)
+
+    def get_input(self, prompt: str) -> str:
+        """Возвращает следующий ввод из сценария, если сценарий закончился, возбуждает EOFError"""
+        try:
+            return next(self._inputs)
+        except StopIteration:
+            raise EOFError
+
+    def show_separator(self) -> None:
+        """Разделитель в сценарном интерфейсе не нужен"""
+        return
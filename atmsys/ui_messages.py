@@ -6,12 +6,21 @@ class RuUiMessage(StrEnum):
     CARD_BLOCKED = "Карта заблокирована. Обратитесь в банк."
     INCORRECT_MENU_ITEM = "Ошибка ввода. Введите число от {min_choice} до {max_choice}."
     INSUFFICIENT_FUNDS = "Недостаточно средств для снятия со счёта"
+    CANNOT_DISPENSE = "Банкомат не может выдать эту сумму имеющимися купюрами. Введите другую сумму."
+    CANNOT_ACCEPT = "Банкомат принимает только купюры номиналов {denominations} руб. Введите другую сумму."
+    WITHDRAWAL_LIMIT_EXCEEDED = "Превышен суточный лимит снятия. Сейчас можно снять не больше {available} руб."
     CARD_NOT_EXISTS = "Извините, карта не найдена"
     ATM_EXCEPTION = "Извините, что-то пошло не так"
     PIN_ACCEPTED = "PIN принят. Добро пожаловать!"
     INCORRECT_PIN = "Неверный PIN. Осталось попыток: {attempts_remaining}"
     BALANCE = "Ваш баланс: {balance} руб."
+    NOTES_DISPENSED = "Заберите деньги: {notes}"
+    NOTES_ITEM = "{denomination} руб. × {count}"
     GOODBYE = "Спасибо, что пользуетесь нашим банкоматом!"
+    SESSION_TIMEOUT = "Сеанс завершён из-за отсутствия активности."
+    MINI_STATEMENT = "Последние операции:"
+    MINI_STATEMENT_LINE = "{time}  {amount:+} руб.  баланс {balance} руб."
+    MINI_STATEMENT_EMPTY = "Операций по карте ещё не было."
 
     AMOUNT_MUST_BE_POSITIVE = "Сумма должна быть больше нуля."
     AMOUNT_MUST_BE_DIGIT = "Ошибка ввода! Нужно ввести число."
@@ -26,6 +35,7 @@ class RuUiMessage(StrEnum):
     MENU_GET_BALANCE_ITEM = "Проверить баланс"
     MENU_WITHDRAW_ITEM = "Снять деньги"
     MENU_DEPOSIT_ITEM = "Пополнить счёт"
+    MENU_MINI_STATEMENT_ITEM = "Мини-выписка"
     MENU_EXIT_ITEM = "Выход"
 
 
@@ -34,12 +44,21 @@ class EnUiMessage(StrEnum):
     CARD_BLOCKED = "Your card has been blocked. Please contact your bank."
     INCORRECT_MENU_ITEM = "Input error. Enter a number between {min_choice} and {max_choice}."
     INSUFFICIENT_FUNDS = "Insufficient funds to withdraw from account"
+    CANNOT_DISPENSE = "The ATM cannot dispense this amount with the notes it has. Please enter another amount."
+    CANNOT_ACCEPT = "The ATM only accepts notes of {denominations} rubles. Please enter another amount."
+    WITHDRAWAL_LIMIT_EXCEEDED = "Daily withdrawal limit exceeded. You can withdraw at most {available} rubles now."
     CARD_NOT_EXISTS = "Sorry, card not found"
     ATM_EXCEPTION = "Sorry, something went wrong"
     PIN_ACCEPTED = "PIN accepted. Welcome!"
     INCORRECT_PIN = "Incorrect PIN. Attempts remaining: {attempts_remaining}"
     BALANCE = "Your balance: {balance} rubles."
+    NOTES_DISPENSED = "Please take your cash: {notes}"
+    NOTES_ITEM = "{denomination} rubles × {count}"
     GOODBYE = "Thank you for using our ATM!"
+    SESSION_TIMEOUT = "The session has ended due to inactivity."
+    MINI_STATEMENT = "Recent operations:"
+    MINI_STATEMENT_LINE = "{time}  {amount:+} rubles  balance {balance} rubles"
+    MINI_STATEMENT_EMPTY = "There are no operations on this card yet."
 
     AMOUNT_MUST_BE_POSITIVE = "The amount must be greater than zero."
     AMOUNT_MUST_BE_DIGIT = "Input error! You must enter a number."
@@ -54,6 +73,7 @@ class EnUiMessage(StrEnum):
     MENU_GET_BALANCE_ITEM = "Check your balance"
     MENU_WITHDRAW_ITEM = "Withdraw money"
     MENU_DEPOSIT_ITEM = "Top up your account"
+    MENU_MINI_STATEMENT_ITEM = "Mini statement"
     MENU_EXIT_ITEM = "Exit"
 
 
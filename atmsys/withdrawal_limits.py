@@ -0,0 +1,212 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from .bank_account import CardRepository
+from .exceptions import WithdrawalLimitExceeded
+from .typedefs import PIN, CardNumber, Operation, OperationResult, Rubles
+
+# Длина скользящего окна лимита, секунд
+WINDOW = 24 * 60 * 60
+# На сколько корзин делится окно: сумма в корзине уходит из окна целиком, когда корзина устаревает
+BUCKETS = 24
+
+
+class _SlidingWindow:
+    """
+    Суммы снятий за окно, разбитые по корзинам времени. Хранятся только
+    непустые корзины парами «номер корзины, сумма» в одном массиве array,
+    а сумма за всё окно поддерживается при каждом изменении, поэтому
+    проверка лимита не перебирает историю снятий
+    """
+
+    __slots__ = ("_buckets", "total")
+
+    def __init__(self):
+        self._buckets = array("q")
+        self.total: Rubles = 0
+
+    @property
+    def newest_bucket(self) -> int:
+        return self._buckets[-2] if self._buckets else -1
+
+    def expire(self, oldest_bucket: int) -> None:
+        """Убирает из окна корзины старше oldest_bucket"""
+        expired = 0
+        while expired < len(self._buckets) and self._buckets[expired] < oldest_bucket:
+            self.total -= self._buckets[expired + 1]
+            expired += 2
+        if expired:
+            del self._buckets[:expired]
+
+    def add(self, bucket: int, amount: Rubles) -> None:
+        """Добавляет amount к корзине bucket; корзина не старше последней корзины окна"""
+        if self.newest_bucket == bucket:
+            self._buckets[-1] += amount
+        else:
+            self._buckets.extend((bucket, amount))
+        self.total += amount
+
+    def remove(self, bucket: int, amount: Rubles) -> None:
+        """Вычитает amount из корзины bucket, если она ещё в окне"""
+        for position in range(len(self._buckets) - 2, -1, -2):
+            if self._buckets[position] == bucket:
+                self._buckets[position + 1] -= amount
+                self.total -= amount
+                return
+
+
+class WithdrawalLimits:
+    """
+    Лимиты снятия за скользящее окно window секунд: card_limit рублей
+    по каждой карте и terminal_limit рублей по всему терминалу. None —
+    лимита нет. Окно делится на buckets корзин, поэтому снятие уходит из
+    окна с точностью до длины корзины. Карты, по которым за окно ничего
+    не снималось, удаляются, и память пропорциональна числу карт
+    с недавними снятиями, а не всем картам хранилища
+    """
+
+    def __init__(
+        self,
+        card_limit: Rubles | None = None,
+        terminal_limit: Rubles | None = None,
+        window: float = WINDOW,
+        buckets: int = BUCKETS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._card_limit = card_limit
+        self._terminal_limit = terminal_limit
+        self._bucket_seconds = window / buckets
+        self._buckets = buckets
+        self._clock = clock
+        # Окна карт в порядке последнего снятия: в начале — карты, окна которых устарели первыми
+        self._cards: OrderedDict[CardNumber, _SlidingWindow] = OrderedDict()
+        self._terminal = _SlidingWindow()
+        self._lock = threading.Lock()
+
+    def reserve(self, card: CardNumber, amount: Rubles) -> int:
+        """
+        Учитывает снятие amount рублей с карты card и возвращает корзину,
+        в которую оно попало. Если снятие превысит лимит карты или терминала,
+        ничего не учитывается и падает исключение WithdrawalLimitExceeded
+        """
+        with self._lock:
+            bucket = self._current_bucket()
+            window = self._window(card, bucket)
+            available = self._available(window)
+            if amount > available:
+                raise WithdrawalLimitExceeded(max(int(available), 0))
+            if window is None:
+                window = self._cards[card] = _SlidingWindow()
+            else:
+                self._cards.move_to_end(card)
+            window.add(bucket, amount)
+            self._terminal.add(bucket, amount)
+            return bucket
+
+    def release(self, card: CardNumber, amount: Rubles, bucket: int) -> None:
+        """Отменяет учтённое в корзине bucket снятие, которое не состоялось"""
+        with self._lock:
+            window = self._cards.get(card)
+            if window is not None:
+                window.remove(bucket, amount)
+            self._terminal.remove(bucket, amount)
+
+    def available(self, card: CardNumber) -> Rubles | None:
+        """Сколько ещё можно снять с карты card, не превысив лимиты; None — лимитов нет"""
+        if self._card_limit is None and self._terminal_limit is None:
+            return None
+        with self._lock:
+            return max(int(self._available(self._window(card, self._current_bucket()))), 0)
+
+    def _available(self, window: _SlidingWindow | None) -> float:
+        available = float("inf")
+        if self._card_limit is not None:
+            available = self._card_limit - (window.total if window is not None else 0)
+        if self._terminal_limit is not None:
+            available = min(available, self._terminal_limit - self._terminal.total)
+        return available
+
+    def _current_bucket(self) -> int:
+        """Возвращает текущую корзину, убрав из окон устаревшие корзины и карты без снятий за окно"""
+        bucket = int(self._clock() // self._bucket_seconds)
+        oldest_bucket = bucket - self._buckets + 1
+        self._terminal.expire(oldest_bucket)
+        while self._cards:
+            card, window = next(iter(self._cards.items()))
+            if window.newest_bucket >= oldest_bucket:
+                break
+            del self._cards[card]
+        return bucket
+
+    def _window(self, card: CardNumber, bucket: int) -> _SlidingWindow | None:
+        """Возвращает окно карты card без корзин, устаревших к корзине bucket"""
+        window = self._cards.get(card)
+        if window is not None:
+            window.expire(bucket - self._buckets + 1)
+        return window
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(card_limit={self._card_limit!r}, terminal_limit={self._terminal_limit!r}, "
+            f"buckets={self._buckets!r})"
+        )
+
+
+class LimitedCardRepository(CardRepository):
+    """
+    Обёртка над хранилищем карт, которая не даёт снять больше лимитов limits.
+    Лимит резервируется до снятия, поэтому параллельные сеансы не превысят
+    его вместе, а если снятие не состоялось, резерв снимается.
+    Пакетные операции — это расчёты банка, а не снятия в терминале,
+    и лимиты на них не действуют
+    """
+
+    def __init__(self, card_repository: CardRepository, limits: WithdrawalLimits):
+        self._card_repository = card_repository
+        self._limits = limits
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds,
+        если снятие превышает лимит — WithdrawalLimitExceeded
+        """
+        bucket = self._limits.reserve(card, amount)
+        try:
+            return self._card_repository.withdraw(card, amount)
+        except BaseException:
+            self._limits.release(card, amount, bucket)
+            raise
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        return self._card_repository.deposit(card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        """Возвращает баланс карты по её номеру"""
+        return self._card_repository.get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        """
+        Возвращает True, если пин код соответствует карте.
+        Если карты нет в хранилище, падает исключение CardNotExists
+        """
+        return self._card_repository.is_card_pin_valid(card, pin)
+
+    def on_card_added(self, listener: Callable[[CardNumber], None]) -> None:
+        """Подписывает listener на номера карт, которые добавляются в обёрнутое хранилище"""
+        self._card_repository.on_card_added(listener)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций в обёрнутом хранилище без проверки лимитов"""
+        return self._card_repository.apply_batch(operations)
+
+    def close(self) -> None:
+        """Закрывает обёрнутое хранилище"""
+        self._card_repository.close()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(card_repository={self._card_repository!r}, limits={self._limits!r})"
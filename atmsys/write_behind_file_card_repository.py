@@ -0,0 +1,183 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Sequence
+
+from .file_card_repository import FileCardRepository
+from .metrics import MetricsRegistry
+from .typedefs import CardNumber, Operation, OperationResult, Rubles
+
+# Сколько секунд изменение баланса может оставаться только в памяти
+MAX_DATA_LOSS = 1.0
+# При скольких несохранённых картах файл записывается, не дожидаясь таймера
+MAX_DIRTY_CARDS = 1_000
+
+
+class WriteBehindFileCardRepository(FileCardRepository):
+    """
+    Хранилище карт в JSON-файле с отложенной записью. Изменение баланса
+    сразу применяется в памяти, а карта помечается несохранённой. Фоновый
+    поток перезаписывает файл не позже чем через max_data_loss секунд после
+    первого несохранённого изменения или сразу, как только несохранённых
+    карт набирается max_dirty. При сбое процесса теряются изменения
+    не более чем за max_data_loss секунд; при закрытии хранилища и при
+    выходе из интерпретатора, в том числе по SystemExit, всё несохранённое
+    записывается на диск.
+
+    Если фоновая запись не удалась, следующее изменение баланса сначала
+    повторяет запись и, пока диск недоступен, падает с исключением OSError,
+    не тронув баланс
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_data_loss: float = MAX_DATA_LOSS,
+        max_dirty: int = MAX_DIRTY_CARDS,
+        metrics: MetricsRegistry | None = None,
+    ):
+        super().__init__(filename)
+        self._max_data_loss = max_data_loss
+        self._max_dirty = max_dirty
+        # Защищает карты в памяти и множество несохранённых карт: снимок для записи не видит полупримененных изменений
+        self._lock = threading.RLock()
+        # Не даёт более старому снимку перезаписать более новый, если файл пишут два потока сразу
+        self._flush_lock = threading.Lock()
+        self._dirty: set[CardNumber] = set()
+        # Момент первого изменения, которое ещё не записано на диск
+        self._dirty_since: float | None = None
+        # Ошибка последней фоновой записи; сбрасывается успешной записью
+        self._flush_error: OSError | None = None
+        self._wake_up = threading.Event()
+        self._stopping = threading.Event()
+        self._metrics = metrics
+        if metrics is not None:
+            self._flush_lag = metrics.histogram(
+                "atmsys_write_behind_flush_lag_seconds", "Age of the oldest unsaved balance change at flush time"
+            )
+            self._flushed_cards = metrics.counter(
+                "atmsys_write_behind_flushed_cards_total", "Cards written by write-behind flushes"
+            )
+            self._write = metrics.timed("atmsys_write_behind_flush", "Write-behind flush duration")(self._write)
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True, name="write-behind")
+        self._flusher.start()
+        atexit.register(self.close)
+
+    @property
+    def dirty_cards(self) -> int:
+        """Число карт с несохранёнными изменениями"""
+        return len(self._dirty)
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
+        self._retry_failed_flush()
+        with self._lock:
+            return super().withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
+        self._retry_failed_flush()
+        with self._lock:
+            return super().deposit(card, amount)
+
+    def apply_batch(self, operations: Iterable[Operation]) -> list[OperationResult]:
+        """Применяет пакет операций целиком, ни одна запись не видит его наполовину"""
+        self._retry_failed_flush()
+        with self._lock:
+            return super().apply_batch(operations)
+
+    def flush(self) -> None:
+        """
+        Записывает все несохранённые изменения на диск. Если запись не удалась,
+        карты остаются несохранёнными, а исключение OSError пробрасывается дальше
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                dirty, dirty_since = self._dirty, self._dirty_since
+                self._dirty = set()
+                self._dirty_since = None
+                snapshot = json.dumps(self._cards)
+            try:
+                self._write(snapshot)
+            except OSError as e:
+                with self._lock:
+                    self._flush_error = e
+                    self._dirty.update(dirty)
+                    if self._dirty_since is None or (dirty_since is not None and dirty_since < self._dirty_since):
+                        self._dirty_since = dirty_since
+                raise
+            self._flush_error = None
+        if self._metrics is not None and dirty_since is not None:
+            self._flush_lag.observe(time.monotonic() - dirty_since)
+            self._flushed_cards.inc(len(dirty))
+
+    def close(self) -> None:
+        """Останавливает фоновую запись и сохраняет оставшиеся изменения"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._wake_up.set()
+        self._flusher.join()
+        atexit.unregister(self.close)
+        self.flush()
+
+    def _retry_failed_flush(self) -> None:
+        """Если фоновая запись не удалась, повторяет её; пока диск недоступен, падает исключение OSError"""
+        if self._flush_error is not None:
+            self.flush()
+
+    def _save_cards(self, cards: Sequence[CardNumber]) -> None:
+        """Помечает карты cards несохранёнными"""
+        with self._lock:
+            self._dirty.update(cards)
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            if len(self._dirty) >= self._max_dirty:
+                self._wake_up.set()
+
+    def _flush_periodically(self) -> None:
+        """
+        Записывает изменения, когда истекает окно потери данных или набирается
+        много несохранённых карт. Ошибка записи не останавливает поток: она
+        считается в метрике atmsys_write_behind_flush_errors_total, запоминается
+        для следующего изменения баланса, и запись повторяется через max_data_loss секунд
+        """
+        while not self._stopping.is_set():
+            dirty_since = self._dirty_since
+            timeout = (
+                self._max_data_loss if dirty_since is None else dirty_since + self._max_data_loss - time.monotonic()
+            )
+            self._wake_up.wait(max(timeout, 0))
+            self._wake_up.clear()
+            if self._stopping.is_set():
+                return
+            dirty_since = self._dirty_since
+            if dirty_since is not None and (
+                len(self._dirty) >= self._max_dirty or time.monotonic() - dirty_since >= self._max_data_loss
+            ):
+                try:
+                    self.flush()
+                except OSError:
+                    self._stopping.wait(self._max_data_loss)
+
+    def _write(self, snapshot: str) -> None:
+        """Атомарно заменяет файл с картами снимком snapshot, сбросив его на диск через fsync"""
+        tmp_filename = f"{self._filename}.tmp"
+        with open(tmp_filename, "w") as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self._filename)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(filename={self._filename!r}, max_data_loss={self._max_data_loss!r}, "
+            f"max_dirty={self._max_dirty!r})"
+        )
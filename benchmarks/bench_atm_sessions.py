@@ -0,0 +1,61 @@
+import random
+from collections.abc import Callable, Iterator
+from contextlib import suppress
+
+from atmsys.atm import ATM
+from atmsys.bank_account import CardRepository
+from atmsys.card_repository import InMemoryCardRepository
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.ui import ScriptedUI
+from benchmarks.harness import BenchmarkResult, make_cards, make_parser, measure, report
+
+SUITE = "atm_sessions"
+
+# Сценарии сеансов: название → ввод пользователя после номера карты
+SESSION_SCRIPTS: dict[str, tuple[str, ...]] = {
+    "balance": ("1234", "1", "4"),
+    "withdraw": ("1234", "2", "100", "1", "4"),
+    "deposit": ("1234", "3", "100", "4"),
+    "wrong_pin": ("0000", "1234", "1", "4"),
+}
+
+
+def run_session(card_repository: CardRepository, inputs: tuple[str, ...]) -> None:
+    """Проводит один сеанс ATM.run() с заранее заданным вводом пользователя"""
+    ui = ScriptedUI(inputs)
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(), ui=ui))
+    with suppress(SystemExit, EOFError):
+        atm.run()
+
+
+def make_sessions(
+    card_repository: CardRepository, card_numbers: list[str], script: tuple[str, ...], ops: int, seed: int = 42
+) -> Iterator[Callable]:
+    rnd = random.Random(seed)
+    for _ in range(ops):
+        inputs = (rnd.choice(card_numbers), *script)
+        yield lambda inputs=inputs: run_session(card_repository, inputs)
+
+
+def run(sizes: list[int], ops: int, time_budget: float) -> list[BenchmarkResult]:
+    results = []
+    for size in sizes:
+        cards = make_cards(size)
+        card_numbers = list(cards)
+        card_repository = InMemoryCardRepository(cards)
+        for name, script in SESSION_SCRIPTS.items():
+            results.append(
+                measure(
+                    "atm_session",
+                    make_sessions(card_repository, card_numbers, script, ops),
+                    params={"script": name, "cards": size},
+                    time_budget=time_budget,
+                )
+            )
+    return results
+
+
+if __name__ == "__main__":
+    args = make_parser("Benchmark complete ATM.run() sessions driven by ScriptedUI").parse_args()
+    report(SUITE, run(args.sizes, args.ops, args.time_budget), args)
@@ -0,0 +1,157 @@
+import json
+import random
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from atmsys.bank_account import CardRepository
+from atmsys.card_repository import InMemoryCardRepository
+from atmsys.card_store_server import CardStoreServer
+from atmsys.compact_card_repository import CompactCardRepository
+from atmsys.file_card_repository import FileCardRepository
+from atmsys.journaled_file_card_repository import JournaledFileCardRepository
+from atmsys.mmap_card_repository import MmapCardRepository, write_cards
+from atmsys.remote_card_repository import RemoteCardRepository
+from atmsys.sharded_card_repository import ShardedCardRepository, write_shards
+from atmsys.shared_file_card_repository import SharedFileCardRepository
+from atmsys.sqlite_card_repository import SqliteCardRepository
+from atmsys.streaming_file_card_repository import StreamingFileCardRepository
+from atmsys.typedefs import Cards
+from atmsys.write_behind_file_card_repository import WriteBehindFileCardRepository
+from benchmarks.harness import BenchmarkResult, make_cards, make_parser, measure, report
+
+SUITE = "card_repositories"
+
+# Доли операций в нагрузке: проверка баланса, снятие, пополнение
+WORKLOAD_MIX = (("get_balance", 0.6), ("withdraw", 0.25), ("deposit", 0.15))
+# На сколько шардов делятся карты в хранилище sharded
+SHARDS = 16
+
+
+class _LocalRemoteCardRepository(RemoteCardRepository):
+    """Клиент сервера хранилища карт, запущенного в этом же процессе; при закрытии останавливает и сервер"""
+
+    def __init__(self, card_repository: CardRepository, address: str):
+        self._server = CardStoreServer(card_repository, address)
+        self._server_thread = threading.Thread(target=self._server.serve_forever)
+        self._server_thread.start()
+        super().__init__(address)
+
+    def close(self) -> None:
+        super().close()
+        self._server.shutdown()
+        self._server_thread.join()
+
+
+def _write_json_cards(cards: Cards, directory: Path) -> str:
+    filename = directory / "cards.json"
+    filename.write_text(json.dumps(cards))
+    return str(filename)
+
+
+def _file_repository(cards: Cards, directory: Path) -> CardRepository:
+    return FileCardRepository(_write_json_cards(cards, directory))
+
+
+def _journaled_repository(cards: Cards, directory: Path) -> CardRepository:
+    return JournaledFileCardRepository(_write_json_cards(cards, directory))
+
+
+def _streaming_repository(cards: Cards, directory: Path) -> CardRepository:
+    repository = StreamingFileCardRepository(_write_json_cards(cards, directory))
+    # Сравниваются операции над загруженным хранилищем, а не время его загрузки
+    repository.wait_loaded()
+    return repository
+
+
+def _write_behind_repository(cards: Cards, directory: Path) -> CardRepository:
+    return WriteBehindFileCardRepository(_write_json_cards(cards, directory))
+
+
+def _shared_repository(cards: Cards, directory: Path) -> CardRepository:
+    return SharedFileCardRepository(_write_json_cards(cards, directory))
+
+
+def _remote_repository(cards: Cards, directory: Path) -> CardRepository:
+    return _LocalRemoteCardRepository(InMemoryCardRepository(cards), str(directory / "card_store.sock"))
+
+
+def _mmap_repository(cards: Cards, directory: Path) -> CardRepository:
+    filename = directory / "cards.bin"
+    write_cards(cards, str(filename))
+    return MmapCardRepository(str(filename))
+
+
+def _sharded_repository(cards: Cards, directory: Path) -> CardRepository:
+    write_shards(cards, str(directory / "cards"), shards=SHARDS)
+    return ShardedCardRepository.open(str(directory / "cards"))
+
+
+def _sqlite_repository(cards: Cards, directory: Path) -> CardRepository:
+    repository = SqliteCardRepository(str(directory / "cards.db"))
+    repository.add_cards(cards)
+    return repository
+
+
+# Хранилища, которые сравниваются в бенчмарке: название → фабрика (карты, рабочий каталог) → хранилище
+REPOSITORY_FACTORIES: dict[str, Callable[[Cards, Path], CardRepository]] = {
+    "in_memory": lambda cards, _: InMemoryCardRepository(cards),
+    "compact": lambda cards, _: CompactCardRepository(cards),
+    "file": _file_repository,
+    "journal": _journaled_repository,
+    "mmap": _mmap_repository,
+    "remote": _remote_repository,
+    "shared": _shared_repository,
+    "sharded": _sharded_repository,
+    "sqlite": _sqlite_repository,
+    "streaming": _streaming_repository,
+    "write_behind": _write_behind_repository,
+}
+
+
+def make_workload(repository: CardRepository, card_numbers: list[str], ops: int, seed: int = 42) -> Iterator[Callable]:
+    """Генерирует ops операций со случайными картами в пропорциях WORKLOAD_MIX"""
+    rnd = random.Random(seed)
+    names, weights = zip(*WORKLOAD_MIX, strict=True)
+    for name in rnd.choices(names, weights=weights, k=ops):
+        card = rnd.choice(card_numbers)
+        if name == "get_balance":
+            yield lambda card=card: repository.get_balance(card)
+        elif name == "withdraw":
+            yield lambda card=card: repository.withdraw(card, 10)
+        else:
+            yield lambda card=card: repository.deposit(card, 10)
+
+
+def run(sizes: list[int], ops: int, time_budget: float, repositories: list[str]) -> list[BenchmarkResult]:
+    results = []
+    for size in sizes:
+        card_numbers = list(make_cards(size))
+        for name in repositories:
+            with tempfile.TemporaryDirectory() as directory:
+                repository = REPOSITORY_FACTORIES[name](make_cards(size), Path(directory))
+                try:
+                    results.append(
+                        measure(
+                            "repository_mix",
+                            make_workload(repository, card_numbers, ops),
+                            params={"repository": name, "cards": size},
+                            time_budget=time_budget,
+                        )
+                    )
+                finally:
+                    repository.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = make_parser("Benchmark CardRepository implementations on a mixed workload")
+    parser.add_argument(
+        "--repositories",
+        type=lambda value: value.split(","),
+        default=list(REPOSITORY_FACTORIES),
+        help="comma-separated repository names",
+    )
+    args = parser.parse_args()
+    report(SUITE, run(args.sizes, args.ops, args.time_budget, args.repositories), args)
@@ -0,0 +1,46 @@
+import random
+from collections.abc import Callable, Iterator
+from contextlib import suppress
+
+from atmsys.cash_dispenser import CashDispenser
+from atmsys.exceptions import CannotDispense
+from benchmarks.harness import BenchmarkResult, make_parser, measure, report
+
+SUITE = "cash_dispenser"
+
+# Наборы кассет: название → номинал → число купюр
+CASSETTE_SETS = {
+    "typical": {5000: 2000, 2000: 2000, 1000: 2000, 500: 2000, 100: 2000},
+    "scarce": {5000: 3, 2000: 1, 1000: 4, 500: 2, 200: 3, 100: 5},
+    "many_denominations": {5000: 500, 2000: 500, 1000: 500, 500: 500, 200: 500, 100: 500, 50: 500, 10: 500},
+}
+
+
+def make_plans(dispenser: CashDispenser, ops: int, seed: int = 42) -> Iterator[Callable]:
+    """Генерирует ops подборов купюр на случайные суммы до 200 000 рублей, кратные 100"""
+    rnd = random.Random(seed)
+
+    def plan(amount: int) -> None:
+        with suppress(CannotDispense):
+            dispenser.plan(amount)
+
+    for amount in (rnd.randrange(100, 200_001, 100) for _ in range(ops)):
+        yield lambda amount=amount: plan(amount)
+
+
+def run(ops: int, time_budget: float) -> list[BenchmarkResult]:
+    return [
+        measure(
+            "plan",
+            make_plans(CashDispenser(cassettes), ops),
+            params={"cassettes": name},
+            time_budget=time_budget,
+        )
+        for name, cassettes in CASSETTE_SETS.items()
+    ]
+
+
+if __name__ == "__main__":
+    parser = make_parser("Benchmark the cash dispenser note mix solver")
+    args = parser.parse_args()
+    report(SUITE, run(args.ops, args.time_budget), args)
@@ -0,0 +1,52 @@
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+
+from atmsys.bank_account import CardRepository
+from atmsys.card_repository import InMemoryCardRepository
+from atmsys.compact_card_repository import CompactCardRepository
+from benchmarks.harness import DEFAULT_SIZES, make_cards
+
+# Хранилища, память которых сравнивается: название → фабрика (число карт) → хранилище
+REPOSITORY_FACTORIES: dict[str, Callable[[int], CardRepository]] = {
+    "dict": lambda size: InMemoryCardRepository(make_cards(size)),
+    "compact": lambda size: CompactCardRepository(make_cards(size)),
+}
+
+
+def measure_memory(factory: Callable[[int], CardRepository], size: int) -> tuple[int, int]:
+    """
+    Создаёт хранилище на size карт и возвращает, сколько байт оно занимает
+    после создания и сколько занимало в пике при создании
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        repository = factory(size)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del repository
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory footprint of in-memory card repositories")
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated card counts",
+    )
+    args = parser.parse_args()
+    print(f"{'repository':<12} {'cards':>10} {'retained, MiB':>14} {'peak, MiB':>10} {'bytes/card':>11}")
+    for size in args.sizes:
+        for name, factory in REPOSITORY_FACTORIES.items():
+            retained, peak = measure_memory(factory, size)
+            print(f"{name:<12} {size:>10} {retained / 2**20:>14.1f} {peak / 2**20:>10.1f} {retained / size:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
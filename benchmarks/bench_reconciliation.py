@@ -0,0 +1,117 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from atmsys.reconciliation import Balances, Operations, reconcile
+from benchmarks.harness import BenchmarkResult, make_parser, measure, report
+
+SUITE = "reconciliation"
+
+# Сколько раз повторяется сверка при замере
+REPEATS = 3
+# Сколько терминалов в нагрузке
+TERMINALS = 100
+# Доля операций за день от числа карт
+OPERATIONS_PER_CARD = 0.2
+# Число карт, до которого сверка сравнивается с циклом по словарям
+LOOP_MAX_CARDS = 1_000_000
+
+
+def make_day(size: int, seed: int = 42) -> tuple[Balances, Balances, Operations]:
+    """Генерирует балансы size карт на начало и конец дня и операции за день с одним расхождением"""
+    rng = np.random.default_rng(seed)
+    cards = np.arange(4_000_000_000_000_000, 4_000_000_000_000_000 + size, dtype=np.uint64)
+    opening = rng.integers(0, 1_000_000, size, dtype=np.int64)
+    operation_count = int(size * OPERATIONS_PER_CARD)
+    operation_cards = rng.integers(0, size, operation_count)
+    amounts = rng.integers(1, 10_000, operation_count, dtype=np.int64) * rng.choice([-1, 1], operation_count)
+    closing = opening.copy()
+    np.add.at(closing, operation_cards, amounts)
+    closing[0] += 1
+    operations = Operations(
+        cards[operation_cards],
+        amounts,
+        rng.integers(0, TERMINALS, operation_count, dtype=np.int32),
+        [f"atm-{terminal}" for terminal in range(TERMINALS)],
+    )
+    return Balances(cards, opening), Balances(cards, closing), operations
+
+
+def write_journals(operations: Operations, directory: Path) -> list[str]:
+    """Записывает операции в журналы терминалов в формате TransactionJournal и возвращает пути к журналам"""
+    journals = []
+    for terminal, name in enumerate(operations.terminal_names):
+        mask = operations.terminals == terminal
+        amounts = operations.amounts[mask]
+        rows = np.empty(len(amounts), dtype=[("time", "f8"), ("card", "u8"), ("kind", "U8"), ("amount", "i8")])
+        rows["time"] = np.arange(len(amounts))
+        rows["card"] = operations.cards[mask]
+        rows["kind"] = np.where(amounts > 0, "deposit", "withdraw")
+        rows["amount"] = np.abs(amounts)
+        filename = directory / f"{name}.log"
+        # Баланс после операции сверке не нужен, вместо него пишется ноль
+        np.savetxt(filename, rows, fmt="%.6f %d %s %d 0")
+        journals.append(str(filename))
+    return journals
+
+
+def reconcile_loop(opening: dict[int, int], closing: dict[int, int], operations: list[tuple[int, int, int]]):
+    """Та же сверка циклами по словарям — для сравнения с векторной"""
+    totals = dict.fromkeys(opening, 0)
+    cash_in: dict[int, int] = {}
+    cash_out: dict[int, int] = {}
+    for card, amount, terminal in operations:
+        totals[card] += amount
+        if amount > 0:
+            cash_in[terminal] = cash_in.get(terminal, 0) + amount
+        else:
+            cash_out[terminal] = cash_out.get(terminal, 0) - amount
+    return [card for card, total in totals.items() if closing[card] - opening[card] != total], cash_in, cash_out
+
+
+def run(sizes: list[int], time_budget: float) -> list[BenchmarkResult]:
+    results = []
+    for size in sizes:
+        day = opening, closing, operations = make_day(size)
+        with tempfile.TemporaryDirectory() as directory:
+            journals = write_journals(operations, Path(directory))
+            results.append(
+                measure(
+                    "load_journals",
+                    (lambda journals=journals: Operations.from_journals(journals) for _ in range(REPEATS)),
+                    params={"cards": size, "operations": len(operations.amounts)},
+                    time_budget=time_budget,
+                )
+            )
+        results.append(
+            measure(
+                "reconcile",
+                (lambda day=day: reconcile(*day) for _ in range(REPEATS)),
+                params={"cards": size, "implementation": "numpy"},
+                time_budget=time_budget,
+            )
+        )
+        if size <= LOOP_MAX_CARDS:
+            opening_dict = dict(zip(opening.cards.tolist(), opening.balances.tolist(), strict=True))
+            closing_dict = dict(zip(closing.cards.tolist(), closing.balances.tolist(), strict=True))
+            operation_rows = list(
+                zip(operations.cards.tolist(), operations.amounts.tolist(), operations.terminals.tolist(), strict=True)
+            )
+            loop_day = opening_dict, closing_dict, operation_rows
+            results.append(
+                measure(
+                    "reconcile",
+                    (lambda loop_day=loop_day: reconcile_loop(*loop_day) for _ in range(REPEATS)),
+                    params={"cards": size, "implementation": "loop"},
+                    time_budget=time_budget,
+                )
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = make_parser("Benchmark vectorized end-of-day reconciliation")
+    parser.set_defaults(sizes=[100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+    report(SUITE, run(args.sizes, args.time_budget), args)
@@ -0,0 +1,76 @@
+import random
+import threading
+from collections.abc import Callable, Iterator
+
+from atmsys.card_repository import InMemoryCardRepository
+from atmsys.card_store_server import CardStoreServer
+from atmsys.remote_card_repository import RemoteCardRepository
+from benchmarks.harness import BenchmarkResult, make_cards, make_parser, measure, report
+
+SUITE = "remote_repository"
+
+# Сколько запросов клиент отправляет за раз в режиме конвейера
+PIPELINE_DEPTH = 32
+
+
+def make_lookups(get_balance: Callable[[str], int], card_numbers: list[str], ops: int) -> Iterator[Callable]:
+    rnd = random.Random(42)
+    for _ in range(ops):
+        card = rnd.choice(card_numbers)
+        yield lambda card=card: get_balance(card)
+
+
+def make_pipelined_lookups(client: RemoteCardRepository, card_numbers: list[str], ops: int) -> Iterator[Callable]:
+    """Генерирует ops / PIPELINE_DEPTH операций, каждая из которых проверяет баланс PIPELINE_DEPTH карт"""
+    rnd = random.Random(42)
+    for _ in range(max(1, ops // PIPELINE_DEPTH)):
+        calls = [("get_balance", rnd.choice(card_numbers)) for _ in range(PIPELINE_DEPTH)]
+        yield lambda calls=calls: client.pipeline(calls)
+
+
+def run(sizes: list[int], ops: int, time_budget: float) -> list[BenchmarkResult]:
+    results = []
+    for size in sizes:
+        card_numbers = list(make_cards(size))
+        repository = InMemoryCardRepository(make_cards(size))
+        server = CardStoreServer(repository, ("127.0.0.1", 0))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        client = RemoteCardRepository(server.address)
+        try:
+            params = {"cards": size}
+            results.append(
+                measure(
+                    "get_balance",
+                    make_lookups(repository.get_balance, card_numbers, ops),
+                    params={**params, "access": "direct"},
+                    time_budget=time_budget,
+                )
+            )
+            results.append(
+                measure(
+                    "get_balance",
+                    make_lookups(client.get_balance, card_numbers, ops),
+                    params={**params, "access": "remote"},
+                    time_budget=time_budget,
+                )
+            )
+            results.append(
+                measure(
+                    "get_balance_pipeline",
+                    make_pipelined_lookups(client, card_numbers, ops),
+                    params={**params, "depth": PIPELINE_DEPTH},
+                    time_budget=time_budget,
+                )
+            )
+        finally:
+            client.close()
+            server.shutdown()
+            thread.join()
+    return results
+
+
+if __name__ == "__main__":
+    parser = make_parser("Benchmark RemoteCardRepository against direct in-process access")
+    args = parser.parse_args()
+    report(SUITE, run(args.sizes, args.ops, args.time_budget), args)
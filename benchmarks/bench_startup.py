@@ -0,0 +1,72 @@
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from atmsys.file_card_repository import FileCardRepository
+from atmsys.streaming_file_card_repository import StreamingFileCardRepository
+
+DEFAULT_SIZES = (1_000_000, 10_000_000)
+
+
+def write_cards_file(filename: Path, count: int) -> list[str]:
+    """
+    Пишет JSON-файл с count картами в формате FileCardRepository построчно,
+    не собирая карты в памяти, и возвращает несколько номеров для проверки
+    """
+    with open(filename, "w") as f:
+        f.write("{")
+        for number in range(count):
+            separator = ", " if number else ""
+            f.write(f'{separator}"{4_000_000_000_000_000 + number}": {{"pin": "1234", "balance": 1000000}}')
+        f.write("}")
+    rnd = random.Random(42)
+    return [str(4_000_000_000_000_000 + rnd.randrange(count)) for _ in range(10)]
+
+
+def measure_startup(filename: Path, sample: list[str]) -> dict[str, float]:
+    """
+    Замеряет, через сколько секунд каждое хранилище отвечает на первый запрос
+    и через сколько полностью загружает файл
+    """
+    started = time.perf_counter()
+    repository = FileCardRepository(str(filename))
+    repository.get_balance(sample[0])
+    eager = time.perf_counter() - started
+    del repository
+
+    started = time.perf_counter()
+    streaming = StreamingFileCardRepository(str(filename))
+    for card in sample:
+        streaming.get_balance(card)
+    first_lookups = time.perf_counter() - started
+    streaming.wait_loaded()
+    full_load = time.perf_counter() - started
+    streaming.close()
+    return {"file": eager, "streaming_ready": first_lookups, "streaming_loaded": full_load}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare startup time of eager and streaming JSON card loading")
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated card counts",
+    )
+    args = parser.parse_args()
+    print(f"{'cards':>10} {'file, s':>10} {'streaming ready, s':>19} {'streaming loaded, s':>20}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = Path(directory) / "cards.json"
+            sample = write_cards_file(filename, size)
+            timings = measure_startup(filename, sample)
+        print(
+            f"{size:>10} {timings['file']:>10.3f} {timings['streaming_ready']:>19.3f} "
+            f"{timings['streaming_loaded']:>20.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
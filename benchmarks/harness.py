@@ -0,0 +1,148 @@
+import argparse
+import json
+import subprocess
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from atmsys.typedefs import Cards
+
+RESULTS_DIR = Path(__file__).resolve().parent.parent / ".benchmarks"
+DEFAULT_SIZES = (10, 1_000, 100_000, 1_000_000)
+# Сколько секунд максимум тратится на один замер, если операций слишком много
+DEFAULT_TIME_BUDGET = 5.0
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    params: dict = field(default_factory=dict)
+    ops: int = 0
+    ops_per_sec: float = 0.0
+    p50_us: float = 0.0
+    p99_us: float = 0.0
+
+    @property
+    def key(self) -> str:
+        """Ключ, по которому результат сопоставляется с результатом другого коммита"""
+        params = ",".join(f"{name}={value}" for name, value in sorted(self.params.items()))
+        return f"{self.name}[{params}]"
+
+
+def make_cards(count: int, balance: int = 1_000_000) -> Cards:
+    """Генерирует count карт с 16-значными номерами, пин-кодом 1234 и одинаковым балансом"""
+    return {str(4_000_000_000_000_000 + number): {"pin": "1234", "balance": balance} for number in range(count)}
+
+
+def percentile(sorted_values: list[int], fraction: float) -> int:
+    """Возвращает перцентиль fraction (от 0 до 1) уже отсортированного списка"""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def measure(
+    name: str,
+    operations: Iterable[Callable[[], object]],
+    params: dict | None = None,
+    time_budget: float = DEFAULT_TIME_BUDGET,
+) -> BenchmarkResult:
+    """
+    Выполняет операции operations по одной, замеряя задержку каждой,
+    и останавливается досрочно, если замер длится дольше time_budget секунд
+    """
+    latencies: list[int] = []
+    started = time.perf_counter_ns()
+    deadline = started + int(time_budget * 1e9)
+    for operation in operations:
+        operation_started = time.perf_counter_ns()
+        operation()
+        finished = time.perf_counter_ns()
+        latencies.append(finished - operation_started)
+        if finished > deadline:
+            break
+    total_seconds = (time.perf_counter_ns() - started) / 1e9
+    latencies.sort()
+    return BenchmarkResult(
+        name=name,
+        params=params or {},
+        ops=len(latencies),
+        ops_per_sec=len(latencies) / total_seconds if total_seconds else 0.0,
+        p50_us=percentile(latencies, 0.5) / 1000,
+        p99_us=percentile(latencies, 0.99) / 1000,
+    )
+
+
+def print_results(results: Iterable[BenchmarkResult]) -> None:
+    """Печатает результаты замеров таблицей"""
+    print(f"{'benchmark':<60} {'ops':>9} {'ops/sec':>12} {'p50, us':>10} {'p99, us':>10}")
+    for r in results:
+        print(f"{r.key:<60} {r.ops:>9} {r.ops_per_sec:>12.0f} {r.p50_us:>10.1f} {r.p99_us:>10.1f}")
+
+
+def current_commit() -> str:
+    """Возвращает короткий хэш текущего коммита или 'unknown' вне git-репозитория"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(suite: str, results: list[BenchmarkResult]) -> Path:
+    """Сохраняет результаты набора suite в .benchmarks/<коммит>/<suite>.json и возвращает путь к файлу"""
+    path = RESULTS_DIR / current_commit() / f"{suite}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps([asdict(result) for result in results], indent=2))
+    return path
+
+
+def load_results(suite: str, commit: str) -> dict[str, BenchmarkResult]:
+    """Загружает сохранённые результаты набора suite для коммита commit"""
+    path = RESULTS_DIR / commit / f"{suite}.json"
+    results = [BenchmarkResult(**result) for result in json.loads(path.read_text())]
+    return {result.key: result for result in results}
+
+
+def print_comparison(results: Iterable[BenchmarkResult], baseline: dict[str, BenchmarkResult]) -> None:
+    """Печатает изменение пропускной способности и p99 относительно результатов другого коммита"""
+    print(f"{'benchmark':<60} {'ops/sec, %':>12} {'p99, %':>10}")
+    for result in results:
+        base = baseline.get(result.key)
+        if base is None or not base.ops_per_sec or not base.p99_us:
+            continue
+        throughput_change = (result.ops_per_sec / base.ops_per_sec - 1) * 100
+        p99_change = (result.p99_us / base.p99_us - 1) * 100
+        print(f"{result.key:<60} {throughput_change:>+12.1f} {p99_change:>+10.1f}")
+
+
+def make_parser(description: str) -> argparse.ArgumentParser:
+    """Создаёт разборщик общих параметров командной строки бенчмарков"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated card counts",
+    )
+    parser.add_argument("--ops", type=int, default=10_000, help="operations per measurement")
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET, help="seconds per measurement")
+    parser.add_argument("--save", action="store_true", help="store results under .benchmarks/<commit>/")
+    parser.add_argument("--compare", metavar="COMMIT", help="compare with results stored for COMMIT")
+    return parser
+
+
+def report(suite: str, results: list[BenchmarkResult], args: argparse.Namespace) -> None:
+    """Печатает результаты набора и, в зависимости от параметров, сохраняет и сравнивает их"""
+    print_results(results)
+    if args.save:
+        print(f"Saved to {save_results(suite, results)}")
+    if args.compare:
+        try:
+            baseline = load_results(suite, args.compare)
+        except FileNotFoundError:
+            print(f"No stored {suite} results for commit {args.compare}")
+        else:
+            print_comparison(results, baseline)
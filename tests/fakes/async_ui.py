@@ -0,0 +1,21 @@
+from collections.abc import Sequence
+
+from atmsys.async_menu import AsyncUI
+
+
+class FakeAsyncUI(AsyncUI):
+    def __init__(self, *, inputs: Sequence[str]):
+        self.messages: list[str] = []
+        self.separator = "SEPARATOR"
+        self._input_index = -1
+        self.inputs = inputs
+
+    async def show_message(self, message: str) -> None:
+        self.messages.append(message)
+
+    async def get_input(self, prompt: str) -> str:
+        self._input_index += 1
+        return self.inputs[self._input_index]
+
+    async def show_separator(self) -> None:
+        self.messages.append(self.separator)
@@ -1,23 +1,34 @@
-from atmsys.bank_account import CardRepository
-from atmsys.exceptions import CardNotExists
+from collections.abc import Iterator
+
+from atmsys.bank_account import ListableCardRepository
+from atmsys.exceptions import CardNotExists, InsufficientFunds
 from atmsys.typedefs import PIN, CardNumber, Cards, Rubles
 
 
-class InMemoryCardRepository(CardRepository):
+class InMemoryCardRepository(ListableCardRepository):
     """Работа с хранилищем данных по картам"""
 
     def __init__(self, cards: Cards):
         self._cards = cards
 
-    def withdraw(self, card: CardNumber, amount: Rubles) -> None:
-        """Снимает amount рублей с баланса карты с номером card"""
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """
+        Снимает amount рублей с баланса карты с номером card и возвращает новый баланс.
+        Если средств недостаточно, падает исключение InsufficientFunds
+        """
         self._check_card_exists(card)
-        self._cards[card]["balance"] -= amount
-
-    def deposit(self, card: CardNumber, amount: Rubles) -> None:
-        """Пополняет баланс карты с номером card на amount рублей"""
+        card_data = self._cards[card]
+        if card_data["balance"] < amount:
+            raise InsufficientFunds
+        card_data["balance"] -= amount
+        return card_data["balance"]
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        """Пополняет баланс карты с номером card на amount рублей и возвращает новый баланс"""
         self._check_card_exists(card)
-        self._cards[card]["balance"] += amount
+        card_data = self._cards[card]
+        card_data["balance"] += amount
+        return card_data["balance"]
 
     def get_balance(self, card: CardNumber) -> int:
         """Возвращает баланс карты по её номеру"""
@@ -32,6 +43,10 @@ class InMemoryCardRepository(CardRepository):
         self._check_card_exists(card)
         return self._cards[card]["pin"] == pin
 
+    def card_numbers(self) -> Iterator[CardNumber]:
+        """Перебирает номера всех карт хранилища"""
+        return iter(self._cards)
+
     def _check_card_exists(self, card: CardNumber) -> None:
         """
         Проверяет, что карта с переданным номером есть в хранилище,
@@ -0,0 +1,168 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fakes.async_ui import FakeAsyncUI
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.async_atm import AsyncATM, run_sessions
+from atmsys.async_bank_account import ThreadPoolCardRepository
+from atmsys.async_menu import (
+    AsyncCheckBalanceMenuItem,
+    AsyncDepositMenuItem,
+    AsyncExitMenuItem,
+    AsyncMenu,
+    AsyncUI,
+    AsyncWithdrawMenuItem,
+)
+from atmsys.atm import ATM
+from atmsys.card_number_filter import CardNumberFilter
+from atmsys.cash_dispenser import CashDispenser
+from atmsys.exceptions import ATMException
+from atmsys.menu import CheckBalanceMenuItem, DepositMenuItem, ExitMenuItem, Menu, WithdrawMenuItem
+from atmsys.ui_messages import UiMessage
+from atmsys.withdrawal_limits import LimitedCardRepository, WithdrawalLimits
+
+GET_BALANCE, WITHDRAW, DEPOSIT, EXIT = "1", "2", "3", "4"
+
+
+@pytest.fixture
+def card_repo() -> ThreadPoolCardRepository:
+    # Хранилище-заглушка не потокобезопасно, поэтому обращаемся к нему из одного потока
+    return ThreadPoolCardRepository(
+        InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}),
+        executor=ThreadPoolExecutor(max_workers=1),
+    )
+
+
+@pytest.fixture
+def make_atm(card_repo: ThreadPoolCardRepository) -> Callable[[AsyncUI], AsyncATM]:
+    def _make_atm(ui: AsyncUI) -> AsyncATM:
+        return AsyncATM(
+            card_repository=card_repo,
+            ui=ui,
+            menu=AsyncMenu(
+                items=[
+                    AsyncCheckBalanceMenuItem(),
+                    AsyncWithdrawMenuItem(),
+                    AsyncDepositMenuItem(),
+                    AsyncExitMenuItem(),
+                ],
+                ui=ui,
+            ),
+            max_pin_input_attempts=2,
+        )
+
+    return _make_atm
+
+
+def test_async_atm_session_ends_without_system_exit(make_atm: Callable[[AsyncUI], AsyncATM]):
+    ui = FakeAsyncUI(inputs=("1333444455556666", "5678", WITHDRAW, "11", EXIT))
+
+    asyncio.run(make_atm(ui).run())
+
+    assert UiMessage.BALANCE.format(balance=89) in ui.messages
+    assert UiMessage.GOODBYE in ui.messages
+
+
+def test_async_atm_blocks_card_after_attempts_ended(make_atm: Callable[[AsyncUI], AsyncATM]):
+    ui = FakeAsyncUI(inputs=("1333444455556666", "0000", "1234"))
+
+    asyncio.run(make_atm(ui).run())
+
+    assert UiMessage.CARD_BLOCKED in ui.messages
+
+
+def test_async_atm_runs_many_sessions_concurrently(make_atm: Callable[[AsyncUI], AsyncATM]):
+    uis = [FakeAsyncUI(inputs=("1333444455556666", "5678", DEPOSIT, "1", EXIT)) for _ in range(50)]
+
+    errors = asyncio.run(run_sessions(make_atm(ui) for ui in uis))
+
+    assert errors == [None] * 50
+    ui = FakeAsyncUI(inputs=("1333444455556666", "5678", GET_BALANCE, EXIT))
+    asyncio.run(make_atm(ui).run())
+    assert UiMessage.BALANCE.format(balance=150) in ui.messages
+
+
+# Сценарии, которые ATM и AsyncATM должны проводить одинаково
+PARITY_SCRIPTS = {
+    "withdraw": ("1333444455556666", "5678", WITHDRAW, "50", GET_BALANCE, EXIT),
+    "deposit": ("1333444455556666", "5678", DEPOSIT, "20", EXIT),
+    "incorrect_menu_item": ("1333444455556666", "5678", "9", "hello", EXIT),
+    "invalid_amount": ("1333444455556666", "5678", WITHDRAW, "abc", WITHDRAW, "-5", EXIT),
+    "insufficient_funds": ("1333444455556666", "5678", WITHDRAW, "120", EXIT),
+    "cannot_dispense": ("1333444455556666", "5678", WITHDRAW, "15", EXIT),
+    "cannot_accept": ("1333444455556666", "5678", DEPOSIT, "15", EXIT),
+    "withdrawal_limit": ("1333444455556666", "5678", DEPOSIT, "100", WITHDRAW, "100", WITHDRAW, "60", EXIT),
+    "card_blocked": ("1333444455556666", "0000", "1234"),
+    "unknown_card": ("4000000000000000",),
+}
+
+
+def _make_cards() -> InMemoryCardRepository:
+    return InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}})
+
+
+def _run_atm(inputs: tuple[str, ...]) -> tuple[list[str], list[ATMException]]:
+    cards = _make_cards()
+    cash_dispenser = CashDispenser({10: 20})
+    errors: list[ATMException] = []
+    ui = FakeUI(inputs=inputs)
+    atm = ATM(
+        card_repository=LimitedCardRepository(cards, WithdrawalLimits(card_limit=150)),
+        ui=ui,
+        menu=Menu(
+            items=[
+                CheckBalanceMenuItem(),
+                WithdrawMenuItem(cash_dispenser),
+                DepositMenuItem(cash_dispenser),
+                ExitMenuItem(),
+            ],
+            ui=ui,
+        ),
+        max_pin_input_attempts=2,
+        card_number_filter=CardNumberFilter(cards.card_numbers()),
+        error_listener=errors.append,
+    )
+    with pytest.raises(SystemExit):
+        atm.run()
+    return ui.messages, errors
+
+
+def _run_async_atm(inputs: tuple[str, ...]) -> tuple[list[str], list[ATMException]]:
+    cards = _make_cards()
+    cash_dispenser = CashDispenser({10: 20})
+    errors: list[ATMException] = []
+    ui = FakeAsyncUI(inputs=inputs)
+    atm = AsyncATM(
+        card_repository=ThreadPoolCardRepository(
+            LimitedCardRepository(cards, WithdrawalLimits(card_limit=150)),
+            executor=ThreadPoolExecutor(max_workers=1),
+        ),
+        ui=ui,
+        menu=AsyncMenu(
+            items=[
+                AsyncCheckBalanceMenuItem(),
+                AsyncWithdrawMenuItem(cash_dispenser),
+                AsyncDepositMenuItem(cash_dispenser),
+                AsyncExitMenuItem(),
+            ],
+            ui=ui,
+        ),
+        max_pin_input_attempts=2,
+        card_number_filter=CardNumberFilter(cards.card_numbers()),
+        error_listener=errors.append,
+    )
+    asyncio.run(atm.run())
+    return ui.messages, errors
+
+
+@pytest.mark.parametrize("inputs", PARITY_SCRIPTS.values(), ids=PARITY_SCRIPTS.keys())
+def test_async_atm_matches_atm(inputs: tuple[str, ...]):
+    messages, errors = _run_atm(inputs)
+    async_messages, async_errors = _run_async_atm(inputs)
+
+    assert async_messages == messages
+    assert [type(error) for error in async_errors] == [type(error) for error in errors]
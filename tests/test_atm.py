@@ -13,6 +13,7 @@ from atmsys.menu import (
     Menu,
     WithdrawMenuItem,
 )
+from atmsys.typedefs import PIN, CardNumber, Rubles
 from atmsys.ui_messages import UiMessage
 
 
@@ -314,3 +315,41 @@ def test_atm_does_not_authenticate_with_not_exists_card(
 
     assert UiMessage.PIN_ACCEPTED not in ui.messages
     assert UiMessage.CARD_BLOCKED in ui.messages
+
+
+class RecordingCardRepository(InMemoryCardRepository):
+    """Хранилище, запоминающее имена вызванных у него операций"""
+
+    def __init__(self):
+        super().__init__({"1333444455556666": {"pin": "5678", "balance": 100}})
+        self.calls: list[str] = []
+
+    def withdraw(self, card: CardNumber, amount: Rubles) -> Rubles:
+        self.calls.append("withdraw")
+        return super().withdraw(card, amount)
+
+    def deposit(self, card: CardNumber, amount: Rubles) -> Rubles:
+        self.calls.append("deposit")
+        return super().deposit(card, amount)
+
+    def get_balance(self, card: CardNumber) -> int:
+        self.calls.append("get_balance")
+        return super().get_balance(card)
+
+    def is_card_pin_valid(self, card: CardNumber, pin: PIN) -> bool:
+        self.calls.append("is_card_pin_valid")
+        return super().is_card_pin_valid(card, pin)
+
+
+def test_atm_shows_balance_after_withdraw():
+    card_repo = RecordingCardRepository()
+    ui = FakeUI(inputs=("1333444455556666", "5678", MenuCommand.WITHDRAW, "11", MenuCommand.EXIT))
+    menu_items = [CheckBalanceMenuItem(), WithdrawMenuItem(), DepositMenuItem(), ExitMenuItem()]
+    sut = ATM(card_repository=card_repo, ui=ui, menu=Menu(items=menu_items, ui=ui))
+
+    with pytest.raises(SystemExit):
+        sut.run()
+
+    # Снятие — одна операция хранилища, без проверки баланса перед ней
+    assert card_repo.calls == ["is_card_pin_valid", "withdraw"]
+    assert UiMessage.BALANCE.format(balance=89) in ui.messages
@@ -0,0 +1,35 @@
+import io
+import json
+
+from fakes.in_memory_card_repository import InMemoryCardRepository
+
+from atmsys.batch import SessionStatus, parse_scripts, run_batch
+from atmsys.main import make_menu_items
+from atmsys.ui_messages import UiMessage
+
+SCRIPTS = """\
+["1333444455556666", "5678", "2", "30", "4"]
+
+{"session": "replay-7", "inputs": ["1333444455556666", "5678", "1", "4"]}
+["1333444455556666", "5678", "1"]
+["1333444455556666", "0000", "0000", "0000"]
+"""
+
+
+def test_run_batch_writes_json_line_per_session():
+    card_repository = InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}})
+    output = io.StringIO()
+
+    report = run_batch(card_repository, make_menu_items(), parse_scripts(io.StringIO(SCRIPTS)), output)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(result["session"], result["status"]) for result in results] == [
+        (1, SessionStatus.COMPLETED),
+        ("replay-7", SessionStatus.COMPLETED),
+        (4, SessionStatus.SCRIPT_EXHAUSTED),
+        (5, SessionStatus.COMPLETED),
+    ]
+    assert UiMessage.BALANCE.format(balance=70) in results[1]["messages"]
+    assert UiMessage.CARD_BLOCKED in results[3]["messages"]
+    assert report.sessions == 4
+    assert report.statuses == {SessionStatus.COMPLETED: 3, SessionStatus.SCRIPT_EXHAUSTED: 1}
@@ -0,0 +1,99 @@
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+
+from atmsys.caching_card_repository import CachingCardRepository, WritePolicy
+from atmsys.exceptions import CardNotExists, InsufficientFunds, WriteBackFailed
+from atmsys.main import closing_card_repository
+from atmsys.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def backend() -> InMemoryCardRepository:
+    return InMemoryCardRepository({f"4000{number:012d}": {"pin": "1234", "balance": 100} for number in range(5)})
+
+
+def test_reads_are_served_from_cache(backend: InMemoryCardRepository):
+    sut = CachingCardRepository(backend, capacity=2)
+
+    sut.get_balance("4000000000000000")
+    sut.get_balance("4000000000000000")
+    sut.get_balance("4000000000000001")
+    sut.get_balance("4000000000000002")
+
+    assert (sut.stats.hits, sut.stats.misses, sut.stats.evictions) == (1, 3, 1)
+    with pytest.raises(CardNotExists):
+        sut.get_balance("5000000000000000")
+
+
+def test_write_through_keeps_cache_and_storage_in_sync(backend: InMemoryCardRepository):
+    metrics = MetricsRegistry()
+    sut = CachingCardRepository(backend, capacity=2, metrics=metrics)
+    sut.get_balance("4000000000000000")
+
+    assert sut.withdraw("4000000000000000", 30) == 70
+    assert backend.get_balance("4000000000000000") == 70
+    assert sut.get_balance("4000000000000000") == 70
+    with pytest.raises(InsufficientFunds):
+        sut.withdraw("4000000000000000", 71)
+    assert "atmsys_cache_hits_total 1" in metrics.render()
+
+
+def test_write_back_persists_on_eviction_and_close(backend: InMemoryCardRepository):
+    sut = CachingCardRepository(backend, capacity=1, policy=WritePolicy.BACK)
+
+    sut.withdraw("4000000000000000", 30)
+    sut.deposit("4000000000000000", 5)
+    assert backend.get_balance("4000000000000000") == 100
+
+    sut.deposit("4000000000000001", 50)
+    assert backend.get_balance("4000000000000000") == 75
+    with pytest.raises(InsufficientFunds):
+        sut.withdraw("4000000000000001", 151)
+
+    sut.close()
+    assert backend.get_balance("4000000000000001") == 150
+
+
+def test_write_back_rejected_by_storage_is_reported(backend: InMemoryCardRepository):
+    metrics = MetricsRegistry()
+    sut = CachingCardRepository(backend, capacity=1, policy=WritePolicy.BACK, metrics=metrics)
+    sut.withdraw("4000000000000000", 80)
+    backend.withdraw("4000000000000000", 50)
+
+    sut.deposit("4000000000000001", 10)
+    sut.withdraw("4000000000000001", 100)
+    backend.withdraw("4000000000000001", 100)
+
+    with pytest.raises(WriteBackFailed) as e:
+        sut.close()
+    assert [(result.operation.card, result.error) for result in e.value.results] == [
+        ("4000000000000000", "InsufficientFunds"),
+        ("4000000000000001", "InsufficientFunds"),
+    ]
+    assert sut.get_balance("4000000000000001") == backend.get_balance("4000000000000001") == 0
+    assert sut.stats.write_back_failures == 2
+    assert "atmsys_cache_write_back_failures_total 2" in metrics.render()
+
+
+def test_entry_point_reports_unsaved_cards_and_exits_with_error(
+    backend: InMemoryCardRepository, capsys: pytest.CaptureFixture[str]
+):
+    sut = CachingCardRepository(backend, capacity=5, policy=WritePolicy.BACK)
+
+    with pytest.raises(SystemExit) as exit_info, closing_card_repository(sut):
+        sut.withdraw("4000000000000000", 80)
+        backend.withdraw("4000000000000000", 50)
+        # Сеанс банкомата всегда заканчивается SystemExit
+        raise SystemExit
+
+    assert exit_info.value.code == 1
+    assert "4000000000000000 was not saved: InsufficientFunds" in capsys.readouterr().err
+
+
+def test_entry_point_keeps_the_error_that_ended_the_session(backend: InMemoryCardRepository):
+    sut = CachingCardRepository(backend, capacity=5, policy=WritePolicy.BACK)
+
+    with pytest.raises(KeyError), closing_card_repository(sut):
+        sut.withdraw("4000000000000000", 80)
+        backend.withdraw("4000000000000000", 50)
+        raise KeyError("4000000000000000")
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.bank_account import CardRepository
+from atmsys.caching_card_repository import CachingCardRepository
+from atmsys.card_number_filter import CardNumberFilter, is_luhn_valid
+from atmsys.main import make_card_number_filter, make_menu_items, make_parser
+from atmsys.menu import Menu
+from atmsys.metrics import InstrumentedCardRepository, MetricsRegistry
+from atmsys.sqlite_card_repository import SqliteCardRepository
+from atmsys.synchronized_card_repository import synchronized
+from atmsys.transaction_journal import JournalingCardRepository, TransactionJournal
+from atmsys.ui_messages import UiMessage
+from atmsys.withdrawal_limits import LimitedCardRepository, WithdrawalLimits
+
+
+def test_luhn_check_digit():
+    assert is_luhn_valid("4111111111111111")
+    assert not is_luhn_valid("4111111111111112")
+
+
+def test_filter_never_rejects_known_cards():
+    cards = [f"4000{number:012d}" for number in range(1000)]
+    card_number_filter = CardNumberFilter(cards)
+
+    assert all(card_number_filter.might_exist(card) for card in cards)
+    assert not card_number_filter.might_exist("12ab")
+    assert sum(card_number_filter.might_exist(f"5000{number:012d}") for number in range(1000)) < 20
+
+
+def test_filter_checks_luhn_when_enabled():
+    card_number_filter = CardNumberFilter(["4111111111111111", "4111111111111112"], check_luhn=True)
+
+    assert card_number_filter.might_exist("4111111111111111")
+    assert not card_number_filter.might_exist("4111111111111112")
+
+
+def test_atm_rejects_unknown_card_without_asking_pin():
+    card_repo = InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}})
+    ui = FakeUI(inputs=["9999888877776666"])
+    atm = ATM(
+        card_repository=card_repo,
+        ui=ui,
+        menu=Menu(items=make_menu_items(), ui=ui),
+        card_number_filter=CardNumberFilter.from_repository(card_repo),
+    )
+
+    with pytest.raises(SystemExit):
+        atm.run()
+
+    assert ui.messages == [UiMessage.GREETINGS, UiMessage.CARD_NOT_EXISTS]
+
+
+def test_filter_learns_cards_added_to_storage(tmp_path: Path):
+    card_repository = SqliteCardRepository(str(tmp_path / "cards.db"))
+    card_repository.add_cards({"4000000000000000": {"pin": "1234", "balance": 0}})
+    card_number_filter = CardNumberFilter.from_repository(card_repository)
+
+    card_repository.add_cards({"4000000000000001": {"pin": "1234", "balance": 0}})
+
+    assert card_number_filter.might_exist("4000000000000001")
+    card_repository.close()
+
+
+def test_card_filter_rejects_storage_without_card_listing(capsys: pytest.CaptureFixture[str]):
+    class BalanceOnlyCardRepository(CardRepository):
+        def withdraw(self, card: str, amount: int) -> int:
+            return 0
+
+        def deposit(self, card: str, amount: int) -> int:
+            return amount
+
+        def get_balance(self, card: str) -> int:
+            return 0
+
+        def is_card_pin_valid(self, card: str, pin: str) -> bool:
+            return True
+
+    parser = make_parser()
+    args = parser.parse_args(["--storage", "remote", "--card-filter"])
+
+    with pytest.raises(SystemExit) as exit_info:
+        make_card_number_filter(parser, args, BalanceOnlyCardRepository())
+
+    assert exit_info.value.code == 2
+    assert "cannot list its cards" in capsys.readouterr().err
+
+
+def test_filter_subscribed_through_wrappers_learns_added_cards(tmp_path: Path):
+    storage = SqliteCardRepository(str(tmp_path / "cards.db"))
+    storage.add_cards({"4000000000000000": {"pin": "1234", "balance": 0}})
+    card_repository = InstrumentedCardRepository(
+        LimitedCardRepository(
+            JournalingCardRepository(
+                CachingCardRepository(synchronized(storage), capacity=10),
+                TransactionJournal(str(tmp_path / "transactions.csv")),
+            ),
+            WithdrawalLimits(card_limit=1000),
+        ),
+        MetricsRegistry(),
+    )
+    card_number_filter = CardNumberFilter(storage.card_numbers())
+    card_repository.on_card_added(card_number_filter.add)
+
+    storage.add_cards({"4000000000000001": {"pin": "1234", "balance": 0}})
+
+    assert card_number_filter.might_exist("4000000000000001")
+    card_repository.close()
@@ -0,0 +1,55 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from atmsys.card_repository import InMemoryCardRepository
+from atmsys.exceptions import InsufficientFunds
+
+
+@pytest.fixture
+def switch_often():
+    """Заставляет потоки переключаться как можно чаще, чтобы гонки проявлялись"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_instances_do_not_share_cards():
+    first, second = InMemoryCardRepository(), InMemoryCardRepository()
+
+    first.withdraw("3333444455556666", 100)
+
+    assert first.get_balance("3333444455556666") == 900
+    assert second.get_balance("3333444455556666") == 1_000
+
+
+@pytest.mark.usefixtures("switch_often")
+def test_money_is_conserved_under_parallel_transfers():
+    cards = {f"4000{number:012d}": {"pin": "1234", "balance": 1_000} for number in range(8)}
+    sut = InMemoryCardRepository(cards, lock_stripes=4)
+    card_numbers = list(cards)
+    total = sum(card_data["balance"] for card_data in cards.values())
+
+    def transfer(seed: int) -> None:
+        rnd = random.Random(seed)
+        for _ in range(5_000):
+            source, target = rnd.sample(card_numbers, 2)
+            amount = rnd.randint(1, 300)
+            try:
+                sut.withdraw(source, amount)
+            except InsufficientFunds:
+                continue
+            sut.deposit(target, amount)
+
+    threads = [threading.Thread(target=transfer, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    balances = [sut.get_balance(card) for card in card_numbers]
+    assert sum(balances) == total
+    assert min(balances) >= 0
@@ -0,0 +1,168 @@
+import socket
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from atmsys.card_repository import InMemoryCardRepository
+from atmsys.card_store_server import CardStoreServer
+from atmsys.exceptions import ATMException, CardNotExists, InsufficientFunds, WithdrawalLimitExceeded
+from atmsys.remote_card_repository import RemoteCardRepository, _Connection, parse_store_address
+from atmsys.typedefs import Operation, OperationKind, Rubles
+from atmsys.withdrawal_limits import LimitedCardRepository, WithdrawalLimits
+
+
+@pytest.fixture
+def server() -> Iterator[CardStoreServer]:
+    server = CardStoreServer(
+        InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}), ("127.0.0.1", 0)
+    )
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+@pytest.fixture
+def client(server: CardStoreServer) -> Iterator[RemoteCardRepository]:
+    client = RemoteCardRepository(server.address, timeout=1, retries=1)
+    yield client
+    client.close()
+
+
+def test_remote_repository_operations(client: RemoteCardRepository):
+    assert client.is_card_pin_valid("1333444455556666", "5678")
+    assert not client.is_card_pin_valid("1333444455556666", "0000")
+    assert client.withdraw("1333444455556666", 30) == 70
+    assert client.deposit("1333444455556666", 5) == 75
+    assert client.get_balance("1333444455556666") == 75
+    assert list(client.card_numbers()) == ["1333444455556666"]
+
+
+def test_remote_repository_raises_store_errors(client: RemoteCardRepository):
+    with pytest.raises(InsufficientFunds):
+        client.withdraw("1333444455556666", 1000)
+    with pytest.raises(CardNotExists):
+        client.get_balance("0000000000000000")
+
+
+def test_remote_repository_apply_batch(client: RemoteCardRepository):
+    results = client.apply_batch(
+        [
+            Operation(OperationKind.WITHDRAW, "1333444455556666", 40),
+            Operation(OperationKind.WITHDRAW, "1333444455556666", 100),
+        ]
+    )
+
+    assert [(result.balance, result.error) for result in results] == [(60, None), (None, "InsufficientFunds")]
+
+
+def test_remote_repository_pipeline(client: RemoteCardRepository):
+    results = client.pipeline(
+        [("withdraw", "1333444455556666", 10), ("deposit", "1333444455556666", 20), ("get_balance", "1333444455556666")]
+    )
+
+    assert results == [90, 110, 110]
+
+
+def test_repeated_write_with_same_key_is_applied_once(server: CardStoreServer):
+    connection = _Connection(server.address, timeout=1)
+    request = {"method": "withdraw", "args": ["1333444455556666", 30], "key": "retry-1"}
+    try:
+        responses = connection.exchange([request, request, {"method": "get_balance", "args": ["1333444455556666"]}])
+    finally:
+        connection.close()
+
+    assert [response["result"] for response in responses] == [70, 70, 70]
+
+
+def test_remote_repository_reconnects_after_server_drops_connection(
+    server: CardStoreServer, client: RemoteCardRepository
+):
+    client.get_balance("1333444455556666")
+    client._idle.queue[0]._socket.shutdown(socket.SHUT_RDWR)
+
+    assert client.get_balance("1333444455556666") == 100
+
+
+def test_parse_store_address():
+    assert parse_store_address("127.0.0.1:7878") == ("127.0.0.1", 7878)
+    assert parse_store_address("/run/atmsys/cards.sock") == "/run/atmsys/cards.sock"
+
+
+class SlowFirstWithdrawRepository(InMemoryCardRepository):
+    """Хранилище, первое снятие в котором выполняется дольше, чем клиент ждёт ответа"""
+
+    def __init__(self, delay: float):
+        super().__init__({"1333444455556666": {"pin": "5678", "balance": 100}})
+        self._delay = delay
+        self.withdrawals = 0
+
+    def withdraw(self, card: str, amount: Rubles) -> Rubles:
+        self.withdrawals += 1
+        if self.withdrawals == 1:
+            time.sleep(self._delay)
+        return super().withdraw(card, amount)
+
+
+def test_retry_after_timeout_on_new_connection_is_applied_once():
+    card_repository = SlowFirstWithdrawRepository(delay=0.5)
+    server = CardStoreServer(card_repository, ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    client = RemoteCardRepository(server.address, timeout=0.2, retries=3)
+    try:
+        assert client.withdraw("1333444455556666", 30) == 70
+        assert client.get_balance("1333444455556666") == 70
+    finally:
+        client.close()
+        server.shutdown()
+        thread.join()
+
+    assert card_repository.withdrawals == 1
+
+
+class BrokenDiskRepository(InMemoryCardRepository):
+    """Хранилище, запись в котором падает с ошибкой диска"""
+
+    def __init__(self):
+        super().__init__({"1333444455556666": {"pin": "5678", "balance": 100}})
+
+    def withdraw(self, card: str, amount: Rubles) -> Rubles:
+        raise OSError(28, "No space left on device")
+
+
+def test_store_failure_is_an_error_response_and_connection_keeps_serving():
+    server = CardStoreServer(BrokenDiskRepository(), ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    client = RemoteCardRepository(server.address, pool_size=1, timeout=1, retries=0)
+    try:
+        with pytest.raises(ATMException, match="StoreError"):
+            client.withdraw("1333444455556666", 30)
+        assert client.get_balance("1333444455556666") == 100
+    finally:
+        client.close()
+        server.shutdown()
+        thread.join()
+
+
+def test_remote_client_raises_the_exception_type_of_the_store():
+    store = LimitedCardRepository(
+        InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}),
+        WithdrawalLimits(card_limit=50),
+    )
+    server = CardStoreServer(store, ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    client = RemoteCardRepository(server.address, timeout=1, retries=1)
+    try:
+        with pytest.raises(WithdrawalLimitExceeded) as error:
+            client.withdraw("1333444455556666", 60)
+        assert error.value.available == 50
+    finally:
+        client.close()
+        server.shutdown()
+        thread.join()
@@ -0,0 +1,114 @@
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.cash_dispenser import CashDispenser, parse_cassettes
+from atmsys.exceptions import CannotAccept, CannotDispense
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu, format_notes
+from atmsys.ui_messages import UiMessage
+
+
+def test_plan_uses_fewest_notes():
+    sut = CashDispenser({5000: 10, 1000: 10, 500: 10, 100: 10})
+
+    assert sut.plan(6600) == {5000: 1, 1000: 1, 500: 1, 100: 1}
+
+
+def test_plan_is_not_greedy_when_greedy_fails():
+    sut = CashDispenser({500: 1, 200: 10})
+
+    assert sut.plan(600) == {200: 3}
+
+
+def test_plan_preserves_scarce_denomination_on_tie():
+    sut = CashDispenser({700: 1, 500: 100, 300: 1})
+
+    assert sut.plan(1000) == {500: 2}
+
+
+def test_plan_rejects_amounts_that_cannot_be_dispensed():
+    sut = CashDispenser({1000: 2, 500: 1}, max_notes=3)
+
+    for amount in (150, 3000, 1500 * 10):
+        with pytest.raises(CannotDispense):
+            sut.plan(amount)
+
+
+def test_reserve_takes_notes_and_release_returns_them():
+    sut = CashDispenser({1000: 2})
+
+    notes = sut.reserve(2000)
+    with pytest.raises(CannotDispense):
+        sut.reserve(1000)
+    sut.release(notes)
+    sut.refill({5000: 1})
+
+    assert sut.notes == {1000: 2, 5000: 1}
+    assert sut.plan(6000) == {5000: 1, 1000: 1}
+
+
+def test_parse_cassettes():
+    assert parse_cassettes("5000:10,100:20,100:5") == {5000: 10, 100: 25}
+
+
+def test_atm_rejects_amount_before_debiting():
+    card_repository = InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 10_000}})
+    dispenser = CashDispenser({1000: 5})
+    ui = FakeUI(inputs=("1333444455556666", "5678", "2", "1500", "2", "6000", "2", "3000", "4"))
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(cash_dispenser=dispenser), ui=ui))
+
+    with pytest.raises(SystemExit):
+        atm.run()
+
+    assert ui.messages.count(UiMessage.CANNOT_DISPENSE) == 2
+    assert card_repository.get_balance("1333444455556666") == 7000
+    assert dispenser.notes == {1000: 2}
+
+
+def test_split_uses_fewest_notes_of_cassette_denominations():
+    sut = CashDispenser({5000: 0, 1000: 0, 200: 0})
+
+    assert sut.split(6600) == {5000: 1, 1000: 1, 200: 3}
+    assert sut.split(5000 * 100 + 400) == {5000: 100, 200: 2}
+    assert sut.notes == {5000: 0, 1000: 0, 200: 0}
+
+
+def test_split_rejects_amounts_that_cannot_be_made_of_notes():
+    sut = CashDispenser({500: 1, 200: 1})
+
+    for amount in (100, 300, 150):
+        with pytest.raises(CannotAccept):
+            sut.split(amount)
+
+
+def test_atm_shows_dispensed_notes_and_takes_deposited_notes():
+    card_repository = InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 10_000}})
+    dispenser = CashDispenser({1000: 5, 500: 1})
+    ui = FakeUI(inputs=("1333444455556666", "5678", "2", "2500", "3", "5500", "3", "700", "4"))
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(cash_dispenser=dispenser), ui=ui))
+
+    with pytest.raises(SystemExit):
+        atm.run()
+
+    assert UiMessage.NOTES_DISPENSED.format(notes=format_notes({1000: 2, 500: 1})) in ui.messages
+    assert UiMessage.CANNOT_ACCEPT.format(denominations="1000, 500") in ui.messages
+    assert card_repository.get_balance("1333444455556666") == 13_000
+    assert dispenser.notes == {1000: 8, 500: 1}
+
+
+def test_withdraw_keeps_notes_reserved_when_interrupted():
+    class InterruptedCardRepository(InMemoryCardRepository):
+        def withdraw(self, card: str, amount: int) -> int:
+            raise KeyboardInterrupt
+
+    card_repository = InterruptedCardRepository({"1333444455556666": {"pin": "5678", "balance": 10_000}})
+    dispenser = CashDispenser({1000: 5})
+    ui = FakeUI(inputs=("1333444455556666", "5678", "2", "2000"))
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(cash_dispenser=dispenser), ui=ui))
+
+    with pytest.raises(KeyboardInterrupt):
+        atm.run()
+
+    assert dispenser.notes == {1000: 3}
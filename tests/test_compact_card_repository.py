@@ -0,0 +1,35 @@
+import pytest
+
+from atmsys.compact_card_repository import CompactCardRepository
+from atmsys.exceptions import CardNotExists, InsufficientFunds
+
+
+@pytest.fixture
+def sut() -> CompactCardRepository:
+    return CompactCardRepository(
+        {
+            "3333444455556666": {"pin": "1234", "balance": 1_000},
+            "0000444455556666": {"pin": "5678", "balance": 100},
+        }
+    )
+
+
+def test_cards_are_found_by_packed_number(sut: CompactCardRepository):
+    assert sut.get_balance("0000444455556666") == 100
+    assert sut.is_card_pin_valid("3333444455556666", "1234")
+    assert not sut.is_card_pin_valid("3333444455556666", "123")
+    assert sorted(sut.card_numbers()) == ["0000444455556666", "3333444455556666"]
+
+
+def test_balance_changes(sut: CompactCardRepository):
+    assert sut.withdraw("3333444455556666", 300) == 700
+    assert sut.deposit("0000444455556666", 50) == 150
+    with pytest.raises(InsufficientFunds):
+        sut.withdraw("0000444455556666", 151)
+    assert sut.get_balance("0000444455556666") == 150
+
+
+@pytest.mark.parametrize("card", ["3333444455556667", "444455556666", "33334444555566xx"])
+def test_unknown_card_not_exists(sut: CompactCardRepository, card: str):
+    with pytest.raises(CardNotExists):
+        sut.get_balance(card)
@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from atmsys.journaled_file_card_repository import JournaledFileCardRepository
+
+
+@pytest.fixture
+def cards_file(tmp_path: Path) -> Path:
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps({"1333444455556666": {"pin": "5678", "balance": 100}}))
+    return filename
+
+
+def test_journal_does_not_rewrite_snapshot(cards_file: Path):
+    sut = JournaledFileCardRepository(str(cards_file))
+
+    sut.withdraw("1333444455556666", 11)
+    sut.deposit("1333444455556666", 5)
+    sut.close()
+
+    assert json.loads(cards_file.read_text())["1333444455556666"]["balance"] == 100
+    assert Path(f"{cards_file}.journal").read_text() == "1333444455556666 89\n1333444455556666 94\n"
+
+
+def test_journal_is_replayed_on_load(cards_file: Path):
+    sut = JournaledFileCardRepository(str(cards_file))
+    sut.withdraw("1333444455556666", 11)
+    sut.close()
+
+    sut = JournaledFileCardRepository(str(cards_file))
+
+    assert sut.get_balance("1333444455556666") == 89
+
+
+def test_journal_is_compacted_into_snapshot(cards_file: Path):
+    sut = JournaledFileCardRepository(str(cards_file), compact_every=2)
+
+    sut.withdraw("1333444455556666", 11)
+    sut.withdraw("1333444455556666", 9)
+    sut.close()
+
+    assert json.loads(cards_file.read_text())["1333444455556666"]["balance"] == 80
+    assert Path(f"{cards_file}.journal").read_text() == ""
+    assert JournaledFileCardRepository(str(cards_file)).get_balance("1333444455556666") == 80
+
+
+def test_torn_journal_record_is_ignored(cards_file: Path):
+    Path(f"{cards_file}.journal").write_text("1333444455556666 89\n1333444455556666 1")
+
+    sut = JournaledFileCardRepository(str(cards_file))
+    sut.deposit("1333444455556666", 1)
+    sut.close()
+
+    assert JournaledFileCardRepository(str(cards_file)).get_balance("1333444455556666") == 90
@@ -0,0 +1,64 @@
+from itertools import islice
+
+from fakes.in_memory_card_repository import InMemoryCardRepository
+
+from atmsys import card_repository
+from atmsys.card_number_filter import CardNumberFilter
+from atmsys.loadgen import SessionScript, build_scripts, run_load, run_session
+from atmsys.main import make_menu_items
+from atmsys.synchronized_card_repository import SynchronizedCardRepository
+from atmsys.withdrawal_limits import LimitedCardRepository, WithdrawalLimits
+
+
+def make_card_repo() -> SynchronizedCardRepository:
+    return SynchronizedCardRepository(InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}))
+
+
+def test_session_errors_are_classified_by_exception():
+    menu_items = make_menu_items()
+    overdraw = SessionScript("overdraw", ("1333444455556666", "5678", "2", "500", "4"))
+    blocked = SessionScript("blocked", ("1333444455556666", "0000", "0000", "0000"))
+
+    assert run_session(make_card_repo(), menu_items, overdraw) == ["InsufficientFunds"]
+    assert run_session(make_card_repo(), menu_items, blocked) == ["PinCodeAttemptsExceed"]
+
+
+def test_session_errors_without_own_message_are_classified_by_exception():
+    menu_items = make_menu_items()
+    limited = LimitedCardRepository(make_card_repo(), WithdrawalLimits(card_limit=50))
+    over_limit = SessionScript("withdraw", ("1333444455556666", "5678", "2", "60", "4"))
+
+    assert run_session(limited, menu_items, over_limit) == ["WithdrawalLimitExceeded"]
+
+
+def test_unknown_card_session_is_classified_as_card_not_exists():
+    cards = {"1333444455556666": {"pin": "5678", "balance": 100}}
+    menu_items = make_menu_items()
+    repository = card_repository.InMemoryCardRepository(cards)
+    unknown_card = next(script for script in build_scripts(cards, menu_items) if script.kind == "unknown_card")
+
+    errors = run_session(repository, menu_items, unknown_card, CardNumberFilter.from_repository(repository))
+
+    assert errors == ["CardNotExists"]
+
+
+def test_generated_scripts_follow_menu_flow():
+    cards = {"1333444455556666": {"pin": "5678", "balance": 100}}
+
+    scripts = list(islice(build_scripts(cards, make_menu_items()), 200))
+
+    assert {script.kind for script in scripts} >= {"balance", "withdraw", "blocked"}
+    assert all(script.inputs[-1] == "4" for script in scripts if script.kind == "balance")
+
+
+def test_load_runs_sessions_at_target_rate():
+    cards = {"1333444455556666": {"pin": "5678", "balance": 100}}
+    menu_items = make_menu_items()
+
+    report = run_load(
+        make_card_repo(), menu_items, build_scripts(cards, menu_items), rate=200, concurrency=4, duration=0.2
+    )
+
+    # 200 сеансов в секунду в течение 0.2 секунды
+    assert 10 <= report.sessions <= 41
+    assert report.percentiles()["p99"] > 0
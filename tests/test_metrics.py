@@ -0,0 +1,54 @@
+from collections.abc import Callable
+
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM, UI
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.metrics import InstrumentedCardRepository, MetricsRegistry, instrument_menu_items
+
+
+@pytest.fixture
+def metrics() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def make_atm(metrics: MetricsRegistry) -> Callable[[UI], ATM]:
+    def _make_atm(ui: UI) -> ATM:
+        card_repository = InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}})
+        return ATM(
+            card_repository=InstrumentedCardRepository(card_repository, metrics),
+            ui=ui,
+            menu=Menu(items=instrument_menu_items(make_menu_items(), metrics), ui=ui),
+            metrics=metrics,
+        )
+
+    return _make_atm
+
+
+def test_session_is_measured(make_atm: Callable[[UI], ATM], metrics: MetricsRegistry):
+    ui = FakeUI(inputs=("1333444455556666", "5678", "2", "500", "2", "11", "4"))
+
+    with pytest.raises(SystemExit):
+        make_atm(ui).run()
+
+    rendered = metrics.render()
+    assert "# TYPE atmsys_atm_authenticate_seconds histogram" in rendered
+    assert 'atmsys_menu_item_seconds_count{item="WithdrawMenuItem"} 2' in rendered
+    assert 'atmsys_menu_item_errors_total{error="InsufficientFunds",item="WithdrawMenuItem"} 1' in rendered
+    assert 'atmsys_repository_seconds_count{backend="InMemoryCardRepository",operation="withdraw"} 2' in rendered
+
+
+def test_histogram_buckets_are_cumulative(metrics: MetricsRegistry):
+    histogram = metrics.histogram("latency_seconds", operation="x")
+
+    histogram.observe(0.0002)
+    histogram.observe(3)
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{operation="x",le="0.00025"} 1' in lines
+    assert 'latency_seconds_bucket{operation="x",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{operation="x"} 2' in lines
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from atmsys.exceptions import CardNotExists, InsufficientFunds
+from atmsys.mmap_card_repository import MmapCardRepository, convert_json_to_mmap
+
+
+@pytest.fixture
+def cards_file(tmp_path: Path) -> Path:
+    json_filename = tmp_path / "cards.json"
+    json_filename.write_text(
+        json.dumps(
+            {
+                "1333444455556666": {"pin": "5678", "balance": 100},
+                "3333444455556666": {"pin": "1234", "balance": 1_000},
+            }
+        )
+    )
+    mmap_filename = tmp_path / "cards.bin"
+    convert_json_to_mmap(str(json_filename), str(mmap_filename))
+    return mmap_filename
+
+
+def test_converted_cards_are_readable(cards_file: Path):
+    sut = MmapCardRepository(str(cards_file))
+
+    assert sut.get_balance("1333444455556666") == 100
+    assert sut.get_balance("3333444455556666") == 1_000
+    assert sut.is_card_pin_valid("1333444455556666", "5678")
+    assert not sut.is_card_pin_valid("1333444455556666", "567")
+
+
+def test_balance_changes_are_persisted_in_place(cards_file: Path):
+    size = cards_file.stat().st_size
+    sut = MmapCardRepository(str(cards_file))
+
+    sut.withdraw("1333444455556666", 11)
+    sut.deposit("3333444455556666", 5)
+    sut.close()
+
+    sut = MmapCardRepository(str(cards_file))
+    assert sut.get_balance("1333444455556666") == 89
+    assert sut.get_balance("3333444455556666") == 1_005
+    assert cards_file.stat().st_size == size
+
+
+def test_unknown_card_raises(cards_file: Path):
+    sut = MmapCardRepository(str(cards_file))
+
+    with pytest.raises(CardNotExists):
+        sut.get_balance("7777777")
+
+
+def test_withdraw_above_balance_is_rejected(cards_file: Path):
+    sut = MmapCardRepository(str(cards_file))
+
+    with pytest.raises(InsufficientFunds):
+        sut.withdraw("1333444455556666", 101)
+
+    assert sut.get_balance("1333444455556666") == 100
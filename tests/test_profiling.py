@@ -0,0 +1,41 @@
+import pstats
+from pathlib import Path
+
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.profiling import ProfilerKind, ProfileScope, ProfilingSession
+
+
+def run_profiled_session(profiling: ProfilingSession) -> None:
+    ui = FakeUI(inputs=("1333444455556666", "5678", "1", "2", "11", "4"))
+    atm = ATM(
+        card_repository=InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}),
+        ui=ui,
+        menu=Menu(items=profiling.wrap_menu_items(make_menu_items()), ui=ui),
+    )
+    with pytest.raises(SystemExit), profiling:
+        atm.run()
+
+
+def test_session_profile_is_dumped_in_pstats_format(tmp_path: Path):
+    run_profiled_session(ProfilingSession(ProfilerKind.CPROFILE, ProfileScope.SESSION, str(tmp_path)))
+
+    (profile,) = tmp_path.glob("session-*-session.prof")
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+
+def test_each_menu_item_gets_its_own_profile(tmp_path: Path):
+    run_profiled_session(ProfilingSession(ProfilerKind.SAMPLING, ProfileScope.ITEMS, str(tmp_path)))
+
+    names = {path.name.split("-")[-1] for path in tmp_path.iterdir()}
+    assert names == {
+        "CheckBalanceMenuItem.collapsed",
+        "WithdrawMenuItem.collapsed",
+        "DepositMenuItem.collapsed",
+        "ExitMenuItem.collapsed",
+    }
@@ -0,0 +1,105 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from atmsys.transaction_journal import TransactionJournal
+from atmsys.typedefs import OperationKind
+
+pytest.importorskip("numpy")
+
+from atmsys.reconciliation import Balances, Operations, main, reconcile
+
+
+def write_journal(filename: Path, operations: list[tuple[str, OperationKind, int, int]]) -> str:
+    journal = TransactionJournal(str(filename))
+    for card, kind, amount, balance in operations:
+        journal.record(card, kind, amount, balance)
+    journal.close()
+    return str(filename)
+
+
+def test_reconcile_finds_mismatches_and_terminal_totals(tmp_path: Path):
+    opening = Balances.from_cards(
+        {
+            "1333444455556666": {"pin": "5678", "balance": 100},
+            "4000000000000000": {"pin": "1234", "balance": 50},
+            "4000000000000001": {"pin": "1234", "balance": 10},
+        }
+    )
+    closing = Balances.from_cards(
+        {
+            "1333444455556666": {"pin": "5678", "balance": 80},
+            "4000000000000000": {"pin": "1234", "balance": 55},
+            "4000000000000001": {"pin": "1234", "balance": 7},
+        }
+    )
+    operations = Operations.from_journals(
+        [
+            write_journal(
+                tmp_path / "atm-1.log",
+                [
+                    ("1333444455556666", OperationKind.WITHDRAW, 30, 70),
+                    ("4000000000000000", OperationKind.DEPOSIT, 5, 55),
+                ],
+            ),
+            write_journal(tmp_path / "atm-2.log", [("1333444455556666", OperationKind.DEPOSIT, 10, 80)]),
+        ]
+    )
+
+    report = reconcile(opening, closing, operations)
+
+    assert (report.cards, report.operations, report.deposits, report.withdrawals) == (3, 3, 15, 30)
+    assert {name: (totals.cash_in, totals.cash_out) for name, totals in report.terminals.items()} == {
+        "atm-1": (5, 30),
+        "atm-2": (10, 0),
+    }
+    output = io.StringIO()
+    report.write_mismatches(output)
+    assert output.getvalue().splitlines()[1:] == ["4000000000000001,10,7,0,-3"]
+
+
+def test_reconciliation_command_exits_with_error_on_mismatch(tmp_path: Path):
+    cards = {"1333444455556666": {"pin": "5678", "balance": 100}}
+    (tmp_path / "opening.json").write_text(json.dumps(cards))
+    (tmp_path / "closing.json").write_text(json.dumps(cards))
+    journal = write_journal(tmp_path / "atm-1.log", [("1333444455556666", OperationKind.WITHDRAW, 30, 70)])
+
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "opening.json"), str(tmp_path / "closing.json"), journal])
+
+
+def test_card_missing_from_snapshot_has_zero_balance():
+    opening = Balances.from_cards({"1333444455556666": {"pin": "5678", "balance": 100}})
+    closing = Balances.from_cards(
+        {"1333444455556666": {"pin": "5678", "balance": 100}, "4000000000000000": {"pin": "1234", "balance": 20}}
+    )
+
+    report = reconcile(opening, closing, Operations.from_journals([]))
+
+    assert report.cards == 2
+    assert report.mismatches.tolist() == [4_000_000_000_000_000]
+
+
+def test_journal_load_skips_torn_line_and_keeps_cash_totals_exact(tmp_path: Path):
+    journal = tmp_path / "atm-1.log"
+    journal.write_text(
+        f"1.0 1333444455556666 deposit {2**62} {2**62}\n"
+        "2.0 1333444455556666 deposit 1 0\n"
+        "3.0 1333444455556666 withdraw 5"
+    )
+
+    operations = Operations.from_journals([str(journal)])
+    report = reconcile(Balances.from_cards({}), Balances.from_cards({}), operations)
+
+    assert operations.amounts.tolist() == [2**62, 1]
+    assert report.terminals["atm-1"].cash_in == 2**62 + 1
+
+
+def test_journal_with_malformed_card_number_is_rejected(tmp_path: Path):
+    journal = tmp_path / "atm-1.log"
+    journal.write_text("1.0 133344445555666 deposit 5 5\n")
+
+    with pytest.raises(ValueError):
+        Operations.from_journals([str(journal)])
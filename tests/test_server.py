@@ -0,0 +1,116 @@
+import socket
+import threading
+from collections.abc import Iterator
+
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+
+from atmsys.main import make_menu_items
+from atmsys.server import ATMServer
+from atmsys.ui_messages import UiMessage
+
+
+def start_server(
+    max_sessions: int = 4, idle_timeout: float = 0.5, grace_period: float = 1
+) -> tuple[ATMServer, threading.Thread]:
+    server = ATMServer(
+        card_repository=InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}),
+        address=("127.0.0.1", 0),
+        menu_items=make_menu_items(),
+        max_sessions=max_sessions,
+        idle_timeout=idle_timeout,
+    )
+    thread = threading.Thread(target=server.serve_forever, kwargs={"grace_period": grace_period})
+    thread.start()
+    return server, thread
+
+
+@pytest.fixture
+def server() -> Iterator[ATMServer]:
+    server, thread = start_server()
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+def run_session(server: ATMServer, inputs: str) -> str:
+    with socket.create_connection(server.address) as connection:
+        connection.sendall(inputs.encode())
+        chunks = []
+        while chunk := connection.recv(4096):
+            chunks.append(chunk)
+    return b"".join(chunks).decode()
+
+
+def read_until(connection: socket.socket, text: str) -> str:
+    received = ""
+    while text not in received:
+        chunk = connection.recv(4096)
+        assert chunk, f"connection closed before {text!r}"
+        received += chunk.decode()
+    return received
+
+
+def test_server_runs_session_per_connection(server: ATMServer):
+    output = run_session(server, "1333444455556666\n5678\n2\n11\n4\n")
+
+    assert UiMessage.PIN_ACCEPTED in output
+    assert UiMessage.BALANCE.format(balance=89) in output
+    assert UiMessage.GOODBYE in output
+
+
+def test_server_ends_idle_session(server: ATMServer):
+    output = run_session(server, "1333444455556666\n")
+
+    assert UiMessage.SESSION_TIMEOUT in output
+
+
+def test_connections_beyond_max_sessions_wait_for_a_free_slot():
+    server, thread = start_server(max_sessions=1, idle_timeout=5)
+    try:
+        with (
+            socket.create_connection(server.address, timeout=5) as first,
+            socket.create_connection(server.address, timeout=5) as second,
+        ):
+            read_until(first, UiMessage.INPUT_CARD_NUMBER)
+            second.settimeout(0.3)
+            with pytest.raises(TimeoutError):
+                second.recv(4096)
+
+            first.sendall(b"1333444455556666\n5678\n4\n")
+            read_until(first, UiMessage.GOODBYE)
+
+            second.settimeout(5)
+            assert UiMessage.INPUT_CARD_NUMBER in read_until(second, UiMessage.INPUT_CARD_NUMBER)
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def test_shutdown_lets_live_session_finish_within_grace_period():
+    server, thread = start_server(idle_timeout=5, grace_period=5)
+    address = server.address
+    with socket.create_connection(address, timeout=5) as connection:
+        connection.sendall(b"1333444455556666\n5678\n")
+        read_until(connection, UiMessage.PIN_ACCEPTED)
+
+        server.shutdown()
+        connection.sendall(b"2\n11\n4\n")
+
+        assert UiMessage.BALANCE.format(balance=89) in read_until(connection, UiMessage.GOODBYE)
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    with pytest.raises(OSError):
+        socket.create_connection(address, timeout=1)
+
+
+def test_shutdown_drops_sessions_still_open_after_grace_period():
+    server, thread = start_server(idle_timeout=30, grace_period=0.2)
+    with socket.create_connection(server.address, timeout=5) as connection:
+        read_until(connection, UiMessage.INPUT_CARD_NUMBER)
+
+        server.shutdown()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert connection.recv(4096) == b""
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from pathlib import Path
+
+from fakes.in_memory_card_repository import InMemoryCardRepository
+
+from atmsys.file_card_repository import FileCardRepository
+from atmsys.settlement import main, settle
+from atmsys.typedefs import Operation, OperationKind
+
+OPERATIONS = """operation,card,amount
+deposit,1333444455556666,50
+withdraw,1333444455556666,500
+withdraw,9999444455556666,1
+refund,1333444455556666,1
+withdraw,3333444455556666,-5
+withdraw,1333444455556666,150
+"""
+
+
+def make_cards() -> dict:
+    return {
+        "1333444455556666": {"pin": "5678", "balance": 100},
+        "3333444455556666": {"pin": "1234", "balance": 1_000},
+    }
+
+
+def test_batch_reports_errors_inline():
+    sut = InMemoryCardRepository(make_cards())
+
+    results = sut.apply_batch(
+        [
+            Operation(OperationKind.WITHDRAW, "1333444455556666", 30),
+            Operation(OperationKind.WITHDRAW, "1333444455556666", 100),
+            Operation(OperationKind.DEPOSIT, "9999444455556666", 1),
+        ]
+    )
+
+    assert [(result.balance, result.error) for result in results] == [
+        (70, None),
+        (None, "InsufficientFunds"),
+        (None, "CardNotExists"),
+    ]
+
+
+def test_file_repository_saves_batch_once(tmp_path: Path, monkeypatch):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(make_cards()))
+    sut = FileCardRepository(str(filename))
+    saves = []
+    monkeypatch.setattr(sut, "_save", lambda: saves.append(1))
+
+    sut.apply_batch([Operation(OperationKind.DEPOSIT, "1333444455556666", 1)] * 100)
+
+    assert len(saves) == 1
+    assert sut.get_balance("1333444455556666") == 200
+
+
+def test_settlement_streams_rows_in_chunks():
+    sut = InMemoryCardRepository(make_cards())
+    output = io.StringIO()
+
+    report = settle(sut, csv.DictReader(io.StringIO(OPERATIONS)), output, chunk_size=4)
+
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [(row["balance"], row["error"]) for row in rows] == [
+        ("150", ""),
+        ("", "InsufficientFunds"),
+        ("", "CardNotExists"),
+        ("", "InvalidOperation"),
+        ("", "InvalidOperation"),
+        ("0", ""),
+    ]
+    assert report.operations == 6
+    assert report.errors.total() == 4
+
+
+def test_settlement_cli_applies_file_to_storage(tmp_path: Path):
+    cards_file = tmp_path / "cards.json"
+    cards_file.write_text(json.dumps(make_cards()))
+    operations_file = tmp_path / "operations.csv"
+    operations_file.write_text(OPERATIONS)
+
+    main(["--storage", "journal", "--cards", str(cards_file), str(operations_file), "--output", str(tmp_path / "out")])
+
+    assert FileCardRepository(str(cards_file)).get_balance("1333444455556666") == 100
+    assert Path(f"{cards_file}.journal").read_text().splitlines()[-1] == "1333444455556666 0"
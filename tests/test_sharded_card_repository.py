@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from atmsys.exceptions import CardNotExists
+from atmsys.sharded_card_repository import (
+    ShardedCardRepository,
+    ShardingScheme,
+    read_shards,
+    rebalance,
+    shard_filename,
+    write_shards,
+)
+
+CARDS = {f"4000{number:012d}": {"pin": "1234", "balance": number} for number in range(100)}
+
+
+def test_calls_are_routed_to_card_shard(tmp_path: Path):
+    write_shards(CARDS, str(tmp_path), shards=4)
+    sut = ShardedCardRepository.open(str(tmp_path))
+
+    assert sut.withdraw("4000000000000042", 2) == 40
+    assert sut.deposit("4000000000000007", 3) == 10
+    assert sut.is_card_pin_valid("4000000000000099", "1234")
+    assert sorted(sut.card_numbers()) == sorted(CARDS)
+    with pytest.raises(CardNotExists):
+        sut.get_balance("5000000000000000")
+    # Каждая карта лежит ровно в одном файле шарда, и файлы меньше общего
+    shard_sizes = [len(json.loads(shard_filename(tmp_path, index).read_text())) for index in range(4)]
+    assert sum(shard_sizes) == len(CARDS)
+    assert max(shard_sizes) < len(CARDS)
+
+
+def test_bin_scheme_keeps_issuer_cards_together(tmp_path: Path):
+    cards = {**CARDS, "5100000000000001": {"pin": "1", "balance": 1}}
+    write_shards(cards, str(tmp_path), shards=8, scheme=ShardingScheme.BIN)
+
+    non_empty = [index for index in range(8) if json.loads(shard_filename(tmp_path, index).read_text())]
+
+    assert len(non_empty) <= 2
+
+
+def test_rebalance_keeps_cards_and_balances(tmp_path: Path):
+    directory = tmp_path / "cards"
+    write_shards(CARDS, str(directory), shards=2)
+    sut = ShardedCardRepository.open(str(directory))
+    sut.withdraw("4000000000000050", 50)
+    sut.close()
+
+    rebalance(str(directory), shards=5)
+
+    assert read_shards(str(directory)) == {**CARDS, "4000000000000050": {"pin": "1234", "balance": 0}}
+    assert ShardedCardRepository.open(str(directory)).get_balance("4000000000000050") == 0
+    assert shard_filename(directory, 4).exists()
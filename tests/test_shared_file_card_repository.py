@@ -0,0 +1,87 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from atmsys.shared_file_card_repository import SharedFileCardRepository
+
+CARD = "1333444455556666"
+
+# Процесс-терминал: пополняет карту на 1 рубль заданное число раз
+TERMINAL_SCRIPT = """
+import sys
+from atmsys.shared_file_card_repository import SharedFileCardRepository
+
+repository = SharedFileCardRepository(sys.argv[1], compact_every=7)
+for _ in range(int(sys.argv[2])):
+    repository.deposit("1333444455556666", 1)
+repository.close()
+"""
+
+
+@pytest.fixture
+def cards_file(tmp_path: Path) -> Path:
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps({CARD: {"pin": "5678", "balance": 100}}))
+    return filename
+
+
+def test_changes_of_another_terminal_are_seen(cards_file: Path):
+    first = SharedFileCardRepository(str(cards_file))
+    second = SharedFileCardRepository(str(cards_file))
+
+    first.withdraw(CARD, 30)
+    assert second.get_balance(CARD) == 70
+    second.deposit(CARD, 5)
+    assert first.get_balance(CARD) == 75
+    assert first.version == second.version
+
+
+def test_terminal_rereads_snapshot_after_compaction_by_another(cards_file: Path):
+    first = SharedFileCardRepository(str(cards_file), compact_every=2)
+    second = SharedFileCardRepository(str(cards_file), compact_every=2)
+    assert second.get_balance(CARD) == 100
+
+    first.withdraw(CARD, 1)
+    first.withdraw(CARD, 1)
+    first.withdraw(CARD, 1)
+
+    assert first.version[0] == 1
+    assert second.get_balance(CARD) == 97
+    assert second.version == first.version
+
+
+def test_parallel_processes_do_not_lose_updates(cards_file: Path):
+    terminals = [
+        subprocess.Popen(
+            [sys.executable, "-c", TERMINAL_SCRIPT, str(cards_file), "50"], cwd=Path(__file__).parent.parent
+        )
+        for _ in range(4)
+    ]
+    for terminal in terminals:
+        assert terminal.wait(timeout=60) == 0
+
+    assert SharedFileCardRepository(str(cards_file)).get_balance(CARD) == 300
+
+
+def test_torn_line_of_dead_writer_is_cut_before_next_append(cards_file: Path):
+    first = SharedFileCardRepository(str(cards_file))
+    second = SharedFileCardRepository(str(cards_file))
+    first.withdraw(CARD, 30)
+    journal = Path(f"{cards_file}.journal")
+    with journal.open("ab") as f:
+        f.write(f"{CARD} 9".encode())
+
+    assert second.deposit(CARD, 5) == 75
+
+    assert first.get_balance(CARD) == 75
+    assert journal.read_text().splitlines() == [f"{CARD} 70", f"{CARD} 75"]
+
+
+def test_corrupt_journal_line_is_skipped(cards_file: Path):
+    journal = Path(f"{cards_file}.journal")
+    journal.write_text(f"{CARD} 9{CARD} 50\n{CARD} 60\n")
+
+    assert SharedFileCardRepository(str(cards_file)).get_balance(CARD) == 60
@@ -0,0 +1,64 @@
+import threading
+from contextlib import suppress
+from pathlib import Path
+
+import pytest
+
+from atmsys.exceptions import CardNotExists, InsufficientFunds
+from atmsys.sqlite_card_repository import SqliteCardRepository
+
+
+@pytest.fixture
+def card_repo(tmp_path: Path):
+    repository = SqliteCardRepository(str(tmp_path / "cards.db"))
+    repository.add_cards({"1333444455556666": {"pin": "5678", "balance": 100}})
+    yield repository
+    repository.close()
+
+
+def test_withdraw_and_deposit(card_repo: SqliteCardRepository):
+    card_repo.withdraw("1333444455556666", 11)
+    card_repo.deposit("1333444455556666", 5)
+
+    assert card_repo.get_balance("1333444455556666") == 94
+    assert card_repo.is_card_pin_valid("1333444455556666", "5678")
+
+
+def test_withdraw_above_balance_is_rejected(card_repo: SqliteCardRepository):
+    with pytest.raises(InsufficientFunds):
+        card_repo.withdraw("1333444455556666", 101)
+
+    assert card_repo.get_balance("1333444455556666") == 100
+
+
+def test_unknown_card_raises(card_repo: SqliteCardRepository):
+    with pytest.raises(CardNotExists):
+        card_repo.withdraw("7777777", 1)
+    with pytest.raises(CardNotExists):
+        card_repo.deposit("7777777", 1)
+
+
+def test_concurrent_withdrawals_never_overdraw(card_repo: SqliteCardRepository):
+    def withdraw_all():
+        for _ in range(50):
+            with suppress(InsufficientFunds):
+                card_repo.withdraw("1333444455556666", 1)
+
+    threads = [threading.Thread(target=withdraw_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert card_repo.get_balance("1333444455556666") == 0
+
+
+def test_connection_of_finished_thread_is_closed(card_repo: SqliteCardRepository):
+    threads = [threading.Thread(target=card_repo.get_balance, args=("1333444455556666",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Осталось только соединение главного потока
+    assert len(card_repo._connections) == 1
@@ -0,0 +1,140 @@
+import io
+import json
+import threading
+from pathlib import Path
+
+import pytest
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.exceptions import CardNotExists, CardStoreLoadFailed
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.streaming_file_card_repository import StreamingFileCardRepository, iter_cards
+from atmsys.ui_messages import UiMessage
+
+CARDS = {
+    "1333444455556666": {"pin": "5678", "balance": 100},
+    "3333444455556666": {"pin": "1333444455556666", "balance": 1_000},
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_cards_are_parsed_across_chunk_boundaries(chunk_size: int):
+    text = json.dumps(CARDS, indent=2)
+
+    assert dict(iter_cards(io.StringIO(text), chunk_size)) == CARDS
+    assert dict(iter_cards(io.StringIO(""), chunk_size)) == {}
+    assert dict(iter_cards(io.StringIO(" {} "), chunk_size)) == {}
+
+
+def test_lookup_finds_card_in_file_before_loading(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(CARDS))
+    # Фоновая загрузка не запускается, поэтому карты можно найти только в самом файле
+    monkeypatch.setattr(StreamingFileCardRepository, "_load_in_background", lambda self: None)
+    sut = StreamingFileCardRepository(str(filename))
+
+    assert sut.get_balance("1333444455556666") == 100
+    assert sut.is_card_pin_valid("3333444455556666", "1333444455556666")
+    assert list(sut._cards) == ["1333444455556666", "3333444455556666"]
+    with pytest.raises(CardNotExists):
+        sut.get_balance("9999444455556666")
+
+
+def test_changes_are_saved_after_full_load(tmp_path: Path):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(CARDS))
+    sut = StreamingFileCardRepository(str(filename), chunk_size=5)
+
+    sut.withdraw("3333444455556666", 300)
+    sut.close()
+
+    assert json.loads(filename.read_text())["3333444455556666"]["balance"] == 700
+    assert set(StreamingFileCardRepository(str(filename)).card_numbers()) == set(CARDS)
+    with pytest.raises(CardNotExists):
+        sut.get_balance("9999444455556666")
+
+
+def test_load_failure_is_reported_before_balance_changes(tmp_path: Path):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(CARDS)[:-5])
+    sut = StreamingFileCardRepository(str(filename))
+    sut._loaded.wait()
+
+    with pytest.raises(CardStoreLoadFailed):
+        sut.withdraw("1333444455556666", 30)
+
+    assert sut._cards.get("1333444455556666", CARDS["1333444455556666"])["balance"] == 100
+    sut.close()
+
+
+def test_lookups_wait_for_load_after_too_many_file_searches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(CARDS))
+    release_loader = threading.Event()
+    load_in_background = StreamingFileCardRepository._load_in_background
+    find_in_file = StreamingFileCardRepository._find_in_file
+    searches = []
+
+    def delayed_load(self: StreamingFileCardRepository) -> None:
+        release_loader.wait()
+        load_in_background(self)
+
+    def counted_find(self: StreamingFileCardRepository, card: str) -> bool:
+        searches.append(card)
+        return find_in_file(self, card)
+
+    monkeypatch.setattr(StreamingFileCardRepository, "_load_in_background", delayed_load)
+    monkeypatch.setattr(StreamingFileCardRepository, "_find_in_file", counted_find)
+    sut = StreamingFileCardRepository(str(filename), max_file_searches=1)
+
+    with pytest.raises(CardNotExists):
+        sut.get_balance("9999444455556666")
+    threading.Timer(0.1, release_loader.set).start()
+    with pytest.raises(CardNotExists):
+        sut.get_balance("8888444455556666")
+
+    assert searches == ["9999444455556666"]
+    assert sut.get_balance("1333444455556666") == 100
+    sut.close()
+
+
+def test_withdraw_during_load_is_applied_at_once_and_saved_after_load(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(CARDS))
+    release_loader = threading.Event()
+    load_in_background = StreamingFileCardRepository._load_in_background
+
+    def delayed_load(self: StreamingFileCardRepository) -> None:
+        release_loader.wait()
+        load_in_background(self)
+
+    monkeypatch.setattr(StreamingFileCardRepository, "_load_in_background", delayed_load)
+    sut = StreamingFileCardRepository(str(filename))
+
+    assert sut.withdraw("3333444455556666", 300) == 700
+    assert json.loads(filename.read_text())["3333444455556666"]["balance"] == 1_000
+
+    release_loader.set()
+    sut.wait_loaded()
+
+    assert json.loads(filename.read_text()) == {
+        **CARDS,
+        "3333444455556666": {"pin": "1333444455556666", "balance": 700},
+    }
+    sut.close()
+
+
+def test_atm_reports_failed_load_instead_of_crashing(tmp_path: Path):
+    filename = tmp_path / "cards.json"
+    filename.write_text(json.dumps(CARDS)[:-5])
+    card_repository = StreamingFileCardRepository(str(filename), max_file_searches=0)
+    ui = FakeUI(inputs=("1333444455556666", "5678"))
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(), ui=ui))
+
+    with pytest.raises(SystemExit):
+        atm.run()
+
+    assert ui.messages[-1] == UiMessage.ATM_EXCEPTION
+    card_repository.close()
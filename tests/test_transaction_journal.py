@@ -0,0 +1,124 @@
+import io
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.transaction_journal import JournalingCardRepository, TransactionJournal, export_history
+from atmsys.typedefs import Operation, OperationKind
+from atmsys.ui_messages import UiMessage
+
+
+@pytest.fixture
+def journal_file(tmp_path: Path) -> Path:
+    return tmp_path / "transactions.log"
+
+
+def test_latest_returns_newest_first_and_keeps_only_recent(journal_file: Path):
+    sut = TransactionJournal(str(journal_file), recent_size=3)
+
+    for balance in range(100, 105):
+        sut.record("1333444455556666", OperationKind.DEPOSIT, 1, balance)
+
+    assert [transaction.balance for transaction in sut.latest("1333444455556666")] == [104, 103, 102]
+    assert [transaction.balance for transaction in sut.latest("1333444455556666", 2)] == [104, 103]
+    assert sut.latest("0000000000000000") == []
+
+
+def test_journal_restores_recent_transactions_and_keeps_full_history(journal_file: Path):
+    sut = TransactionJournal(str(journal_file), recent_size=2)
+    for balance in (90, 80, 70):
+        sut.record("1333444455556666", OperationKind.WITHDRAW, 10, balance)
+    sut.record("4000000000000000", OperationKind.DEPOSIT, 5, 5)
+    sut.close()
+
+    sut = TransactionJournal(str(journal_file), recent_size=2)
+
+    assert [transaction.balance for transaction in sut.latest("1333444455556666")] == [70, 80]
+    assert [transaction.balance for transaction in sut.history("1333444455556666")] == [90, 80, 70]
+    output = io.StringIO()
+    assert export_history(sut.history("4000000000000000"), output) == 1
+    assert output.getvalue().splitlines()[1].endswith(",4000000000000000,deposit,5,5")
+
+
+def test_journal_drops_torn_last_line(journal_file: Path):
+    journal_file.write_text("1.0 1333444455556666 deposit 5 105\n2.0 1333444455556666 withdraw 1")
+
+    sut = TransactionJournal(str(journal_file))
+
+    assert [transaction.balance for transaction in sut.latest("1333444455556666")] == [105]
+    assert journal_file.read_text() == "1.0 1333444455556666 deposit 5 105\n"
+
+
+def test_journaling_repository_records_completed_operations_only():
+    journal = TransactionJournal()
+    sut = JournalingCardRepository(
+        InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}), journal
+    )
+
+    sut.withdraw("1333444455556666", 30)
+    sut.apply_batch(
+        [
+            Operation(OperationKind.DEPOSIT, "1333444455556666", 10),
+            Operation(OperationKind.WITHDRAW, "1333444455556666", 1000),
+        ]
+    )
+
+    assert [(t.kind, t.amount, t.balance) for t in journal.latest("1333444455556666")] == [
+        (OperationKind.DEPOSIT, 10, 80),
+        (OperationKind.WITHDRAW, 30, 70),
+    ]
+
+
+def test_atm_shows_mini_statement():
+    journal = TransactionJournal()
+    card_repository = JournalingCardRepository(
+        InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}), journal
+    )
+    ui = FakeUI(inputs=("1333444455556666", "5678", "4", "2", "30", "4", "5"))
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(journal), ui=ui))
+
+    with pytest.raises(SystemExit):
+        atm.run()
+
+    assert UiMessage.MINI_STATEMENT_EMPTY in ui.messages
+    statement = next(message for message in ui.messages if message.startswith(UiMessage.MINI_STATEMENT))
+    assert "-30" in statement
+
+
+def test_concurrent_operations_on_card_are_journaled_in_applied_order():
+    class SlowToReturnCardRepository(InMemoryCardRepository):
+        def deposit(self, card: str, amount: int) -> int:
+            balance = super().deposit(card, amount)
+            if amount == 1:
+                time.sleep(0.2)
+            return balance
+
+    journal = TransactionJournal()
+    sut = JournalingCardRepository(
+        SlowToReturnCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}), journal
+    )
+
+    slow = threading.Thread(target=sut.deposit, args=("1333444455556666", 1))
+    slow.start()
+    time.sleep(0.05)
+    sut.deposit("1333444455556666", 10)
+    slow.join()
+
+    assert [t.balance for t in journal.latest("1333444455556666")] == [111, 101]
+
+
+def test_failed_journal_write_is_not_shown_in_mini_statement(journal_file: Path):
+    sut = TransactionJournal(str(journal_file))
+    sut._file.close()
+
+    with pytest.raises(ValueError):
+        sut.record("1333444455556666", OperationKind.DEPOSIT, 5, 105)
+
+    assert sut.latest("1333444455556666") == []
@@ -0,0 +1,89 @@
+import pytest
+from fakes.in_memory_card_repository import InMemoryCardRepository
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.exceptions import InsufficientFunds, WithdrawalLimitExceeded
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.ui_messages import UiMessage
+from atmsys.withdrawal_limits import LimitedCardRepository, WithdrawalLimits
+
+HOUR = 60 * 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000 * HOUR
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def test_card_limit_covers_rolling_day(clock: FakeClock):
+    sut = WithdrawalLimits(card_limit=100, clock=clock)
+
+    sut.reserve("1333444455556666", 60)
+    clock.now += 12 * HOUR
+    sut.reserve("1333444455556666", 40)
+    with pytest.raises(WithdrawalLimitExceeded) as e:
+        sut.reserve("1333444455556666", 1)
+    assert e.value.available == 0
+    sut.reserve("4000000000000000", 100)
+
+    clock.now += 12 * HOUR
+    assert sut.available("1333444455556666") == 60
+    clock.now += 12 * HOUR
+    assert sut.available("1333444455556666") == 100
+
+
+def test_terminal_limit_is_shared_by_cards(clock: FakeClock):
+    sut = WithdrawalLimits(card_limit=100, terminal_limit=150, clock=clock)
+
+    sut.reserve("1333444455556666", 100)
+    with pytest.raises(WithdrawalLimitExceeded) as e:
+        sut.reserve("4000000000000000", 80)
+
+    assert e.value.available == 50
+
+
+def test_idle_cards_are_forgotten(clock: FakeClock):
+    sut = WithdrawalLimits(card_limit=100, clock=clock)
+    for number in range(1000):
+        sut.reserve(str(number), 10)
+
+    clock.now += 24 * HOUR
+    sut.reserve("1333444455556666", 10)
+
+    assert len(sut._cards) == 1
+
+
+def test_failed_withdrawal_does_not_use_limit(clock: FakeClock):
+    limits = WithdrawalLimits(card_limit=100, clock=clock)
+    sut = LimitedCardRepository(InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 50}}), limits)
+
+    with pytest.raises(InsufficientFunds):
+        sut.withdraw("1333444455556666", 80)
+
+    assert limits.available("1333444455556666") == 100
+    assert sut.withdraw("1333444455556666", 50) == 0
+    assert limits.available("1333444455556666") == 50
+
+
+def test_atm_shows_withdrawal_limit_message():
+    card_repository = LimitedCardRepository(
+        InMemoryCardRepository({"1333444455556666": {"pin": "5678", "balance": 100}}), WithdrawalLimits(card_limit=30)
+    )
+    ui = FakeUI(inputs=("1333444455556666", "5678", "2", "50", "4"))
+    atm = ATM(card_repository=card_repository, ui=ui, menu=Menu(items=make_menu_items(), ui=ui))
+
+    with pytest.raises(SystemExit):
+        atm.run()
+
+    assert UiMessage.WITHDRAWAL_LIMIT_EXCEEDED.format(available=30) in ui.messages
+    assert card_repository.get_balance("1333444455556666") == 100
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+from fakes.ui import FakeUI
+
+from atmsys.atm import ATM
+from atmsys.main import make_menu_items
+from atmsys.menu import Menu
+from atmsys.metrics import MetricsRegistry
+from atmsys.write_behind_file_card_repository import WriteBehindFileCardRepository
+
+
+@pytest.fixture
+def cards_file(tmp_path: Path) -> Path:
+    filename = tmp_path / "cards.json"
+    filename.write_text(
+        json.dumps(
+            {
+                "1333444455556666": {"pin": "5678", "balance": 100},
+                "3333444455556666": {"pin": "1234", "balance": 1_000},
+            }
+        )
+    )
+    return filename
+
+
+def saved_balance(cards_file: Path, card: str) -> int:
+    return json.loads(cards_file.read_text())[card]["balance"]
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_changes_are_flushed_within_data_loss_window(cards_file: Path):
+    metrics = MetricsRegistry()
+    sut = WriteBehindFileCardRepository(str(cards_file), max_data_loss=0.2, metrics=metrics)
+
+    assert sut.withdraw("1333444455556666", 30) == 70
+    assert saved_balance(cards_file, "1333444455556666") == 100
+
+    wait_until(lambda: saved_balance(cards_file, "1333444455556666") == 70)
+    sut.close()
+    assert "atmsys_write_behind_flush_lag_seconds_count 1" in metrics.render()
+
+
+def test_many_dirty_cards_are_flushed_without_waiting(cards_file: Path):
+    sut = WriteBehindFileCardRepository(str(cards_file), max_data_loss=60, max_dirty=2)
+
+    sut.deposit("1333444455556666", 1)
+    sut.deposit("3333444455556666", 1)
+
+    wait_until(lambda: sut.dirty_cards == 0)
+    assert saved_balance(cards_file, "3333444455556666") == 1_001
+    sut.close()
+
+
+def test_pending_changes_are_flushed_when_session_exits(cards_file: Path):
+    sut = WriteBehindFileCardRepository(str(cards_file), max_data_loss=60)
+    ui = FakeUI(inputs=["3333444455556666", "1234", "3", "500", "4"])
+    atm = ATM(card_repository=sut, ui=ui, menu=Menu(items=make_menu_items(), ui=ui))
+
+    with pytest.raises(SystemExit):
+        try:
+            atm.run()
+        finally:
+            sut.close()
+
+    assert saved_balance(cards_file, "3333444455556666") == 1_500
+
+
+def test_failed_flush_keeps_changes_dirty_and_is_retried(cards_file: Path, monkeypatch: pytest.MonkeyPatch):
+    metrics = MetricsRegistry()
+    replace = os.replace
+    failures = [OSError(28, "No space left on device")]
+
+    def replace_or_fail(src: str, dst: str) -> None:
+        if failures:
+            raise failures.pop()
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", replace_or_fail)
+    sut = WriteBehindFileCardRepository(str(cards_file), max_data_loss=0.1, metrics=metrics)
+
+    sut.withdraw("1333444455556666", 30)
+
+    wait_until(lambda: saved_balance(cards_file, "1333444455556666") == 70)
+    assert sut.dirty_cards == 0
+    assert sut._flusher.is_alive()
+    sut.close()
+    assert 'atmsys_write_behind_flush_errors_total{error="OSError"} 1' in metrics.render()
+
+
+def test_write_fails_while_background_flush_keeps_failing(cards_file: Path, monkeypatch: pytest.MonkeyPatch):
+    replace = os.replace
+    disk_full = [True]
+
+    def replace_or_fail(src: str, dst: str) -> None:
+        if disk_full:
+            raise OSError(28, "No space left on device")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", replace_or_fail)
+    sut = WriteBehindFileCardRepository(str(cards_file), max_data_loss=0.05)
+    sut.withdraw("1333444455556666", 30)
+    wait_until(lambda: sut._flush_error is not None)
+
+    with pytest.raises(OSError):
+        sut.withdraw("1333444455556666", 10)
+    assert sut.get_balance("1333444455556666") == 70
+
+    disk_full.clear()
+    assert sut.withdraw("1333444455556666", 10) == 60
+    sut.close()
+    assert saved_balance(cards_file, "1333444455556666") == 60